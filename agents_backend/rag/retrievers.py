@@ -1,4 +1,3 @@
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_mongodb import MongoDBAtlasVectorSearch
 from langchain_mongodb.retrievers import (
     MongoDBAtlasHybridSearchRetriever,
@@ -7,7 +6,7 @@ from loguru import logger
 
 from agents.config import settings
 
-from .embeddings import get_embedding_model
+from .embeddings import EmbeddingsModel, get_embedding_model
 
 Retriever = MongoDBAtlasHybridSearchRetriever
 
@@ -37,12 +36,12 @@ def get_retriever(
 
 
 def get_hybrid_search_retriever(
-    embedding_model: HuggingFaceEmbeddings, k: int
+    embedding_model: EmbeddingsModel, k: int
 ) -> MongoDBAtlasHybridSearchRetriever:
     """Creates a MongoDB Atlas hybrid search retriever with the given embedding model.
 
     Args:
-        embedding_model (HuggingFaceEmbeddings): The embedding model to use for vector search.
+        embedding_model (EmbeddingsModel): The shared embedding model to use for vector search.
         k (int): Number of documents to retrieve.
 
     Returns:
@@ -80,6 +80,7 @@ async def get_response(
             output_state = await graph.ainvoke(
                 input={
                     "messages": __format_messages(messages=messages),
+                    "philosopher_id": philosopher_id,
                     "philosopher_name": philosopher_name,
                     "philosopher_perspective": philosopher_perspective,
                     "philosopher_style": philosopher_style,
@@ -135,6 +136,7 @@ async def get_streaming_response(
             async for chunk in graph.astream(
                 input={
                     "messages": __format_messages(messages=messages),
+                    "philosopher_id": philosopher_id,
                     "philosopher_name": philosopher_name,
                     "philosopher_perspective": philosopher_perspective,
                     "philosopher_style": philosopher_style,
@@ -143,8 +145,9 @@ async def get_streaming_response(
                 config=config,
                 stream_mode="messages",
             ):
+                # Cached replies arrive as one whole AIMessage instead of chunks.
                 if chunk[1]["langgraph_node"] == "conversation_node" and isinstance(
-                    chunk[0], AIMessageChunk
+                    chunk[0], (AIMessageChunk, AIMessage)
                 ):
                     yield chunk[0].content
 
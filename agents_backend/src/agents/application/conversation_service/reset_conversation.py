@@ -1,7 +1,7 @@
 from loguru import logger
-from pymongo import MongoClient
 
 from agents.config import settings
+from agents.infrastructure.mongo import get_client_registry
 
 
 async def reset_conversation_state() -> dict:
@@ -18,8 +18,7 @@ async def reset_conversation_state() -> dict:
         Exception: If there's an error connecting to MongoDB or deleting collections
     """
     try:
-        client = MongoClient(settings.MONGO_URI)
-        db = client[settings.MONGO_DB_NAME]
+        db = get_client_registry().database(settings.MONGO_DB_NAME, settings.MONGO_URI)
 
         collections_deleted = []
 
@@ -35,8 +34,6 @@ async def reset_conversation_state() -> dict:
             collections_deleted.append(settings.MONGO_STATE_WRITES_COLLECTION)
             logger.info(f"Deleted collection: {settings.MONGO_STATE_WRITES_COLLECTION}")
 
-        client.close()
-
         if collections_deleted:
             return {
                 "status": "success",
@@ -0,0 +1,185 @@
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from agents.application.rag.embeddings import get_embedding_model
+from agents.config import settings
+
+
+@dataclass
+class ResponseCacheStats:
+    lookups: int = 0
+    hits: int = 0
+    stored: int = 0
+    expired: int = 0
+    lookup_seconds: float = 0.0
+    # Generation time of the cached replies that were served instead of calling the LLM.
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            **asdict(self),
+            "lookup_seconds": round(self.lookup_seconds, 3),
+            "saved_seconds": round(self.saved_seconds, 3),
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+@dataclass
+class CachedResponse:
+    question: str
+    reply: str
+    similarity: float
+    generation_seconds: float
+
+
+@dataclass
+class _CharacterEntries:
+    questions: list[str] = field(default_factory=list)
+    replies: list[str] = field(default_factory=list)
+    created_at: list[float] = field(default_factory=list)
+    generation_seconds: list[float] = field(default_factory=list)
+    vectors: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def keep(self, rows: np.ndarray) -> None:
+        self.questions = [self.questions[row] for row in rows]
+        self.replies = [self.replies[row] for row in rows]
+        self.created_at = [self.created_at[row] for row in rows]
+        self.generation_seconds = [self.generation_seconds[row] for row in rows]
+        self.vectors = self.vectors[rows] if len(rows) else None
+
+
+class SemanticResponseCache:
+    """Replies to earlier questions, reused for paraphrases asked to the same character.
+
+    Questions are embedded and compared by cosine similarity with the questions
+    already answered by that character. The reply of the closest one is reused if
+    the similarity is at least `threshold` and the entry is younger than
+    `ttl_seconds`. Only replies generated without conversation history should be
+    stored, since a cached reply cannot take history into account.
+
+    Args:
+        embeddings (Embeddings): Encoder for questions.
+        threshold (float): Minimum cosine similarity of a hit.
+        ttl_seconds (float): Age after which an entry is no longer served.
+        max_entries_per_character (int): Oldest entries are evicted beyond this.
+        characters (set[str] | None): Characters the cache serves. All if None.
+        clock (Callable[[], float]): Clock in seconds.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        threshold: float = 0.92,
+        ttl_seconds: float = 24 * 3600,
+        max_entries_per_character: int = 512,
+        characters: set[str] | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_character = max_entries_per_character
+        self.characters = characters
+        self.stats: dict[str, ResponseCacheStats] = {}
+        self._clock = clock
+        self._entries: dict[str, _CharacterEntries] = {}
+        self._lock = threading.Lock()
+
+    def enabled_for(self, character_id: str) -> bool:
+        return self.characters is None or character_id in self.characters
+
+    def embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def lookup(self, character_id: str, vector: np.ndarray) -> CachedResponse | None:
+        """Return the cached reply closest to `vector`, if it is similar and fresh enough."""
+
+        started = time.perf_counter()
+        with self._lock:
+            stats = self.stats.setdefault(character_id, ResponseCacheStats())
+            stats.lookups += 1
+            entries = self._entries.get(character_id)
+            found = None
+            if entries is not None and len(entries):
+                self._expire(entries, stats)
+            if entries is not None and len(entries):
+                similarities = entries.vectors @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    found = CachedResponse(
+                        question=entries.questions[best],
+                        reply=entries.replies[best],
+                        similarity=float(similarities[best]),
+                        generation_seconds=entries.generation_seconds[best],
+                    )
+                    stats.hits += 1
+                    stats.saved_seconds += found.generation_seconds
+            stats.lookup_seconds += time.perf_counter() - started
+
+        return found
+
+    def store(
+        self,
+        character_id: str,
+        question: str,
+        vector: np.ndarray,
+        reply: str,
+        generation_seconds: float,
+    ) -> None:
+        with self._lock:
+            entries = self._entries.setdefault(character_id, _CharacterEntries())
+            entries.questions.append(question)
+            entries.replies.append(reply)
+            entries.created_at.append(self._clock())
+            entries.generation_seconds.append(generation_seconds)
+            row = vector.reshape(1, -1)
+            entries.vectors = row if entries.vectors is None else np.vstack([entries.vectors, row])
+            if len(entries) > self.max_entries_per_character:
+                entries.keep(np.arange(len(entries) - self.max_entries_per_character, len(entries)))
+            self.stats.setdefault(character_id, ResponseCacheStats()).stored += 1
+
+    def report(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                character_id: {**stats.as_dict(), "entries": len(self._entries.get(character_id, ()))}
+                for character_id, stats in sorted(self.stats.items())
+            }
+
+    def _expire(self, entries: _CharacterEntries, stats: ResponseCacheStats) -> None:
+        # Entries are appended in time order, so the expired ones are a prefix.
+        cutoff = self._clock() - self.ttl_seconds
+        fresh = int(np.searchsorted(np.asarray(entries.created_at), cutoff, side="right"))
+        if fresh:
+            stats.expired += fresh
+            entries.keep(np.arange(fresh, len(entries)))
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> SemanticResponseCache | None:
+    """Return the process-wide semantic response cache, or None if it is disabled."""
+
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+
+    return SemanticResponseCache(
+        embeddings=get_embedding_model(settings.RAG_TEXT_EMBEDDING_MODEL_ID, settings.RAG_DEVICE),
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+        max_entries_per_character=settings.SEMANTIC_CACHE_MAX_ENTRIES_PER_CHARACTER,
+        characters=set(settings.SEMANTIC_CACHE_CHARACTERS) or None,
+    )
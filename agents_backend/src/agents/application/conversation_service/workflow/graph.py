@@ -1,15 +1,150 @@
+import asyncio
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable
+
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_groq import ChatGroq
 from langgraph.graph import END, StateGraph
+from loguru import logger
 
+from agents.application.conversation_service.response_cache import get_response_cache
+from agents.application.long_term_memory import LongTermMemoryRetriever
 from agents.config import settings
 from agents.domain import prompts
 
 from .state import WorkflowState
 
+if TYPE_CHECKING:
+    from agents.application.interaction_memory import InteractionMemoryRetriever
+
+
+@lru_cache(maxsize=1)
+def _get_interaction_memory() -> "InteractionMemoryRetriever":
+    # Imported here so the voice package is only loaded once interactions are recalled.
+    from agents.application.interaction_memory import InteractionMemoryRetriever
+
+    return InteractionMemoryRetriever.build_from_settings()
+
+
+@lru_cache(maxsize=1)
+def _get_long_term_memory() -> LongTermMemoryRetriever:
+    return LongTermMemoryRetriever.build_from_settings()
+
+
+def _search_interactions(character_id: str, query: str) -> str:
+    documents = _get_interaction_memory()(character_id, query)
+
+    return "\n\n".join(document.page_content for document in documents)
+
+
+def _search_long_term_memory(philosopher_id: str, query: str) -> str:
+    documents = _get_long_term_memory()(query, philosopher_id=philosopher_id)
+
+    return "\n\n".join(document.page_content for document in documents)
+
+
+async def _recall(
+    name: str,
+    search: Callable[[str, str], str],
+    state: WorkflowState,
+    timeout: float,
+) -> str:
+    """Search a memory for the active character, within a latency budget.
+
+    The search runs off the event loop and is abandoned after `timeout` seconds,
+    so a slow or cold index never delays the reply by more than that. An abandoned
+    search keeps running in its thread, which also warms the embedding model for
+    the next turn.
+    """
+
+    character_id = state.get("philosopher_id", "")
+    messages = state.get("messages", [])
+    if not character_id or not messages:
+        return ""
+
+    query = str(messages[-1].content)
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(search, character_id, query), timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"{name} recall for '{character_id}' timed out.")
+    except Exception as e:
+        logger.warning(f"{name} recall for '{character_id}' failed: {e}")
+
+    return ""
+
+
+async def _recall_interactions(state: WorkflowState) -> str:
+    return await _recall(
+        "Interaction memory",
+        _search_interactions,
+        state,
+        settings.INTERACTION_MEMORY_TIMEOUT_SECONDS,
+    )
+
+
+async def _recall_philosopher_context(state: WorkflowState) -> str:
+    """Return the caller's context, or chunks retrieved from this philosopher's sources only."""
+
+    if state.get("philosopher_context") or not settings.LONG_TERM_MEMORY_RECALL:
+        return state.get("philosopher_context", "")
+
+    return await _recall(
+        "Long-term memory",
+        _search_long_term_memory,
+        state,
+        settings.LONG_TERM_MEMORY_TIMEOUT_SECONDS,
+    )
+
+
+async def _cache_lookup(state: WorkflowState) -> tuple[str | None, Any]:
+    """Look the latest question up in the semantic response cache.
+
+    Returns:
+        tuple[str | None, Any]: The cached reply, if any, and the question's
+            embedding, which is None when the cache does not apply to this turn.
+    """
+
+    cache = get_response_cache()
+    character_id = state.get("philosopher_id", "")
+    messages = state.get("messages", [])
+    if (
+        cache is None
+        or not character_id
+        or not messages
+        or not cache.enabled_for(character_id)
+        or state.get("summary")
+        or len(messages) > settings.SEMANTIC_CACHE_MAX_STATE_MESSAGES
+    ):
+        return None, None
+
+    try:
+        vector = await asyncio.to_thread(cache.embed, str(messages[-1].content))
+    except Exception as e:
+        logger.warning(f"Semantic response cache lookup for '{character_id}' failed: {e}")
+        return None, None
+
+    cached = cache.lookup(character_id, vector)
+    if cached is None:
+        return None, vector
+
+    logger.info(
+        f"Semantic response cache hit for '{character_id}' "
+        f"(similarity {cached.similarity:.3f}, saved {cached.generation_seconds:.2f}s)"
+    )
+
+    return cached.reply, vector
+
 
 async def _conversation_node(state: WorkflowState) -> WorkflowState:
+    cached_reply, question_vector = await _cache_lookup(state)
+    if cached_reply is not None:
+        return {"messages": [AIMessage(content=cached_reply)]}
+
+    started = time.perf_counter()
     model = ChatGroq(
         api_key=settings.GROQ_API_KEY,
         model_name=settings.GROQ_LLM_MODEL,
@@ -25,6 +160,9 @@ async def _conversation_node(state: WorkflowState) -> WorkflowState:
     )
 
     chain = prompt | model
+    interaction_memory, philosopher_context = await asyncio.gather(
+        _recall_interactions(state), _recall_philosopher_context(state)
+    )
     response = await chain.ainvoke(
         {
             "messages": state.get("messages", []),
@@ -32,12 +170,23 @@ async def _conversation_node(state: WorkflowState) -> WorkflowState:
             "philosopher_perspective": state.get("philosopher_perspective", ""),
             "philosopher_style": state.get("philosopher_style", ""),
             "summary": state.get("summary", ""),
+            "philosopher_context": philosopher_context,
+            "interaction_memory": interaction_memory,
         }
     )
 
     if not isinstance(response, AIMessage):
         response = AIMessage(content=str(response.content))
 
+    if question_vector is not None and response.content:
+        get_response_cache().store(
+            state["philosopher_id"],
+            str(state["messages"][-1].content),
+            question_vector,
+            str(response.content),
+            generation_seconds=time.perf_counter() - started,
+        )
+
     return {"messages": [response]}
 
 
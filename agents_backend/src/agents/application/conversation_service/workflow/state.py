@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 
 class WorkflowState(TypedDict, total=False):
     messages: list[BaseMessage]
+    philosopher_id: str
     philosopher_name: str
     philosopher_perspective: str
     philosopher_style: str
@@ -15,6 +16,7 @@ class WorkflowState(TypedDict, total=False):
 
 class PhilosopherState(BaseModel):
     messages: list[BaseMessage] = Field(default_factory=list)
+    philosopher_id: str = ""
     philosopher_name: str = ""
     philosopher_perspective: str = ""
     philosopher_style: str = ""
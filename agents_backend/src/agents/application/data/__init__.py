@@ -1,4 +1,13 @@
-from .deduplicate_documents import deduplicate_documents
+from .dedup_index import DedupIndex
+from .deduplicate_documents import MinHashDeduplicator, deduplicate_documents
 from .extract import get_extraction_generator
+from .fetcher import AsyncFetcher, HttpCache
 
-__all__ = ["get_extraction_generator", "deduplicate_documents"]
+__all__ = [
+    "AsyncFetcher",
+    "DedupIndex",
+    "HttpCache",
+    "MinHashDeduplicator",
+    "get_extraction_generator",
+    "deduplicate_documents",
+]
@@ -0,0 +1,186 @@
+import os
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+from loguru import logger
+
+from .deduplicate_documents import MinHashDeduplicator
+
+
+class DedupIndex:
+    """Persistent MinHash LSH index of every stored chunk, shared by ingestion runs.
+
+    Each entry is a chunk's hash, the character that owns it and its MinHash
+    signature. New chunks are looked up before they are embedded, so a passage
+    already stored for any character, by this run or an earlier one, is dropped.
+
+    Lookups search one sorted array of band keys per band with `np.searchsorted`.
+    The arrays are rebuilt lazily after entries are added or removed, so adding a
+    whole batch at once is much cheaper than adding chunks one by one.
+
+    The index is saved as one `.npz` file, replaced atomically. Signatures only
+    compare between indexes with the same permutations, so a file written with
+    other MinHash parameters or another `salt` is ignored.
+
+    Args:
+        deduplicator (MinHashDeduplicator): Computes and compares signatures.
+        path (Path | None): File the index is loaded from and saved to. In memory if None.
+        salt (str): Identity of the chunk hashes, e.g. the ingestion pipeline's hash salt.
+    """
+
+    def __init__(
+        self,
+        deduplicator: MinHashDeduplicator,
+        path: Path | None = None,
+        salt: str = "",
+    ) -> None:
+        self.deduplicator = deduplicator
+        self.path = path
+        self.salt = salt
+        self.chunk_hashes = np.empty(0, dtype=str)
+        self.owners = np.empty(0, dtype=str)
+        self.signatures = np.empty((0, deduplicator.num_perm), dtype=np.uint32)
+        self._keys = np.empty((0, deduplicator.bands), dtype=np.uint64)
+        self._sorted: tuple[np.ndarray, np.ndarray] | None = None
+
+        if path is not None and path.exists():
+            self._load(path)
+
+    def __len__(self) -> int:
+        return len(self.chunk_hashes)
+
+    @property
+    def params(self) -> np.ndarray:
+        deduplicator = self.deduplicator
+        return np.array(
+            [self.salt, deduplicator.num_perm, deduplicator.seed, deduplicator.bands, deduplicator.rows],
+            dtype=str,
+        )
+
+    def add(self, chunk_hashes: list[str], owner: str, signatures: np.ndarray) -> None:
+        if not chunk_hashes:
+            return
+
+        self.chunk_hashes = np.concatenate([self.chunk_hashes, np.asarray(chunk_hashes, dtype=str)])
+        self.owners = np.concatenate([self.owners, np.full(len(chunk_hashes), owner, dtype=str)])
+        self.signatures = np.concatenate([self.signatures, signatures])
+        self._keys = np.concatenate([self._keys, self.deduplicator.band_keys(signatures)])
+        self._sorted = None
+
+    def contains(self, chunk_hashes: list[str]) -> np.ndarray:
+        """Return whether each of `chunk_hashes` has an entry."""
+
+        return np.isin(np.asarray(chunk_hashes, dtype=str), self.chunk_hashes)
+
+    def remove(self, chunk_hashes: Iterable[str]) -> int:
+        """Remove the entries of `chunk_hashes` and return how many there were."""
+
+        removed = np.isin(self.chunk_hashes, np.asarray(list(chunk_hashes), dtype=str))
+        self._keep(~removed)
+
+        return int(removed.sum())
+
+    def retain(self, chunk_hashes: Iterable[str]) -> int:
+        """Remove every entry not in `chunk_hashes`, e.g. the hashes actually stored.
+
+        Returns:
+            int: Number of entries removed.
+        """
+
+        kept = np.isin(self.chunk_hashes, np.asarray(list(chunk_hashes), dtype=str))
+        self._keep(kept)
+
+        return int((~kept).sum())
+
+    def query(self, signatures: np.ndarray, owner: str | None = None) -> np.ndarray:
+        """Return, for every signature, the row of a stored duplicate or -1.
+
+        Args:
+            signatures (np.ndarray): `(n, num_perm)` signatures of the new chunks.
+            owner (str | None): Only match entries of this character. Any if None.
+
+        Returns:
+            np.ndarray: Index row per signature, -1 when it has no duplicate.
+        """
+
+        matches = np.full(len(signatures), -1, dtype=np.int64)
+        if not len(self) or not len(signatures):
+            return matches
+
+        sorted_keys, order = self._band_arrays()
+        keys = self.deduplicator.band_keys(signatures)
+        queries, rows = [], []
+        for band in range(self.deduplicator.bands):
+            left = np.searchsorted(sorted_keys[band], keys[:, band], side="left")
+            right = np.searchsorted(sorted_keys[band], keys[:, band], side="right")
+            counts = right - left
+            total = int(counts.sum())
+            if not total:
+                continue
+            # Expand the `[left, right)` range of every query into positions.
+            starts = np.repeat(left - np.cumsum(counts) + counts, counts)
+            queries.append(np.repeat(np.arange(len(signatures)), counts))
+            rows.append(order[band][starts + np.arange(total)])
+
+        if not queries:
+            return matches
+
+        codes = np.unique(np.concatenate(queries) * len(self) + np.concatenate(rows))
+        candidate_queries, candidate_rows = codes // len(self), codes % len(self)
+        if owner is not None:
+            same_owner = self.owners[candidate_rows] == owner
+            candidate_queries, candidate_rows = candidate_queries[same_owner], candidate_rows[same_owner]
+
+        similarities = (self.signatures[candidate_rows] == signatures[candidate_queries]).mean(axis=1)
+        duplicate = similarities >= self.deduplicator.threshold
+        # Codes are sorted, so the first duplicate of a query is its lowest row.
+        found, first = np.unique(candidate_queries[duplicate], return_index=True)
+        matches[found] = candidate_rows[duplicate][first]
+
+        return matches
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            params=self.params,
+            chunk_hashes=self.chunk_hashes,
+            owners=self.owners,
+            signatures=self.signatures,
+        )
+        os.replace(tmp_path, self.path)
+        logger.info(f"Saved deduplication index {self.path} ({len(self)} chunks)")
+
+    def _band_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._sorted is None:
+            order = np.argsort(self._keys.T, axis=1, kind="stable")
+            self._sorted = (np.take_along_axis(self._keys.T, order, axis=1), order)
+
+        return self._sorted
+
+    def _keep(self, mask: np.ndarray) -> None:
+        if mask.all():
+            return
+
+        self.chunk_hashes = self.chunk_hashes[mask]
+        self.owners = self.owners[mask]
+        self.signatures = self.signatures[mask]
+        self._keys = self._keys[mask]
+        self._sorted = None
+
+    def _load(self, path: Path) -> None:
+        with np.load(path) as data:
+            if not np.array_equal(data["params"], self.params):
+                logger.warning(f"Ignoring deduplication index {path} built with other parameters.")
+                return
+
+            self.chunk_hashes = data["chunk_hashes"]
+            self.owners = data["owners"]
+            self.signatures = data["signatures"]
+
+        self._keys = self.deduplicator.band_keys(self.signatures)
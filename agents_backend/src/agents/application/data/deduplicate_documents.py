@@ -1,11 +1,258 @@
 import re
-from typing import List, Tuple
+import zlib
+from typing import Iterable, List, Tuple
 
-from datasketch import MinHash, MinHashLSH
+import numpy as np
 from langchain_core.documents import Document
 from loguru import logger
 
-from agents.config import settings
+_WORD_PATTERN = re.compile(r"\w+")
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SHINGLE_MULTIPLIERS = (
+    np.uint64(0x9E3779B97F4A7C15),
+    np.uint64(0xC2B2AE3D27D4EB4F),
+    np.uint64(0x165667B19E3779F9),
+)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """Finalizer of MurmurHash3, so nearby inputs get unrelated 64-bit hashes."""
+
+    values = values ^ (values >> np.uint64(33))
+    values = values * np.uint64(0xFF51AFD7ED558CCD)
+    values = values ^ (values >> np.uint64(33))
+    values = values * np.uint64(0xC4CEB9FE1A85EC53)
+
+    return values ^ (values >> np.uint64(33))
+
+
+def _optimal_bands(threshold: float, num_perm: int) -> tuple[int, int]:
+    """Return the `(bands, rows)` split of the signature that minimizes the
+    probability mass of false positives below `threshold` plus false negatives
+    above it, as in datasketch's `MinHashLSH`.
+    """
+
+    def probability(s: np.ndarray, bands: int, rows: int) -> np.ndarray:
+        return 1 - (1 - s**rows) ** bands
+
+    below = np.linspace(0.0, threshold, 200)
+    above = np.linspace(threshold, 1.0, 200)
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = probability(below, bands, rows).mean() * threshold
+            false_negative = (1 - probability(above, bands, rows)).mean() * (1 - threshold)
+            if false_positive + false_negative < best_error:
+                best, best_error = (bands, rows), false_positive + false_negative
+
+    return best
+
+
+class _UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parents = list(range(size))
+
+    def find(self, item: int) -> int:
+        parents = self.parents
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+
+        return item
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            parents = self.parents
+            parents[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class MinHashDeduplicator:
+    """Near-duplicate detection with MinHash signatures computed in NumPy batches.
+
+    Documents are shingled into word 3-grams hashed to 32 bits. The shingles of a
+    batch of documents are permuted together as one `(shingles, num_perm)` matrix
+    and reduced per document with `np.minimum.reduceat`. Permutations are
+    multiply-shift hashes, `(a * x + b) >> 32` in 64-bit arithmetic, which avoid the
+    modulo of datasketch's `MinHash` and keep a batch in cache.
+
+    Candidate pairs come from LSH banding: documents that share all the rows of
+    any band land in the same bucket. Candidates are kept in a set of `i * n + j`
+    codes, so each pair is stored and verified once.
+
+    Args:
+        threshold (float): Estimated Jaccard similarity above which documents are duplicates.
+        num_perm (int): Number of hash permutations in a signature.
+        seed (int): Seed of the permutations.
+        batch_shingles (int): Shingles permuted at once, about
+            `batch_shingles * num_perm * 8` bytes. Small batches stay in CPU cache.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        num_perm: int = 128,
+        seed: int = 1,
+        batch_shingles: int = 2048,
+    ) -> None:
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.seed = seed
+        self.batch_shingles = batch_shingles
+        self.bands, self.rows = _optimal_bands(threshold, num_perm)
+
+        generator = np.random.RandomState(seed)
+        high = np.iinfo(np.uint64).max
+        self._a = generator.randint(1, high, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = generator.randint(0, high, size=num_perm, dtype=np.uint64)
+        self._band_multipliers = generator.randint(1, high, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._word_hashes: dict[str, int] = {}
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Return the 32-bit hashes of the word 3-grams of `text`.
+
+        Texts shorter than three words are one shingle made of all their words.
+        """
+
+        words = _WORD_PATTERN.findall(text.lower())
+        cache = self._word_hashes
+        hashes = np.fromiter(
+            (cache[w] if w in cache else cache.setdefault(w, zlib.crc32(w.encode("utf-8"))) for w in words),
+            dtype=np.uint64,
+            count=len(words),
+        )
+        if len(hashes) < 3:
+            return np.array([zlib.crc32(" ".join(words).encode("utf-8"))], dtype=np.uint64)
+
+        first, second, third = _SHINGLE_MULTIPLIERS
+        combined = hashes[:-2] * first + hashes[1:-1] * second + hashes[2:] * third
+
+        return _mix(combined) & _MAX_HASH
+
+    def signatures(self, texts: Iterable[str]) -> np.ndarray:
+        """Return the `(len(texts), num_perm)` uint32 MinHash signatures of `texts`."""
+
+        signatures = []
+        batch: list[np.ndarray] = []
+        batch_size = 0
+        for text in texts:
+            shingles = self.shingles(text)
+            batch.append(shingles)
+            batch_size += len(shingles)
+            if batch_size >= self.batch_shingles:
+                signatures.append(self._batch_signatures(batch))
+                batch, batch_size = [], 0
+        if batch:
+            signatures.append(self._batch_signatures(batch))
+
+        if not signatures:
+            return np.empty((0, self.num_perm), dtype=np.uint32)
+
+        return np.concatenate(signatures)
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """Return one 64-bit key per document and band, shape `(n, bands)`.
+
+        Two documents share a key when they share every row of that band, up to
+        hash collisions, which only add candidates that fail verification.
+        """
+
+        bands = signatures[:, : self.bands * self.rows].reshape(len(signatures), self.bands, self.rows)
+
+        return _mix((bands.astype(np.uint64) * self._band_multipliers).sum(axis=2, dtype=np.uint64))
+
+    def similarity(self, signatures: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """Return the estimated Jaccard similarity of the rows `left[i]` and `right[i]`."""
+
+        similarities = np.empty(len(left), dtype=np.float32)
+        step = 65536
+        for start in range(0, len(left), step):
+            end = start + step
+            similarities[start:end] = (
+                signatures[left[start:end]] == signatures[right[start:end]]
+            ).mean(axis=1)
+
+        return similarities
+
+    def find_duplicates(self, signatures: np.ndarray) -> List[Tuple[int, int, float]]:
+        """Return `(i, j, similarity)` with `i < j` for duplicate pairs of rows.
+
+        Rows with identical signatures are only paired with the first of them,
+        which is enough to cluster them and avoids a quadratic number of pairs
+        when a passage is repeated many times.
+        """
+
+        size = len(signatures)
+        if size < 2:
+            return []
+
+        _, first, inverse = np.unique(signatures, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        representatives = np.sort(first)
+        repeated = np.flatnonzero(first[inverse] != np.arange(size))
+        duplicates = [(int(first[inverse[row]]), int(row), 1.0) for row in repeated]
+
+        keys = self.band_keys(signatures[representatives])
+        pairs: set[int] = set()
+        for band in range(self.bands):
+            order = np.argsort(keys[:, band], kind="stable")
+            sorted_keys = keys[order, band]
+            boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+            starts = np.concatenate([[0], boundaries])
+            ends = np.concatenate([boundaries, [len(sorted_keys)]])
+            for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+                members = representatives[np.sort(order[start:end])]
+                left, right = np.triu_indices(len(members), 1)
+                pairs.update((members[left] * size + members[right]).tolist())
+
+        if pairs:
+            codes = np.fromiter(pairs, dtype=np.int64, count=len(pairs))
+            codes.sort()
+            left, right = codes // size, codes % size
+            similarities = self.similarity(signatures, left, right)
+            keep = similarities >= self.threshold
+            duplicates.extend(
+                zip(left[keep].tolist(), right[keep].tolist(), similarities[keep].tolist())
+            )
+
+        return duplicates
+
+    def _batch_signatures(self, batch: list[np.ndarray]) -> np.ndarray:
+        shingles = np.concatenate(batch)
+        offsets = np.cumsum([0] + [len(document) for document in batch[:-1]])
+        # uint64 products wrap around, which multiply-shift hashing relies on.
+        permuted = np.multiply(shingles[:, None], self._a)
+        permuted += self._b
+        permuted >>= np.uint64(32)
+
+        return np.minimum.reduceat(permuted, offsets, axis=0).astype(np.uint32)
+
+
+def cluster_keepers(
+    lengths: List[int], duplicates: List[Tuple[int, int, float]]
+) -> list[int]:
+    """Return the indices of the documents to keep, one per cluster of duplicates.
+
+    Duplicate pairs are merged transitively with union-find, and each cluster keeps
+    its longest document, or its first one on ties.
+
+    Args:
+        lengths: Length of the content of every document.
+        duplicates: `(i, j, similarity)` duplicate pairs, e.g. from `find_duplicates`.
+    """
+
+    clusters = _UnionFind(len(lengths))
+    for i, j, _ in duplicates:
+        clusters.union(i, j)
+
+    keepers: dict[int, int] = {}
+    for index, length in enumerate(lengths):
+        root = clusters.find(index)
+        keeper = keepers.setdefault(root, index)
+        if length > lengths[keeper]:
+            keepers[root] = index
+
+    return sorted(keepers.values())
 
 
 def deduplicate_documents(
@@ -14,7 +261,8 @@ def deduplicate_documents(
     """Remove duplicate documents from a list based on content similarity.
 
     Uses MinHash algorithm to identify similar documents and removes duplicates
-    based on the specified similarity threshold.
+    based on the specified similarity threshold. Each cluster of duplicates keeps
+    the document with the most content.
 
     Args:
         documents: List of documents to deduplicate.
@@ -29,26 +277,19 @@ def deduplicate_documents(
         return []
 
     duplicates = find_duplicates(documents, threshold)
+    keepers = cluster_keepers([len(document.page_content) for document in documents], duplicates)
 
     logger.info(
-        f"{len(duplicates)} / {len(documents)} documents are duplicates. Removing them."
+        f"{len(documents) - len(keepers)} / {len(documents)} documents are duplicates. Removing them."
     )
 
-    indices_to_remove = set()
-    for i, j, _ in duplicates:
-        # Keep the document with more content
-        if len(documents[i].page_content) >= len(documents[j].page_content):
-            indices_to_remove.add(j)
-        else:
-            indices_to_remove.add(i)
-
-    return [doc for i, doc in enumerate(documents) if i not in indices_to_remove]
+    return [documents[i] for i in keepers]
 
 
 def find_duplicates(
     documents: List[Document],
     threshold: float = 0.7,
-    num_perm: int = int(settings.RAG_CHUNK_SIZE * 0.5),
+    num_perm: int = 128,
 ) -> List[Tuple[int, int, float]]:
     """Find duplicate documents using MinHash algorithm.
 
@@ -67,40 +308,7 @@ def find_duplicates(
         for document pairs that exceed the similarity threshold.
     """
 
-    minhashes = []
-
-    for doc in documents:
-        minhash = MinHash(num_perm=num_perm)
-        text = doc.page_content.lower()
-        words = re.findall(r"\w+", text)
-
-        # Create shingles (3-grams of words)
-        for i in range(len(words) - 3):
-            shingle = " ".join(words[i : i + 3])
-            minhash.update(shingle.encode("utf-8"))
-        minhashes.append(minhash)
-
-    # Find similar document pairs using LSH (Locality Sensitive Hashing)
-    lsh = MinHashLSH(threshold=threshold, num_perm=num_perm)
-
-    # Add documents to LSH index
-    for i, minhash in enumerate(minhashes):
-        lsh.insert(i, minhash)
-
-    duplicates = []
-    for i, minhash in enumerate(minhashes):
-        similar_docs = lsh.query(minhash)
-        # Remove self from results
-        similar_docs = [j for j in similar_docs if j != i]
-
-        # Find duplicates
-        for j in similar_docs:
-            similarity = minhashes[i].jaccard(minhashes[j])
-            if similarity >= threshold:
-                # Ensure we don't add the same pair twice (in different order)
-                pair = tuple(sorted([i, j]))
-                duplicate_info = (*pair, similarity)
-                if duplicate_info not in duplicates:
-                    duplicates.append(duplicate_info)
-
-    return duplicates
+    deduplicator = MinHashDeduplicator(threshold=threshold, num_perm=num_perm)
+    signatures = deduplicator.signatures(doc.page_content for doc in documents)
+
+    return deduplicator.find_duplicates(signatures)
@@ -1,28 +1,49 @@
+import asyncio
+import json
+import re
+from html.parser import HTMLParser
 from typing import Generator
+from urllib.parse import urlencode
 
-from langchain_community.document_loaders import WebBaseLoader, WikipediaLoader
 from langchain_core.documents import Document
+from loguru import logger
 from tqdm import tqdm
 
+from agents.config import settings
 from agents.domain.philosopher import Philosopher, PhilosopherExtract
 from agents.domain.philosopher_factory import PhilosopherFactory
 
+from .fetcher import AsyncFetcher
+
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+WIKIPEDIA_CONTENT_CHARS_MAX = 1000000
+
 
 def get_extraction_generator(
     philosophers: list[PhilosopherExtract],
+    fetcher: AsyncFetcher | None = None,
+    concurrency: int = settings.EXTRACTION_CONCURRENCY,
 ) -> Generator[tuple[Philosopher, list[Document]], None, None]:
     """Extract documents for a list of philosophers, yielding one at a time.
 
+    Philosophers are extracted `concurrency` at a time: the pages of a whole group
+    are fetched concurrently, then the group is yielded. Memory stays bounded by
+    the pages of one group.
+
     Args:
         philosophers: A list of PhilosopherExtract objects containing philosopher information.
+        fetcher: Fetches the pages. Built from the settings if None.
+        concurrency: Philosophers whose pages are fetched at once.
 
     Yields:
         tuple[Philosopher, list[Document]]: A tuple containing the philosopher object and a list of
             documents extracted for that philosopher.
     """
 
+    fetcher = fetcher or AsyncFetcher.build_from_settings()
+    concurrency = max(1, concurrency)
     progress_bar = tqdm(
-        philosophers,
+        total=len(philosophers),
         desc="Extracting docs",
         unit="philosopher",
         bar_format="{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}] {postfix}",
@@ -31,138 +52,338 @@ def get_extraction_generator(
         leave=True,
     )
 
-    philosophers_factory = PhilosopherFactory()
-    for philosopher_extract in progress_bar:
-        philosopher = philosophers_factory.get_philosopher(philosopher_extract.id)
-        progress_bar.set_postfix_str(f"Philosopher: {philosopher.name}")
+    with progress_bar:
+        for start in range(0, len(philosophers), concurrency):
+            group = philosophers[start : start + concurrency]
+            for philosopher, philosopher_docs in asyncio.run(extract_all(group, fetcher)):
+                progress_bar.set_postfix_str(f"Philosopher: {philosopher.name}")
+                progress_bar.update(1)
+
+                yield (philosopher, philosopher_docs)
+
+    logger.info(" ".join(f"{k}={v}" for k, v in fetcher.stats.as_dict().items()))
+
+
+async def extract_all(
+    philosophers: list[PhilosopherExtract], fetcher: AsyncFetcher
+) -> list[tuple[Philosopher, list[Document]]]:
+    """Fetch the Wikipedia and Stanford Encyclopedia pages of `philosophers` concurrently
+    and extract their documents.
+
+    Args:
+        philosophers: Philosophers to extract, with their Stanford Encyclopedia URLs.
+        fetcher: Fetches the pages. A URL shared by several philosophers is fetched once.
+
+    Returns:
+        list[tuple[Philosopher, list[Document]]]: Documents of every philosopher, in order.
+    """
 
-        philosopher_docs = extract(philosopher, philosopher_extract.urls)
+    philosophers_factory = PhilosopherFactory()
+    extracts = [
+        (philosophers_factory.get_philosopher(extract.id), list(dict.fromkeys(extract.urls)))
+        for extract in philosophers
+    ]
+    pages = await fetcher.fetch_all(
+        [wikipedia_url(philosopher) for philosopher, _ in extracts]
+        + [url for _, urls in extracts for url in urls]
+    )
 
-        yield (philosopher, philosopher_docs)
+    return [(philosopher, parse_pages(philosopher, urls, pages)) for philosopher, urls in extracts]
 
 
-def extract(philosopher: Philosopher, extract_urls: list[str]) -> list[Document]:
-    """Extract documents for a single philosopher from all sources and deduplicate them.
+def extract(
+    philosopher: Philosopher,
+    extract_urls: list[str],
+    fetcher: AsyncFetcher | None = None,
+) -> list[Document]:
+    """Extract documents for a single philosopher from all sources.
 
     Args:
         philosopher: Philosopher object containing philosopher information.
         extract_urls: List of URLs to extract content from.
+        fetcher: Fetches the pages. Built from the settings if None.
 
     Returns:
-        list[Document]: List of deduplicated documents extracted for the philosopher.
+        list[Document]: List of documents extracted for the philosopher.
     """
 
-    docs = []
+    fetcher = fetcher or AsyncFetcher.build_from_settings()
+    urls = list(dict.fromkeys(extract_urls))
+    pages = asyncio.run(fetcher.fetch_all([wikipedia_url(philosopher), *urls]))
 
-    docs.extend(extract_wikipedia(philosopher))
-    docs.extend(extract_stanford_encyclopedia_of_philosophy(philosopher, extract_urls))
+    return parse_pages(philosopher, urls, pages)
 
-    return docs
 
-
-def extract_wikipedia(philosopher: Philosopher) -> list[Document]:
-    """Extract documents for a single philosopher from Wikipedia.
+def parse_pages(
+    philosopher: Philosopher, urls: list[str], pages: dict[str, str | None]
+) -> list[Document]:
+    """Extract the documents of a philosopher from its fetched Wikipedia and Stanford
+    Encyclopedia pages. Pages that could not be fetched (None) are skipped.
 
     Args:
         philosopher: Philosopher object containing philosopher information.
+        urls: Stanford Encyclopedia URLs of the philosopher.
+        pages: Page bodies by URL, as returned by `AsyncFetcher.fetch_all`.
 
     Returns:
-        list[Document]: List of documents extracted from Wikipedia for the philosopher.
+        list[Document]: List of documents extracted for the philosopher.
     """
 
-    loader = WikipediaLoader(
-        query=philosopher.name,
-        lang="en",
-        load_max_docs=1,
-        doc_content_chars_max=1000000,
+    wikipedia_page = pages[wikipedia_url(philosopher)]
+    docs = parse_wikipedia(philosopher, wikipedia_page) if wikipedia_page is not None else []
+    docs.extend(
+        parse_stanford_encyclopedia_of_philosophy(philosopher, url, pages[url])
+        for url in urls
+        if pages[url] is not None
     )
-    docs = loader.load()
-
-    for doc in docs:
-        doc.metadata["philosopher_id"] = philosopher.id
-        doc.metadata["philosopher_name"] = philosopher.name
 
     return docs
 
 
-def extract_stanford_encyclopedia_of_philosophy(
-    philosopher: Philosopher, urls: list[str]
-) -> list[Document]:
-    """Extract documents for a single philosopher from Stanford Encyclopedia of Philosophy.
+def wikipedia_url(philosopher: Philosopher) -> str:
+    """Return the MediaWiki API URL of the plain text of the best Wikipedia match for the philosopher."""
+
+    query = {
+        "action": "query",
+        "format": "json",
+        "formatversion": 2,
+        "generator": "search",
+        "gsrsearch": philosopher.name,
+        "gsrlimit": 1,
+        "prop": "extracts|info",
+        "explaintext": 1,
+        "inprop": "url",
+        "redirects": 1,
+    }
+
+    return f"{WIKIPEDIA_API_URL}?{urlencode(query)}"
+
+
+def parse_wikipedia(philosopher: Philosopher, payload: str) -> list[Document]:
+    """Extract documents for a single philosopher from a Wikipedia API response.
 
     Args:
         philosopher: Philosopher object containing philosopher information.
-        urls: List of URLs to extract content from.
+        payload: JSON response of the `wikipedia_url` request.
 
     Returns:
-        list[Document]: List of documents extracted from Stanford Encyclopedia for the philosopher.
+        list[Document]: List of documents extracted from Wikipedia for the philosopher.
     """
 
-    def extract_paragraphs_and_headers(soup) -> str:
-        # List of class/id names specific to the Stanford Encyclopedia of Philosophy that we want to exclude.
-        excluded_sections = [
-            "bibliography",
-            "academic-tools",
-            "other-internet-resources",
-            "related-entries",
-            "acknowledgments",
-            "article-copyright",
-            "article-banner",
-            "footer",
-        ]
-
-        # Find and remove elements within excluded sections
-        for section_name in excluded_sections:
-            for section in soup.find_all(id=section_name):
-                section.decompose()
-
-            for section in soup.find_all(class_=section_name):
-                section.decompose()
-
-            for section in soup.find_all(
-                lambda tag: tag.has_attr("id") and section_name in tag["id"].lower()
-            ):
-                section.decompose()
-
-            for section in soup.find_all(
-                lambda tag: tag.has_attr("class")
-                and any(section_name in cls.lower() for cls in tag["class"])
-            ):
-                section.decompose()
-
-        # Extract remaining paragraphs and headers
-        content = []
-        for element in soup.find_all(["p", "h1", "h2", "h3", "h4", "h5", "h6"]):
-            content.append(element.get_text())
-
-        return "\n\n".join(content)
-
-    if len(urls) == 0:
+    pages = json.loads(payload).get("query", {}).get("pages", [])
+    if not pages or not pages[0].get("extract"):
+        logger.warning(f"No Wikipedia page found for {philosopher.name}.")
         return []
 
-    loader = WebBaseLoader(show_progress=False)
-    soups = loader.scrape_all(urls)
+    page = pages[0]
+    text = page["extract"][:WIKIPEDIA_CONTENT_CHARS_MAX]
+    metadata = {
+        "title": page["title"],
+        # The lead section, before the first "== Section ==" heading.
+        "summary": re.split(r"\n+==", text, maxsplit=1)[0].strip(),
+        "source": page.get("fullurl", ""),
+        "philosopher_id": philosopher.id,
+        "philosopher_name": philosopher.name,
+    }
+
+    return [Document(page_content=text, metadata=metadata)]
+
+
+# Class/id names specific to the Stanford Encyclopedia of Philosophy that we want to exclude.
+EXCLUDED_SECTIONS = (
+    "bibliography",
+    "academic-tools",
+    "other-internet-resources",
+    "related-entries",
+    "acknowledgments",
+    "article-copyright",
+    "article-banner",
+    "footer",
+)
+_CONTENT_TAGS = frozenset(["p", "h1", "h2", "h3", "h4", "h5", "h6"])
+# Tags without content or end tag, and tags whose text BeautifulSoup's `get_text`
+# leaves out, as in its HTML tree builder.
+_VOID_TAGS = frozenset(
+    "area base br col embed hr img input keygen link menuitem meta param source track wbr "
+    "basefont bgsound command frame image isindex nextid spacer".split()
+)
+_NON_TEXT_TAGS = frozenset(["rt", "rp", "style", "script", "template"])
+# Outside these tags, BeautifulSoup collapses a string of nothing but ASCII whitespace
+# to "\n" if it contains a newline, " " otherwise.
+_PRESERVE_WHITESPACE_TAGS = frozenset(["pre", "textarea"])
+_ASCII_SPACES = str.maketrans("", "", " \n\t\x0c\r")
+
+
+class _SEPContentParser(HTMLParser):
+    """One pass over an SEP page that collects the text of its paragraphs and headers.
+
+    A tag whose id or one of whose classes contains an `EXCLUDED_SECTIONS` name is
+    skipped with its whole subtree, as soon as its start tag is seen. Tags nest
+    like in BeautifulSoup's `html.parser` tree, so the text is the same as
+    decomposing the excluded tags of the soup and joining the `get_text()` of the
+    remaining `p` and `h1`-`h6` tags.
+
+    Text is buffered until the next tag, comment or declaration, as BeautifulSoup
+    does, so whitespace-only strings are collapsed the same way.
+    """
 
-    documents = []
-    for url, soup in zip(urls, soups):
-        text = extract_paragraphs_and_headers(soup)
-        metadata = {
-            "source": url,
-            "philosopher_id": philosopher.id,
-            "philosopher_name": philosopher.name,
-        }
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: list[list[str]] = []
+        self.title: str | None = None
+        # (tag, excluded, content, non_text) per open tag.
+        self._stack: list[tuple[str, bool, bool, bool]] = []
+        self._open_parts: list[int] = []
+        self._excluded = 0
+        self._non_text = 0
+        self._preserve = 0
+        self._data: list[str] = []
+        self._title_parts: list[str] | None = None
+
+    def text(self) -> str:
+        return "\n\n".join("".join(part) for part in self.parts)
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._flush()
+        if tag in _VOID_TAGS:
+            return
+
+        excluded = not self._excluded and _is_excluded(dict(attrs))
+        content = not self._excluded and not excluded and tag in _CONTENT_TAGS
+        non_text = tag in _NON_TEXT_TAGS
+        self._stack.append((tag, excluded, content, non_text))
+        self._excluded += excluded
+        self._non_text += non_text
+        self._preserve += tag in _PRESERVE_WHITESPACE_TAGS
+        if content:
+            self._open_parts.append(len(self.parts))
+            self.parts.append([])
+        if tag == "title" and not self._excluded and self._title_parts is None:
+            self._title_parts = []
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        self._flush()
+        if tag in _VOID_TAGS:
+            return
+
+        # Close the most recent open tag of this name and everything opened in it.
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                break
+        else:
+            return
+
+        while len(self._stack) > depth:
+            name, excluded, content, non_text = self._stack.pop()
+            self._excluded -= excluded
+            self._non_text -= non_text
+            self._preserve -= name in _PRESERVE_WHITESPACE_TAGS
+            if content:
+                self._open_parts.pop()
+            if name == "title" and self._title_parts is not None and self.title is None:
+                self.title = "".join(self._title_parts)
+
+    def handle_data(self, data: str) -> None:
+        self._data.append(data)
+
+    def handle_comment(self, data: str) -> None:
+        self._flush()
+
+    def handle_decl(self, decl: str) -> None:
+        self._flush()
+
+    def handle_pi(self, data: str) -> None:
+        self._flush()
+
+    def unknown_decl(self, data: str) -> None:
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self.handle_data(data[len("CDATA[") :])
+            self._flush()
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+        if self._stack:
+            self.handle_endtag(self._stack[0][0])
+
+    def _flush(self) -> None:
+        if not self._data:
+            return
+
+        data = "".join(self._data)
+        self._data = []
+        if self._excluded or self._non_text:
+            return
+        if not self._preserve and not data.translate(_ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+
+        for index in self._open_parts:
+            self.parts[index].append(data)
+        if self._title_parts is not None and self.title is None:
+            self._title_parts.append(data)
+
+
+def _is_excluded(attrs: dict[str, str | None]) -> bool:
+    names = f"{attrs.get('id') or ''} {attrs.get('class') or ''}".lower()
+
+    return any(section_name in names for section_name in EXCLUDED_SECTIONS)
+
+
+def extract_paragraphs_and_headers(html: str) -> tuple[str, str | None]:
+    """Return the paragraphs and headers of an SEP page and its title, in one pass.
+
+    Args:
+        html: HTML of the page.
+
+    Returns:
+        tuple[str, str | None]: Text of the paragraphs and headers outside the
+            excluded sections, separated by blank lines, and the text of the first
+            `title` tag, if any.
+    """
+
+    parser = _SEPContentParser()
+    parser.feed(html)
+    parser.close()
+
+    return parser.text(), parser.title
+
+
+def parse_stanford_encyclopedia_of_philosophy(
+    philosopher: Philosopher, url: str, html: str
+) -> Document:
+    """Extract the document of a single philosopher from a Stanford Encyclopedia of Philosophy page.
+
+    Args:
+        philosopher: Philosopher object containing philosopher information.
+        url: URL of the page.
+        html: HTML of the page.
+
+    Returns:
+        Document: The paragraphs and headers of the entry, without its bibliography,
+            related entries and other boilerplate sections.
+    """
 
-        if title := soup.find("title"):
-            metadata["title"] = title.get_text().strip(" \n")
+    text, title = extract_paragraphs_and_headers(html)
+    metadata = {
+        "source": url,
+        "philosopher_id": philosopher.id,
+        "philosopher_name": philosopher.name,
+    }
 
-        documents.append(Document(page_content=text, metadata=metadata))
+    if title is not None:
+        metadata["title"] = title.strip(" \n")
 
-    return documents
+    return Document(page_content=text, metadata=metadata)
 
 
 if __name__ == "__main__":
     aristotle = PhilosopherFactory().get_philosopher("aristotle")
-    docs = extract_stanford_encyclopedia_of_philosophy(
+    docs = extract(
         aristotle,
         [
             "https://plato.stanford.edu/entries/aristotle/",
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from urllib.parse import urldefrag, urlsplit
+
+import aiohttp
+from loguru import logger
+
+from agents.config import settings
+
+DEFAULT_USER_AGENT = "agents-extraction/0.1 (long-term memory ingestion)"
+
+
+@dataclass
+class FetchStats:
+    requests: int = 0
+    downloaded: int = 0
+    not_modified: int = 0
+    replayed: int = 0
+    deduplicated: int = 0
+    failed: int = 0
+    bytes_downloaded: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class HttpCache:
+    """On-disk cache of fetched pages and their validators.
+
+    Each URL is stored as `<sha256>.json` (URL, ETag, Last-Modified, encoding,
+    fetch time) next to `<sha256>.body` (raw bytes). Both are written to a
+    temporary file first and moved into place, body before metadata, so a
+    metadata file always describes a complete body.
+
+    Args:
+        directory (Path): Directory of the cache files.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def key(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def get(self, url: str) -> tuple[dict, bytes] | None:
+        key = self.key(url)
+        try:
+            meta = json.loads((self.directory / f"{key}.json").read_text(encoding="utf-8"))
+            body = (self.directory / f"{key}.body").read_bytes()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        return meta, body
+
+    def urls(self) -> list[str]:
+        """Return the URL of every cached page."""
+
+        return sorted(
+            json.loads(path.read_text(encoding="utf-8"))["url"]
+            for path in self.directory.glob("*.json")
+        )
+
+    def put(self, url: str, body: bytes, meta: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        key = self.key(url)
+        self._write(self.directory / f"{key}.body", body)
+        self._write(
+            self.directory / f"{key}.json",
+            json.dumps({**meta, "url": url, "fetched_at": time.time()}).encode("utf-8"),
+        )
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+
+class AsyncFetcher:
+    """Fetch pages concurrently, with per-host limits and conditional requests.
+
+    `fetch_all` downloads every distinct URL once, with at most `per_host_limit`
+    requests in flight per host. With a cache, a page fetched before is
+    revalidated with `If-None-Match` / `If-Modified-Since`, and a `304 Not
+    Modified` is served from disk. In `offline` mode nothing is requested: pages
+    are replayed from the cache, which makes extraction deterministic for tests
+    and benchmarks.
+
+    Args:
+        cache (HttpCache | None): Cache of fetched pages. Required when offline.
+        per_host_limit (int): Maximum concurrent requests per host.
+        timeout_seconds (float): Total timeout of one request.
+        retries (int): Extra attempts on connection errors, 429 and 5xx responses.
+        offline (bool): Only serve pages from the cache.
+        user_agent (str): User-Agent header sent with every request.
+    """
+
+    def __init__(
+        self,
+        cache: HttpCache | None = None,
+        per_host_limit: int = 2,
+        timeout_seconds: float = 30.0,
+        retries: int = 2,
+        offline: bool = False,
+        user_agent: str = DEFAULT_USER_AGENT,
+    ) -> None:
+        if offline and cache is None:
+            raise ValueError("Offline fetching needs a cache to replay pages from.")
+
+        self.cache = cache
+        self.per_host_limit = max(1, per_host_limit)
+        self.timeout_seconds = timeout_seconds
+        self.retries = retries
+        self.offline = offline
+        self.user_agent = user_agent
+        self.stats = FetchStats()
+
+    @classmethod
+    def build_from_settings(cls) -> "AsyncFetcher":
+        return cls(
+            cache=HttpCache(settings.EXTRACTION_CACHE_DIR),
+            per_host_limit=settings.EXTRACTION_PER_HOST_LIMIT,
+            timeout_seconds=settings.EXTRACTION_TIMEOUT_SECONDS,
+            offline=settings.EXTRACTION_OFFLINE,
+        )
+
+    async def fetch_all(self, urls: list[str]) -> dict[str, str | None]:
+        """Fetch `urls` and return their decoded bodies by URL.
+
+        URLs differing only by their fragment are fetched once. A page that still
+        fails after all retries, e.g. a 404, is logged and mapped to None, so one
+        dead link does not abort the others.
+
+        Raises:
+            FileNotFoundError: Offline, when a page is not cached.
+        """
+
+        unique = {url: urldefrag(url).url for url in urls}
+        targets = list(dict.fromkeys(unique.values()))
+        self.stats.deduplicated += len(urls) - len(targets)
+
+        hosts: dict[str, asyncio.Semaphore] = {}
+        for target in targets:
+            hosts.setdefault(urlsplit(target).netloc, asyncio.Semaphore(self.per_host_limit))
+
+        timeout = aiohttp.ClientTimeout(total=self.timeout_seconds)
+        async with aiohttp.ClientSession(
+            headers={"User-Agent": self.user_agent}, timeout=timeout
+        ) as session:
+            bodies = await asyncio.gather(
+                *(
+                    self._fetch_or_skip(session, target, hosts[urlsplit(target).netloc])
+                    for target in targets
+                )
+            )
+
+        pages = dict(zip(targets, bodies))
+
+        return {url: pages[target] for url, target in unique.items()}
+
+    async def _fetch_or_skip(
+        self, session: aiohttp.ClientSession, url: str, host: asyncio.Semaphore
+    ) -> str | None:
+        try:
+            return await self._fetch(session, url, host)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats.failed += 1
+            logger.error(f"Failed to fetch {url}, skipping it ({type(e).__name__}: {e}).")
+            return None
+
+    async def _fetch(
+        self, session: aiohttp.ClientSession, url: str, host: asyncio.Semaphore
+    ) -> str:
+        cached = self.cache.get(url) if self.cache is not None else None
+        if self.offline:
+            if cached is None:
+                raise FileNotFoundError(f"No cached page for {url} in {self.cache.directory}")
+            self.stats.replayed += 1
+            return self._decode(*cached)
+
+        headers = {}
+        if cached is not None:
+            meta = cached[0]
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._get(session, url, headers, host)
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = getattr(e, "status", None)
+                retryable = status is None or status == 429 or status >= 500
+                if attempt == self.retries or not retryable:
+                    raise
+                delay = 2**attempt
+                logger.warning(f"Fetching {url} failed ({e}), retrying in {delay}s.")
+                await asyncio.sleep(delay)
+
+        if response is None:
+            self.stats.not_modified += 1
+            return self._decode(*cached)
+
+        meta, body = response
+        self.stats.downloaded += 1
+        self.stats.bytes_downloaded += len(body)
+        if self.cache is not None:
+            self.cache.put(url, body, meta)
+
+        return self._decode(meta, body)
+
+    async def _get(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: dict[str, str],
+        host: asyncio.Semaphore,
+    ) -> tuple[dict, bytes] | None:
+        """GET `url` and return its metadata and body, or None if not modified."""
+
+        async with host:
+            self.stats.requests += 1
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and headers:
+                    return None
+                response.raise_for_status()
+                body = await response.read()
+
+                return {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "encoding": response.get_encoding(),
+                }, body
+
+    @staticmethod
+    def _decode(meta: dict, body: bytes) -> str:
+        return body.decode(meta.get("encoding") or "utf-8", errors="replace")
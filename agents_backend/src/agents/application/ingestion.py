@@ -0,0 +1,437 @@
+import hashlib
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+from pymongo import UpdateOne
+
+from agents.application.data import DedupIndex, MinHashDeduplicator
+from agents.application.data.deduplicate_documents import cluster_keepers
+from agents.application.rag.retrievers import Retriever
+from agents.application.rag.splitters import Splitter
+
+try:
+    import torch
+except Exception:
+    torch = None
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    chunks: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "chunks": self.chunks,
+            "busy_s": round(self.busy_seconds, 2),
+            "chunks_per_s": round(self.chunks_per_second, 1),
+        }
+
+
+class _Stage(threading.Thread):
+    def __init__(
+        self,
+        name: str,
+        source: Iterable | queue.Queue,
+        sink: queue.Queue | None,
+        fn: Callable[[Any], Iterable[Any]],
+        count: Callable[[Any], int],
+        failed: threading.Event,
+    ) -> None:
+        super().__init__(name=f"ingest-{name}", daemon=True)
+        self.stats = StageStats(name=name)
+        self.source = source
+        self.sink = sink
+        self.fn = fn
+        self.count = count
+        self.failed = failed
+        self.error: BaseException | None = None
+
+    def run(self) -> None:
+        try:
+            for item in self._items():
+                started = time.perf_counter()
+                outputs = list(self.fn(item))
+                self.stats.busy_seconds += time.perf_counter() - started
+                self.stats.items += 1
+                for output in outputs:
+                    self.stats.chunks += self.count(output)
+                    self._put(output)
+        except BaseException as e:
+            self.error = e
+            self.failed.set()
+        finally:
+            self._put(_DONE)
+
+    def _items(self):
+        if not isinstance(self.source, queue.Queue):
+            # The first stage does its work while the source generator advances.
+            iterator = iter(self.source)
+            while not self.failed.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                self.stats.busy_seconds += time.perf_counter() - started
+                yield item
+            return
+
+        while True:
+            item = self.source.get()
+            if item is _DONE or self.failed.is_set():
+                return
+            yield item
+
+    def _put(self, item: Any) -> None:
+        if self.sink is None:
+            return
+        # Bounded queues apply backpressure; keep checking so a failure downstream
+        # cannot leave this thread blocked forever.
+        while True:
+            try:
+                self.sink.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                if self.failed.is_set():
+                    return
+
+
+class IngestionPipeline:
+    """Run extraction, splitting, embedding and Mongo writes as overlapping stages.
+
+    Each stage is a thread connected to the next by a bounded queue, so the encoder
+    embeds one batch while the next philosopher is extracted and the previous batch
+    is written. Memory stays bounded by `queue_size` items per queue.
+
+    Ingestion is incremental. Every chunk is stored with a `chunk_hash` of its
+    philosopher, text and `hash_salt`, which has a unique index. Only chunks whose hash is
+    not stored yet are embedded and upserted. Once every stage has succeeded, the
+    stored chunks of an ingested philosopher that the run no longer produced are deleted.
+    Philosophers absent from the run are left untouched.
+
+    With `dedup_index_path`, new chunks are also checked against a `DedupIndex` of
+    every stored chunk before they are embedded. A near-duplicate of a chunk stored for
+    the same philosopher (`dedup_scope="character"`) or any philosopher (`"global"`), in
+    this run or an earlier one, is dropped. Retrieval is scoped to one philosopher, so
+    with `"global"` a shared passage is only retrieved for the philosopher that stored
+    it. The index is reconciled with the stored chunks at the start of every run and
+    saved at the end.
+
+    Args:
+        retriever (Retriever): Retriever whose vector store and embedding model are used.
+        splitter (Splitter): Splits extracted documents into chunks.
+        batch_size (int): Chunks embedded and inserted per batch.
+        queue_size (int): Maximum items waiting between two stages.
+        torch_threads (int): Intra-op threads used by the encoder. 0 keeps torch's default.
+        dedup_threshold (float): MinHash similarity above which chunks are duplicates.
+        embeddings (Embeddings | None): Encoder for the chunks. Defaults to the
+            retriever's own. Stored vectors are only comparable with query vectors from
+            the same encoder, so a registry handle to another model, backend or model
+            file is rejected.
+        hash_salt (str): Mixed into every chunk hash. Pass the embedding model identity
+            so switching models re-embeds everything.
+        dedup_index_path (Path | None): File of the persistent deduplication index.
+            Chunks are only deduplicated within each philosopher's batch if None.
+        dedup_scope (str): "character" drops chunks already stored for the same
+            philosopher, "global" those stored for any philosopher.
+    """
+
+    def __init__(
+        self,
+        retriever: Retriever,
+        splitter: Splitter,
+        batch_size: int = 64,
+        queue_size: int = 4,
+        torch_threads: int = 0,
+        dedup_threshold: float = 0.7,
+        embeddings: Embeddings | None = None,
+        hash_salt: str = "",
+        dedup_index_path: Path | None = None,
+        dedup_scope: str = "character",
+    ) -> None:
+        if dedup_scope not in ("global", "character"):
+            raise ValueError(f"Unknown deduplication scope: {dedup_scope}")
+        query_key = getattr(retriever.vectorstore.embeddings, "key", None)
+        chunk_key = getattr(embeddings, "key", None)
+        if query_key is not None and chunk_key is not None and chunk_key != query_key:
+            raise ValueError(
+                f"Chunks would be embedded with {chunk_key} but queries with {query_key}."
+            )
+
+        self.retriever = retriever
+        self.splitter = splitter
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+        self.torch_threads = torch_threads
+        self.dedup_threshold = dedup_threshold
+        self.embeddings = embeddings or retriever.vectorstore.embeddings
+        self.hash_salt = hash_salt
+        self.dedup_scope = dedup_scope
+        self.deduplicator = MinHashDeduplicator(threshold=dedup_threshold)
+        self.dedup_index = (
+            DedupIndex(self.deduplicator, dedup_index_path, salt=hash_salt)
+            if dedup_index_path is not None
+            else None
+        )
+        self._vanished: list[Any] = []
+        self._unchanged = 0
+        self._known_duplicates = 0
+
+    def __call__(
+        self, extraction: Iterable[tuple[Any, list[Document]]]
+    ) -> list[StageStats]:
+        """Ingest everything `extraction` yields and return per-stage throughput.
+
+        Args:
+            extraction (Iterable[tuple[Any, list[Document]]]): Yields
+                `(philosopher, documents)` pairs, e.g. `get_extraction_generator`.
+
+        Returns:
+            list[StageStats]: Stats of the extract, split, embed and write stages.
+
+        Raises:
+            Exception: The first error raised by any stage.
+        """
+
+        if self.torch_threads > 0 and torch is not None:
+            torch.set_num_threads(self.torch_threads)
+
+        if not self.retriever.is_local:
+            collection = self.retriever.vectorstore.collection
+            # Documents written before chunks were hashed have no hash; keep them out
+            # of the unique index until they are replaced.
+            collection.create_index(
+                "chunk_hash",
+                unique=True,
+                partialFilterExpression={"chunk_hash": {"$exists": True}},
+            )
+            collection.create_index("philosopher_id")
+        self._vanished = []
+        self._unchanged = 0
+        self._known_duplicates = 0
+        if self.dedup_index is not None:
+            # Drops entries of chunks deleted since, e.g. with the collection.
+            stale = self.dedup_index.retain(
+                digest for _, digest in self._stored_chunks() if digest
+            )
+            if stale:
+                logger.info(f"Removed {stale} stale chunks from the deduplication index.")
+
+        failed = threading.Event()
+        extracted, split, embedded = (
+            queue.Queue(maxsize=self.queue_size) for _ in range(3)
+        )
+        started = time.perf_counter()
+        stages = [
+            _Stage(
+                "extract",
+                extraction,
+                extracted,
+                lambda item: [item],
+                lambda item: len(item[1]),
+                failed,
+            ),
+            _Stage("split", extracted, split, self._split, len, failed),
+            _Stage("embed", split, embedded, self._embed, lambda b: len(b[0]), failed),
+            _Stage("write", embedded, None, self._write, lambda n: n, failed),
+        ]
+        for stage in stages:
+            stage.start()
+        for stage in stages:
+            stage.join()
+
+        for stage in stages:
+            if stage.error is not None:
+                raise stage.error
+
+        if self._vanished and self.retriever.is_local:
+            self.retriever.vectorstore.delete(self._vanished)
+        elif self._vanished:
+            self.retriever.vectorstore.collection.delete_many(
+                {"_id": {"$in": self._vanished}}
+            )
+        # A new run id invalidates retrieval caches, so only runs that changed
+        # something record one. For the local backend, recording it also saves.
+        if stages[-1].stats.chunks or self._vanished:
+            self.retriever.record_ingestion_run(uuid.uuid4().hex)
+        if self.dedup_index is not None:
+            self.dedup_index.save()
+
+        wall = time.perf_counter() - started
+        stats = [stage.stats for stage in stages]
+        written = stats[-1].chunks
+        logger.info(
+            f"Ingested {written} new chunks in {wall:.1f}s ({written / wall if wall else 0:.1f} chunks/s), "
+            f"{self._unchanged} unchanged, {len(self._vanished)} deleted, "
+            f"{self._known_duplicates} dropped as duplicates of stored chunks"
+        )
+        for stage_stats in stats:
+            logger.info(" ".join(f"{k}={v}" for k, v in stage_stats.as_dict().items()))
+
+        return stats
+
+    def chunk_hash(self, philosopher_id: str, text: str) -> str:
+        raw = f"{self.hash_salt}\0{philosopher_id}\0{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _split(self, item: tuple[Any, list[Document]]) -> Iterable[list[Document]]:
+        """Yield batches of the new chunks of a philosopher.
+
+        Chunks are streamed from the splitter twice. The first pass only keeps the
+        hash, length and signature of every chunk, which is all deduplication and
+        change detection need. The second pass, skipped when nothing is new, yields
+        the chunks to embed; the splitter is deterministic, so rows match.
+        """
+
+        philosopher, documents = item
+        digests: list[str] = []
+        lengths: list[int] = []
+
+        def texts() -> Iterator[str]:
+            for chunk in self.splitter.iter_split(documents):
+                digests.append(self.chunk_hash(philosopher.id, chunk.page_content))
+                lengths.append(len(chunk.page_content))
+                yield chunk.page_content
+
+        signatures = self.deduplicator.signatures(texts())
+        keepers = cluster_keepers(lengths, self.deduplicator.find_duplicates(signatures))
+        if len(keepers) < len(lengths):
+            logger.info(
+                f"{len(lengths) - len(keepers)} / {len(lengths)} documents are duplicates. Removing them."
+            )
+
+        new_chunks: dict[str, int] = {}
+        for row in keepers:
+            new_chunks.setdefault(digests[row], row)
+
+        vanished_digests = []
+        unchanged_rows = []
+        for stored_id, digest in self._stored_chunks(philosopher.id):
+            if digest in new_chunks:
+                unchanged_rows.append(new_chunks.pop(digest))
+                self._unchanged += 1
+            else:
+                self._vanished.append(stored_id)
+                vanished_digests.append(digest)
+
+        rows = list(new_chunks.values())
+        if self.dedup_index is not None:
+            self.dedup_index.remove(vanished_digests)
+            # Chunks stored before the index existed are added as they are seen.
+            unindexed = [
+                row
+                for row, known in zip(
+                    unchanged_rows,
+                    self.dedup_index.contains([digests[row] for row in unchanged_rows]),
+                )
+                if not known
+            ]
+            self.dedup_index.add(
+                [digests[row] for row in unindexed], philosopher.id, signatures[unindexed]
+            )
+        if self.dedup_index is not None and rows:
+            matches = self.dedup_index.query(
+                signatures[rows],
+                owner=philosopher.id if self.dedup_scope == "character" else None,
+            )
+            rows = [row for row, match in zip(rows, matches) if match < 0]
+            self._known_duplicates += int((matches >= 0).sum())
+            self.dedup_index.add(
+                [digests[row] for row in rows], philosopher.id, signatures[rows]
+            )
+
+        if not rows:
+            return
+
+        pending = set(rows)
+        batch: list[Document] = []
+        for row, chunk in enumerate(self.splitter.iter_split(documents)):
+            if row not in pending:
+                continue
+            chunk.metadata["chunk_hash"] = digests[row]
+            batch.append(chunk)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _stored_chunks(
+        self, philosopher_id: str | None = None
+    ) -> Iterable[tuple[Any, str | None]]:
+        """Yield `(id, chunk_hash)` of the stored chunks of a philosopher, or of all."""
+
+        query = {"philosopher_id": philosopher_id} if philosopher_id is not None else {}
+        vectorstore = self.retriever.vectorstore
+        if self.retriever.is_local:
+            return [
+                (doc_id, metadata.get("chunk_hash"))
+                for doc_id, metadata in vectorstore.where(query or None)
+            ]
+
+        return (
+            (record["_id"], record.get("chunk_hash"))
+            for record in vectorstore.collection.find(query, {"_id": 1, "chunk_hash": 1})
+        )
+
+    def _embed(
+        self, batch: list[Document]
+    ) -> Iterable[tuple[list[Document], list[list[float]]]]:
+        embeddings = self.embeddings.embed_documents(
+            [chunk.page_content for chunk in batch]
+        )
+        yield batch, embeddings
+
+    def _write(self, item: tuple[list[Document], list[list[float]]]) -> Iterable[int]:
+        batch, embeddings = item
+        vectorstore = self.retriever.vectorstore
+        if self.retriever.is_local:
+            vectorstore.add_embeddings(
+                [chunk.page_content for chunk in batch],
+                embeddings,
+                metadatas=[chunk.metadata for chunk in batch],
+                ids=[chunk.metadata["chunk_hash"] for chunk in batch],
+            )
+            yield len(batch)
+            return
+
+        records = [
+            {
+                vectorstore._text_key: chunk.page_content,
+                vectorstore._embedding_key: embedding,
+                **chunk.metadata,
+            }
+            for chunk, embedding in zip(batch, embeddings)
+        ]
+        vectorstore.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"chunk_hash": record["chunk_hash"]},
+                    {"$setOnInsert": record},
+                    upsert=True,
+                )
+                for record in records
+            ],
+            ordered=False,
+        )
+
+        yield len(records)
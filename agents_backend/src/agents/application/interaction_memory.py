@@ -0,0 +1,208 @@
+import hashlib
+from pathlib import Path
+
+from langchain_core.documents import Document
+from loguru import logger
+
+from agents.application.rag.retrievers import Retriever, get_retriever
+from agents.config import settings
+from agents.infrastructure.mongo import MongoClientWrapper, MongoIndex
+from agents.infrastructure.voice import TranscriptLine, TranscriptTailer
+
+# Transcript record types that are part of a conversation with a character. Speech
+# the player made while not engaged with anyone (`user_ignored`) is left out.
+_INTERACTION_TYPES = {"user", "agent"}
+
+
+def _character_of(record: dict) -> str:
+    if record.get("type") == "agent":
+        return str(record.get("speaker", "")).strip().lower()
+
+    return str(record.get("active_character", "")).strip().lower()
+
+
+def _speaker_label(record: dict) -> str:
+    return "Player" if record.get("type") == "user" else "You"
+
+
+def chunk_interactions(
+    lines: list[TranscriptLine], lines_per_chunk: int
+) -> list[Document]:
+    """Group transcript lines into interaction documents, one character per document.
+
+    Consecutive lines of the same room and character are packed together until
+    `lines_per_chunk` is reached or the player switches character. Each document id
+    is derived from its room, character and first line, so re-ingesting the same
+    lines after a crash upserts instead of duplicating.
+
+    Args:
+        lines (list[TranscriptLine]): Records in file order.
+        lines_per_chunk (int): Maximum transcript lines per document.
+
+    Returns:
+        list[Document]: Documents with `id` and `character_id` metadata.
+    """
+
+    documents: list[Document] = []
+    open_chunks: dict[str, tuple[str, list[dict]]] = {}
+
+    def emit(room: str) -> None:
+        character_id, records = open_chunks.pop(room)
+        first = records[0]
+        raw_id = f"{room}\0{character_id}\0{first.get('timestamp', '')}\0{first.get('text', '')}"
+        documents.append(
+            Document(
+                id=hashlib.sha256(raw_id.encode("utf-8")).hexdigest()[:32],
+                page_content="\n".join(
+                    f"{_speaker_label(r)}: {r.get('text', '').strip()}" for r in records
+                ),
+                metadata={
+                    "character_id": character_id,
+                    "room": room,
+                    "started_at": first.get("timestamp"),
+                    "ended_at": records[-1].get("timestamp"),
+                    "source": "call_transcript",
+                },
+            )
+        )
+
+    for line in lines:
+        record = line.record
+        if record.get("type") not in _INTERACTION_TYPES:
+            continue
+
+        character_id = _character_of(record)
+        if not character_id or not str(record.get("text", "")).strip():
+            continue
+
+        current = open_chunks.get(line.room)
+        if current is not None and current[0] != character_id:
+            emit(line.room)
+            current = None
+        if current is None:
+            current = open_chunks[line.room] = (character_id, [])
+
+        current[1].append(record)
+        if len(current[1]) >= lines_per_chunk:
+            emit(line.room)
+
+    for room in list(open_chunks):
+        emit(room)
+
+    return documents
+
+
+class InteractionMemoryIngestor:
+    """Stream new call transcript lines into the per-character interaction memory.
+
+    Each call reads only the bytes appended since the previous one, chunks them into
+    interaction documents, embeds them in batches and upserts them by id. Transcript
+    offsets are committed only after the upsert succeeded.
+
+    Args:
+        retriever (Retriever): Retriever over the interaction memory collection.
+        tailer (TranscriptTailer): Offset-tracking reader of the transcripts directory.
+        lines_per_chunk (int): Maximum transcript lines per document.
+        batch_size (int): Documents embedded and written per round trip.
+    """
+
+    def __init__(
+        self,
+        retriever: Retriever,
+        tailer: TranscriptTailer,
+        lines_per_chunk: int = 6,
+        batch_size: int = 64,
+    ) -> None:
+        self.retriever = retriever
+        self.tailer = tailer
+        self.lines_per_chunk = lines_per_chunk
+        self.batch_size = batch_size
+
+    @classmethod
+    def build_from_settings(
+        cls,
+        transcripts_dir: Path = settings.CALL_TRANSCRIPTS_DIR_PATH,
+        state_path: Path = settings.TRANSCRIPT_INGESTION_STATE_FILE_PATH,
+    ) -> "InteractionMemoryIngestor":
+        retriever = get_retriever(
+            embedding_model_id=settings.RAG_TEXT_EMBEDDING_MODEL_ID,
+            k=settings.INTERACTION_MEMORY_TOP_K,
+            device=settings.RAG_DEVICE,
+            collection_name=settings.MONGO_INTERACTION_MEMORY_COLLECTION,
+            partition_field="character_id",
+        )
+        tailer = TranscriptTailer(root=transcripts_dir, state_path=state_path)
+
+        return cls(
+            retriever,
+            tailer,
+            lines_per_chunk=settings.INTERACTION_MEMORY_LINES_PER_CHUNK,
+            batch_size=settings.INTERACTION_MEMORY_BATCH_SIZE,
+        )
+
+    def __call__(self, max_lines: int | None = None) -> int:
+        """Ingest the transcript lines appended since the last call.
+
+        Args:
+            max_lines (int | None): Upper bound on lines read in this pass.
+
+        Returns:
+            int: Number of interaction documents upserted.
+        """
+
+        lines = self.tailer.poll(max_lines=max_lines)
+        documents = chunk_interactions(lines, lines_per_chunk=self.lines_per_chunk)
+
+        for start in range(0, len(documents), self.batch_size):
+            batch = documents[start : start + self.batch_size]
+            self.retriever.vectorstore.add_documents(
+                batch, ids=[document.id for document in batch]
+            )
+
+        if self.retriever.is_local and documents:
+            self.retriever.vectorstore.save()
+        self.tailer.commit()
+        if documents:
+            logger.info(
+                f"Upserted {len(documents)} interaction documents from {len(lines)} transcript lines."
+            )
+
+        return len(documents)
+
+    def create_index(self) -> None:
+        """Create the vector index, filterable by character, unless it already exists."""
+
+        if self.retriever.is_local:
+            return
+
+        with MongoClientWrapper(
+            model=Document, collection_name=settings.MONGO_INTERACTION_MEMORY_COLLECTION
+        ) as client:
+            MongoIndex(retriever=self.retriever, mongodb_client=client).create(
+                embedding_dim=settings.RAG_TEXT_EMBEDDING_MODEL_DIM,
+                filters=["character_id"],
+            )
+
+
+class InteractionMemoryRetriever:
+    def __init__(self, retriever: Retriever) -> None:
+        self.retriever = retriever
+
+    @classmethod
+    def build_from_settings(cls) -> "InteractionMemoryRetriever":
+        retriever = get_retriever(
+            embedding_model_id=settings.RAG_TEXT_EMBEDDING_MODEL_ID,
+            k=settings.INTERACTION_MEMORY_TOP_K,
+            device=settings.RAG_DEVICE,
+            collection_name=settings.MONGO_INTERACTION_MEMORY_COLLECTION,
+            partition_field="character_id",
+        )
+
+        return cls(retriever)
+
+    def __call__(self, character_id: str, query: str) -> list[Document]:
+        return self.retriever.vectorstore.similarity_search(
+            query,
+            k=self.retriever.top_k,
+            pre_filter={"character_id": {"$eq": character_id.strip().lower()}},
+        )
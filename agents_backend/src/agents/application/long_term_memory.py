@@ -1,7 +1,9 @@
 from langchain_core.documents import Document
 from loguru import logger
 
-from agents.application.data import deduplicate_documents, get_extraction_generator
+from agents.application.data import get_extraction_generator
+from agents.application.ingestion import IngestionPipeline
+from agents.application.rag.retrieval_cache import RetrievalCache
 from agents.application.rag.retrievers import Retriever, get_retriever
 from agents.application.rag.splitters import Splitter, get_splitter
 from agents.config import settings
@@ -10,9 +12,12 @@ from agents.infrastructure.mongo import MongoClientWrapper, MongoIndex
 
 
 class LongTermMemoryCreator:
-    def __init__(self, retriever: Retriever, splitter: Splitter) -> None:
+    def __init__(
+        self, retriever: Retriever, splitter: Splitter, pipeline: IngestionPipeline
+    ) -> None:
         self.retriever = retriever
         self.splitter = splitter
+        self.pipeline = pipeline
 
     @classmethod
     def build_from_settings(cls) -> "LongTermMemoryCreator":
@@ -21,9 +26,31 @@ class LongTermMemoryCreator:
             k=settings.RAG_TOP_K,
             device=settings.RAG_DEVICE,
         )
-        splitter = get_splitter(chunk_size=settings.RAG_CHUNK_SIZE)
+        splitter = get_splitter(
+            chunk_size=settings.RAG_CHUNK_SIZE,
+            chunk_overlap=settings.RAG_CHUNK_OVERLAP,
+            model_id=settings.RAG_TEXT_EMBEDDING_MODEL_ID,
+        )
+        pipeline = IngestionPipeline(
+            retriever,
+            splitter,
+            batch_size=settings.RAG_EMBEDDING_BATCH_SIZE,
+            queue_size=settings.RAG_INGESTION_QUEUE_SIZE,
+            torch_threads=settings.RAG_EMBEDDING_TORCH_THREADS,
+            dedup_threshold=0.7,
+            dedup_index_path=(
+                settings.RAG_DEDUP_INDEX_DIR / f"{settings.MONGO_LONG_TERM_MEMORY_COLLECTION}.npz"
+                if settings.RAG_DEDUP_INDEX
+                else None
+            ),
+            dedup_scope=settings.RAG_DEDUP_SCOPE,
+            hash_salt=(
+                f"{settings.RAG_TEXT_EMBEDDING_MODEL_ID}:{settings.RAG_EMBEDDING_BACKEND}:"
+                f"{settings.RAG_EMBEDDING_MODEL_FILE or ''}"
+            ),
+        )
 
-        return cls(retriever, splitter)
+        return cls(retriever, splitter, pipeline)
 
     def __call__(self, philosophers: list[PhilosopherExtract]) -> None:
         if len(philosophers) == 0:
@@ -31,23 +58,16 @@ class LongTermMemoryCreator:
 
             return
 
-        # First clear the long term memory collection to avoid duplicates.
-        with MongoClientWrapper(
-            model=Document, collection_name=settings.MONGO_LONG_TERM_MEMORY_COLLECTION
-        ) as client:
-            client.clear_collection()
-
         extraction_generator = get_extraction_generator(philosophers)
-        for _, docs in extraction_generator:
-            chunked_docs = self.splitter.split_documents(docs)
-
-            chunked_docs = deduplicate_documents(chunked_docs, threshold=0.7)
-
-            self.retriever.vectorstore.add_documents(chunked_docs)
+        self.pipeline(extraction_generator)
 
         self.__create_index()
 
     def __create_index(self) -> None:
+        if self.retriever.is_local:
+            # The local index is built and persisted by the pipeline itself.
+            return
+
         with MongoClientWrapper(
             model=Document, collection_name=settings.MONGO_LONG_TERM_MEMORY_COLLECTION
         ) as client:
@@ -56,13 +76,24 @@ class LongTermMemoryCreator:
                 mongodb_client=client,
             )
             self.index.create(
-                is_hybrid=True, embedding_dim=settings.RAG_TEXT_EMBEDDING_MODEL_DIM
+                is_hybrid=True,
+                embedding_dim=settings.RAG_TEXT_EMBEDDING_MODEL_DIM,
+                filters=["philosopher_id"],
             )
 
 
 class LongTermMemoryRetriever:
-    def __init__(self, retriever: Retriever) -> None:
+    """Retrieve long-term memory chunks, optionally through a `RetrievalCache`.
+
+    Args:
+        retriever (Retriever): Retriever over the long-term memory collection.
+        cache (RetrievalCache | None): Cache of results per `(philosopher, query, k)`,
+            invalidated by ingestion runs.
+    """
+
+    def __init__(self, retriever: Retriever, cache: RetrievalCache | None = None) -> None:
         self.retriever = retriever
+        self.cache = cache
 
     @classmethod
     def build_from_settings(cls) -> "LongTermMemoryRetriever":
@@ -70,9 +101,28 @@ class LongTermMemoryRetriever:
             embedding_model_id=settings.RAG_TEXT_EMBEDDING_MODEL_ID,
             k=settings.RAG_TOP_K,
             device=settings.RAG_DEVICE,
+            hybrid=settings.RAG_HYBRID_SEARCH,
         )
+        cache = None
+        if settings.RAG_RESULT_CACHE_SIZE > 0:
+            cache = RetrievalCache(
+                run_id=retriever.ingestion_run_id,
+                max_entries=settings.RAG_RESULT_CACHE_SIZE,
+                check_interval_seconds=settings.RAG_RESULT_CACHE_RUN_CHECK_SECONDS,
+            )
+
+        return cls(retriever, cache)
 
-        return cls(retriever)
+    def __call__(self, query: str, philosopher_id: str | None = None) -> list[Document]:
+        """Retrieve chunks relevant to `query`, only from `philosopher_id` if given."""
 
-    def __call__(self, query: str) -> list[Document]:
-        return self.retriever.invoke(query)
+        pre_filter = {"philosopher_id": {"$eq": philosopher_id}} if philosopher_id else None
+        if self.cache is None:
+            return self.retriever.invoke(query, pre_filter=pre_filter)
+
+        return self.cache.results(
+            philosopher_id,
+            query,
+            self.retriever.top_k,
+            lambda: self.retriever.invoke(query, pre_filter=pre_filter),
+        )
@@ -1,9 +1,26 @@
-from .retrievers import Retriever, get_retriever
+from .embeddings import EMBEDDING_MODELS, EmbeddingModelRegistry, get_embedding_model
+from .local_index import LocalVectorStore
+from .retrieval_cache import RetrievalCache
+from .retrievers import (
+    HybridRetriever,
+    Retriever,
+    get_local_vector_store,
+    get_retriever,
+    reciprocal_rank_fusion,
+)
 from .splitters import Splitter, get_splitter
 
 __all__ = [
+    "EMBEDDING_MODELS",
+    "EmbeddingModelRegistry",
+    "HybridRetriever",
+    "LocalVectorStore",
+    "RetrievalCache",
     "Retriever",
     "Splitter",
+    "get_embedding_model",
+    "get_local_vector_store",
     "get_retriever",
     "get_splitter",
+    "reciprocal_rank_fusion",
 ]
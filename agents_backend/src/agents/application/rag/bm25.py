@@ -0,0 +1,150 @@
+import json
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i if in into is it its "
+    "of on or our she so that the their them then there these they this to was we were "
+    "what when which who will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in _STOPWORDS
+    ]
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index of compact posting lists.
+
+    Postings are stored term by term in three flat arrays: `offsets` delimits each
+    term's slice of `doc_ids` (uint32, ascending) and `term_freqs` (uint16). That costs
+    6 bytes per posting, and scoring a query term is a vectorized pass over one
+    slice. Rows are the rows of the vector store the index was built with.
+
+    Args:
+        terms (list[str]): Vocabulary, position is the term id.
+        offsets (np.ndarray): `len(terms) + 1` posting list boundaries.
+        doc_ids (np.ndarray): Row of every posting.
+        term_freqs (np.ndarray): Term frequency of every posting.
+        doc_lengths (np.ndarray): Token count of every row.
+        k1 (float): Term frequency saturation.
+        b (float): Document length normalization.
+    """
+
+    def __init__(
+        self,
+        terms: list[str],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        self.terms = terms
+        self.vocabulary = {term: term_id for term_id, term in enumerate(terms)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+
+        size = len(doc_lengths)
+        average = float(doc_lengths.mean()) if size else 0.0
+        document_freqs = np.diff(offsets).astype(np.float32)
+        self.idf = np.log1p((size - document_freqs + 0.5) / (document_freqs + 0.5))
+        self.length_norms = (
+            k1 * (1 - b + b * doc_lengths / average) if average else np.full(size, k1)
+        ).astype(np.float32)
+
+    @classmethod
+    def build(cls, texts: list[str], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        vocabulary: dict[str, int] = {}
+        term_ids: list[int] = []
+        rows: list[int] = []
+        freqs: list[int] = []
+        doc_lengths = np.zeros(len(texts), dtype=np.int32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[row] = len(tokens)
+            for term, freq in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                rows.append(row)
+                freqs.append(freq)
+
+        term_id_array = np.asarray(term_ids, dtype=np.int64)
+        # Stable, so rows stay ascending within each posting list.
+        order = np.argsort(term_id_array, kind="stable")
+        offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(term_id_array, minlength=len(vocabulary)))]
+        ).astype(np.int64)
+
+        return cls(
+            terms=list(vocabulary),
+            offsets=offsets,
+            doc_ids=np.asarray(rows, dtype=np.uint32)[order],
+            term_freqs=np.minimum(np.asarray(freqs, dtype=np.int64), 65535).astype(np.uint16)[order],
+            doc_lengths=doc_lengths,
+            k1=k1,
+            b=b,
+        )
+
+    @classmethod
+    def load(cls, directory: Path) -> "BM25Index":
+        return cls(
+            terms=json.loads((directory / "bm25_terms.json").read_text(encoding="utf-8")),
+            offsets=np.load(directory / "bm25_offsets.npy"),
+            doc_ids=np.load(directory / "bm25_doc_ids.npy", mmap_mode="r"),
+            term_freqs=np.load(directory / "bm25_term_freqs.npy", mmap_mode="r"),
+            doc_lengths=np.load(directory / "bm25_doc_lengths.npy"),
+        )
+
+    def save(self, directory: Path) -> None:
+        (directory / "bm25_terms.json").write_text(json.dumps(self.terms), encoding="utf-8")
+        np.save(directory / "bm25_offsets.npy", self.offsets)
+        np.save(directory / "bm25_doc_ids.npy", np.asarray(self.doc_ids))
+        np.save(directory / "bm25_term_freqs.npy", np.asarray(self.term_freqs))
+        np.save(directory / "bm25_doc_lengths.npy", self.doc_lengths)
+
+    def search(
+        self, query: str, k: int, mask: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return the rows and scores of the `k` best matches of `query`.
+
+        Args:
+            query (str): Free text, tokenized like the indexed documents.
+            k (int): Number of results.
+            mask (np.ndarray | None): Boolean per row; rows set to False are skipped.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Rows and scores, best first.
+        """
+
+        term_ids = {self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary}
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            rows = self.doc_ids[start:end]
+            freqs = self.term_freqs[start:end].astype(np.float32)
+            # Rows are unique within a posting list, so the fancy `+=` is safe.
+            scores[rows] += (
+                self.idf[term_id] * freqs * (self.k1 + 1) / (freqs + self.length_norms[rows])
+            )
+
+        if mask is not None:
+            scores[~mask] = 0
+        rows = np.flatnonzero(scores)
+        if len(rows) > k:
+            rows = rows[np.argpartition(-scores[rows], k - 1)[:k]]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+
+        return rows, scores[rows]
@@ -0,0 +1,162 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+
+def normalize_query(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def query_hash(text: str) -> str:
+    return hashlib.sha1(normalize_query(text).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class QueryCacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        # Every hit is one encoder pass avoided.
+        return {**asdict(self), "hit_rate": round(self.hit_rate, 4)}
+
+
+class _DiskVectorStore:
+    """Append-only float32 vector file with a parallel file of keys, read via memmap.
+
+    Row `i` of `<name>.f32` belongs to line `i` of `<name>.keys`. A row or key left
+    without its counterpart by an interrupted append is truncated on load. The store
+    assumes a single writing process.
+    """
+
+    def __init__(self, root: Path, name: str) -> None:
+        root.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = root / f"{name}.f32"
+        self._keys_path = root / f"{name}.keys"
+        self._dim_path = root / f"{name}.dim"
+        self._rows: dict[str, int] = {}
+        self._dim: int | None = None
+        self._memmap: np.memmap | None = None
+
+        if self._dim_path.exists() and self._keys_path.exists():
+            self._dim = int(self._dim_path.read_text(encoding="utf-8"))
+            size = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+            keys = self._keys_path.read_text(encoding="utf-8").split()
+            valid = min(size // (self._dim * 4), len(keys))
+            # Drop whatever an interrupted append left behind on either side.
+            if size > valid * self._dim * 4:
+                with self._vectors_path.open("r+b") as f:
+                    f.truncate(valid * self._dim * 4)
+            if len(keys) > valid:
+                self._keys_path.write_text(
+                    "".join(f"{key}\n" for key in keys[:valid]), encoding="utf-8"
+                )
+            self._rows = {key: row for row, key in enumerate(keys[:valid])}
+
+    def get(self, key: str) -> np.ndarray | None:
+        row = self._rows.get(key)
+        if row is None or self._dim is None:
+            return None
+
+        if self._memmap is None or row >= self._memmap.shape[0]:
+            self._memmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r").reshape(
+                -1, self._dim
+            )
+
+        return np.array(self._memmap[row])
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        if key in self._rows:
+            return
+
+        if self._dim is None:
+            self._dim = len(vector)
+            self._dim_path.write_text(str(self._dim), encoding="utf-8")
+        elif len(vector) != self._dim:
+            return
+        with self._vectors_path.open("ab") as f:
+            f.write(vector.astype(np.float32).tobytes())
+        with self._keys_path.open("a", encoding="utf-8") as f:
+            f.write(key + "\n")
+        self._rows[key] = len(self._rows)
+
+
+class QueryEmbeddingCache:
+    """LRU cache of query embeddings keyed by the hash of the normalized query.
+
+    Lookups go to memory first, then to the optional on-disk store, which survives
+    restarts. Only queries are cached; document batches during ingestion are embedded
+    once anyway.
+
+    Args:
+        max_entries (int): Maximum number of vectors kept in memory.
+        disk_dir (Path | None): Directory of the on-disk store. Disabled if None.
+        name (str): File name stem of the on-disk store, unique per embedding model.
+    """
+
+    def __init__(
+        self, max_entries: int = 4096, disk_dir: Path | None = None, name: str = "queries"
+    ) -> None:
+        self.max_entries = max_entries
+        self.stats = QueryCacheStats()
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: _DiskVectorStore | None = None
+        if disk_dir is not None:
+            try:
+                self._disk = _DiskVectorStore(disk_dir, name)
+            except OSError as e:
+                logger.warning(f"Query embedding disk cache disabled: {e}")
+
+    def get(self, text: str) -> list[float] | None:
+        key = query_hash(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return vector.tolist()
+
+            if self._disk is not None:
+                vector = self._disk.get(key)
+                if vector is not None:
+                    self._remember(key, vector)
+                    self.stats.hits += 1
+                    self.stats.disk_hits += 1
+                    return vector.tolist()
+
+            self.stats.misses += 1
+
+        return None
+
+    def put(self, text: str, embedding: list[float]) -> None:
+        key = query_hash(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            if self._disk is not None:
+                try:
+                    self._disk.put(key, vector)
+                except OSError as e:
+                    logger.warning(f"Failed to persist query embedding: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,225 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+from loguru import logger
+
+from agents.config import settings
+
+from .embedding_cache import QueryEmbeddingCache
+
+
+@dataclass(frozen=True)
+class EmbeddingModelKey:
+    model_id: str
+    device: str = "cpu"
+    normalize: bool = False
+    # sentence-transformers backend ("torch", "onnx" or "openvino") and, for the
+    # latter two, an optional model file such as "onnx/model_qint8_avx512.onnx".
+    backend: str = "torch"
+    model_file: str | None = None
+
+
+class LazyEmbeddings(Embeddings):
+    """Embeddings handle that loads its model from the registry on first use.
+
+    Building a retriever or vector store with it is free, so modules can create them
+    at import time without loading model weights.
+    """
+
+    def __init__(
+        self,
+        registry: "EmbeddingModelRegistry",
+        key: EmbeddingModelKey,
+        query_cache: QueryEmbeddingCache | None = None,
+    ) -> None:
+        self.registry = registry
+        self.key = key
+        self.query_cache = query_cache
+
+    @property
+    def model(self) -> HuggingFaceEmbeddings:
+        return self.registry.load(self.key)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        if self.query_cache is None:
+            return self.model.embed_query(text)
+
+        embedding = self.query_cache.get(text)
+        if embedding is None:
+            embedding = self.model.embed_query(text)
+            self.query_cache.put(text, embedding)
+
+        return embedding
+
+
+class EmbeddingModelRegistry:
+    """Process-wide registry holding one loaded embedding model per key.
+
+    Models are keyed by `(model id, device, normalization)` and loaded lazily on the
+    first embedding call, or eagerly with `warm_up`. Loading is serialized per
+    registry, so concurrent first calls load the weights once. Each key also gets
+    one query embedding cache, shared by every handle to it.
+
+    Args:
+        query_cache_size (int): Query embeddings kept in memory per model. 0 disables
+            the cache.
+        query_cache_dir (Path | None): Directory of the persistent query cache.
+    """
+
+    def __init__(
+        self, query_cache_size: int = 4096, query_cache_dir: Path | None = None
+    ) -> None:
+        self.query_cache_size = query_cache_size
+        self.query_cache_dir = query_cache_dir
+        self._models: dict[EmbeddingModelKey, HuggingFaceEmbeddings] = {}
+        self._load_seconds: dict[EmbeddingModelKey, float] = {}
+        self._query_caches: dict[EmbeddingModelKey, QueryEmbeddingCache] = {}
+        self._requested: set[EmbeddingModelKey] = set()
+        self._lock = threading.Lock()
+        self._handles_lock = threading.Lock()
+
+    def get(
+        self,
+        model_id: str,
+        device: str = "cpu",
+        normalize: bool = False,
+        backend: str = "torch",
+        model_file: str | None = None,
+    ) -> LazyEmbeddings:
+        key = EmbeddingModelKey(
+            model_id=model_id,
+            device=device,
+            normalize=normalize,
+            backend=backend,
+            model_file=model_file,
+        )
+        with self._handles_lock:
+            self._requested.add(key)
+            query_cache = self._query_caches.get(key)
+            if query_cache is None and self.query_cache_size > 0:
+                # Vectors do not depend on the device, so the on-disk store ignores it.
+                name = re.sub(
+                    r"[^A-Za-z0-9]+", "_", f"{model_id} {backend} {model_file or ''}"
+                ).strip("_") + ("_norm" if normalize else "")
+                query_cache = self._query_caches[key] = QueryEmbeddingCache(
+                    max_entries=self.query_cache_size,
+                    disk_dir=self.query_cache_dir,
+                    name=name,
+                )
+
+        return LazyEmbeddings(self, key, query_cache)
+
+    def load(self, key: EmbeddingModelKey) -> HuggingFaceEmbeddings:
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                started = time.perf_counter()
+                model_kwargs: dict = {"device": key.device}
+                if key.backend != "torch":
+                    model_kwargs["backend"] = key.backend
+                    if key.model_file:
+                        model_kwargs["model_kwargs"] = {"file_name": key.model_file}
+                model = HuggingFaceEmbeddings(
+                    model_name=key.model_id,
+                    model_kwargs=model_kwargs,
+                    encode_kwargs={"normalize_embeddings": key.normalize},
+                )
+                self._load_seconds[key] = time.perf_counter() - started
+                self._models[key] = model
+                logger.info(
+                    f"Loaded embedding model {key.model_id} ({key.backend}) on {key.device} in {self._load_seconds[key]:.1f}s"
+                )
+
+        return model
+
+    def warm_up(
+        self,
+        model_id: str,
+        device: str = "cpu",
+        normalize: bool = False,
+        backend: str = settings.RAG_EMBEDDING_BACKEND,
+        model_file: str | None = settings.RAG_EMBEDDING_MODEL_FILE,
+    ) -> None:
+        """Load the model and run one encoder pass so the first query is not slowed down."""
+
+        self.get(model_id, device, normalize, backend, model_file).embed_query("warm up")
+
+    def memory_report(self) -> list[dict]:
+        """Describe every requested model, its parameter memory and query cache hit rate."""
+
+        report = []
+        for key in sorted(self._requested, key=lambda k: (k.model_id, k.device, k.backend)):
+            model = self._models.get(key)
+            entry = {
+                "model_id": key.model_id,
+                "device": key.device,
+                "normalize": key.normalize,
+                "backend": key.backend,
+                "loaded": model is not None,
+            }
+            if model is not None:
+                client = getattr(model, "_client", None) or getattr(model, "client", None)
+                # ONNX/OpenVINO backends hold their weights outside torch.
+                tensors = (
+                    [*client.parameters(), *client.buffers()]
+                    if client is not None and key.backend == "torch"
+                    else []
+                )
+                entry["parameters"] = sum(t.numel() for t in tensors)
+                entry["memory_mb"] = round(
+                    sum(t.numel() * t.element_size() for t in tensors) / (1024 * 1024), 1
+                )
+                entry["load_seconds"] = round(self._load_seconds[key], 2)
+            query_cache = self._query_caches.get(key)
+            if query_cache is not None:
+                entry["query_cache"] = {
+                    "entries": len(query_cache),
+                    **query_cache.stats.as_dict(),
+                }
+            report.append(entry)
+
+        return report
+
+
+EMBEDDING_MODELS = EmbeddingModelRegistry(
+    query_cache_size=settings.RAG_QUERY_CACHE_SIZE,
+    query_cache_dir=settings.RAG_QUERY_CACHE_DIR,
+)
+
+
+def get_embedding_model(
+    model_id: str,
+    device: str = "cpu",
+    normalize: bool = False,
+    backend: str = settings.RAG_EMBEDDING_BACKEND,
+    model_file: str | None = settings.RAG_EMBEDDING_MODEL_FILE,
+) -> LazyEmbeddings:
+    """Get the process-wide embedding model for `(model_id, device, normalize)`.
+
+    The backend and model file default to the configured ones, so ingestion and
+    every query embed with the same encoder and share one loaded copy of it.
+
+    Args:
+        model_id (str): The ID/name of the HuggingFace embedding model to use.
+        device (str): The compute device to run the model on (e.g. "cpu", "cuda").
+        normalize (bool): Whether embeddings are L2-normalized.
+        backend (str): sentence-transformers backend: "torch", "onnx" or "openvino".
+        model_file (str | None): Backend model file, e.g. a quantized ONNX export.
+
+    Returns:
+        LazyEmbeddings: A handle that loads the model on first use.
+    """
+
+    return EMBEDDING_MODELS.get(model_id, device, normalize, backend, model_file)
@@ -0,0 +1,788 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from loguru import logger
+
+from .bm25 import BM25Index
+
+try:
+    import hnswlib
+except Exception:
+    hnswlib = None
+
+INDEX_TYPES = ("auto", "flat", "ivf", "hnsw")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(
+    rows: np.ndarray, scores: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    if len(rows) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+        rows, scores = rows[best], scores[best]
+    order = np.argsort(-scores, kind="stable")
+
+    return rows[order], scores[order]
+
+
+def _exact_search(
+    vectors: np.ndarray, query: np.ndarray, k: int, mask: np.ndarray | None
+) -> tuple[np.ndarray, np.ndarray]:
+    if mask is None:
+        return _top_k(np.arange(len(vectors)), vectors @ query, k)
+
+    rows = np.flatnonzero(mask)
+    return _top_k(rows, vectors[rows] @ query, k)
+
+
+class FlatIndex:
+    """Exact cosine search: one matrix-vector product over the candidate rows.
+
+    `vectors` may be a contiguous slice of the store starting at row `offset`, e.g.
+    one partition. Masks and returned rows always use store rows.
+    """
+
+    kind = "flat"
+
+    def __init__(self, vectors: np.ndarray, offset: int = 0) -> None:
+        self.vectors = vectors
+        self.offset = offset
+
+    def search(
+        self, query: np.ndarray, k: int, mask: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if mask is not None:
+            mask = mask[self.offset : self.offset + len(self.vectors)]
+        rows, scores = _exact_search(self.vectors, query, k, mask)
+
+        return rows + self.offset, scores
+
+    def save(self, directory: Path) -> None:
+        pass
+
+
+class IVFIndex:
+    """Inverted-file index: spherical k-means lists, `nprobe` of them scanned per query.
+
+    Rows of a list are stored contiguously in `order`, so probing a list is a slice.
+    When a filter leaves fewer than `k` candidates in the probed lists, more lists are
+    probed until `k` are found or every list was scanned.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        centroids: np.ndarray,
+        order: np.ndarray,
+        offsets: np.ndarray,
+        nprobe: int = 8,
+    ) -> None:
+        self.vectors = vectors
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        rows: np.ndarray,
+        nlist: int | None = None,
+        nprobe: int = 8,
+        iterations: int = 10,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        rng = np.random.default_rng(seed)
+        nlist = max(1, min(nlist or int(np.sqrt(len(rows))), len(rows)))
+        sample = rows[rng.choice(len(rows), size=min(len(rows), nlist * 64), replace=False)]
+        centroids = vectors[rng.choice(sample, size=nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(vectors[sample] @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors[sample])
+            filled = np.bincount(assignment, minlength=nlist) > 0
+            centroids[filled] = _normalize(sums[filled])
+
+        assignment = np.concatenate(
+            [
+                np.argmax(vectors[rows[start : start + 65536]] @ centroids.T, axis=1)
+                for start in range(0, len(rows), 65536)
+            ]
+        )
+        order = rows[np.argsort(assignment, kind="stable")].astype(np.int64)
+        offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assignment, minlength=nlist))]
+        ).astype(np.int64)
+
+        return cls(vectors, centroids, order, offsets, nprobe=nprobe)
+
+    @classmethod
+    def load(cls, directory: Path, vectors: np.ndarray, nprobe: int = 8) -> "IVFIndex":
+        return cls(
+            vectors,
+            np.load(directory / "ivf_centroids.npy"),
+            np.load(directory / "ivf_order.npy", mmap_mode="r"),
+            np.load(directory / "ivf_offsets.npy"),
+            nprobe=nprobe,
+        )
+
+    def save(self, directory: Path) -> None:
+        np.save(directory / "ivf_centroids.npy", self.centroids)
+        np.save(directory / "ivf_order.npy", np.asarray(self.order))
+        np.save(directory / "ivf_offsets.npy", self.offsets)
+
+    def search(
+        self, query: np.ndarray, k: int, mask: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        ranked = np.argsort(-(self.centroids @ query))
+        probe = min(self.nprobe, len(ranked))
+        while True:
+            rows = np.concatenate(
+                [self.order[self.offsets[c] : self.offsets[c + 1]] for c in ranked[:probe]]
+            )
+            if mask is not None:
+                rows = rows[mask[rows]]
+            if len(rows) >= k or probe == len(ranked):
+                return _top_k(rows, self.vectors[rows] @ query, k)
+            probe = min(probe * 2, len(ranked))
+
+
+class HNSWIndex:
+    """Approximate search through an `hnswlib` graph over inner products.
+
+    Filters are applied during graph traversal. When a very selective filter makes
+    `hnswlib` give up, the query falls back to an exact scan of the candidates.
+    """
+
+    kind = "hnsw"
+
+    def __init__(self, vectors: np.ndarray, graph: Any, ef: int = 64) -> None:
+        self.vectors = vectors
+        self.graph = graph
+        self.ef = ef
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        rows: np.ndarray,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef: int = 64,
+    ) -> "HNSWIndex":
+        graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        graph.init_index(max_elements=len(rows), ef_construction=ef_construction, M=m)
+        graph.add_items(vectors[rows], rows)
+
+        return cls(vectors, graph, ef=ef)
+
+    @classmethod
+    def load(
+        cls, directory: Path, vectors: np.ndarray, count: int, ef: int = 64
+    ) -> "HNSWIndex":
+        graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        graph.load_index(str(directory / "hnsw.bin"), max_elements=count)
+
+        return cls(vectors, graph, ef=ef)
+
+    def save(self, directory: Path) -> None:
+        self.graph.save_index(str(directory / "hnsw.bin"))
+
+    def search(
+        self, query: np.ndarray, k: int, mask: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        candidates = self.graph.get_current_count() if mask is None else int(mask.sum())
+        k = min(k, candidates)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        self.graph.set_ef(max(self.ef, k))
+        try:
+            labels, distances = self.graph.knn_query(
+                query,
+                k=k,
+                filter=None if mask is None else (lambda label: bool(mask[label])),
+            )
+        except RuntimeError:
+            return _exact_search(self.vectors, query, k, mask)
+
+        return labels[0].astype(np.int64), 1.0 - distances[0]
+
+
+def _resolve_index_type(index_type: str, count: int, flat_max_vectors: int) -> str:
+    if index_type != "auto":
+        return index_type
+    if count <= flat_max_vectors:
+        return "flat"
+
+    return "hnsw" if hnswlib is not None else "ivf"
+
+
+class LocalVectorStore(VectorStore):
+    """In-process vector store persisted as a memory-mapped index directory.
+
+    It stands in for `MongoDBAtlasVectorSearch` when retrieval must work offline or
+    the corpus is small enough that a network round trip per query costs more than
+    the search itself. Vectors are L2-normalized float32 rows. Scores match Atlas
+    cosine scores, `(1 + cosine) / 2`.
+
+    The search structure depends on the corpus size. Up to `flat_max_vectors` rows
+    are scanned exactly with NumPy. Larger corpora use an HNSW graph when `hnswlib`
+    is installed, or a NumPy IVF index otherwise. `pre_filter` accepts the Atlas
+    syntax for metadata equality, e.g. `{"philosopher_id": {"$eq": "plato"}}` or
+    `{"philosopher_id": {"$in": [...]}}`.
+
+    Saving groups rows by `partition_field`, so each character's chunks are one
+    contiguous block. A filter naming a single partition value searches only that
+    block: a slice of the memmap when it is small, otherwise its own ANN index.
+    Other filters are applied as a row mask over the whole index.
+
+    A BM25 index over the same rows serves `keyword_search`. It is built and persisted
+    with the vectors on `save`, so hybrid retrieval needs no separate ingestion step.
+
+    Every `save` writes a new generation directory and then atomically switches
+    `manifest.json` to it. Readers in other processes pick the new generation up on
+    their next search. The store assumes a single writing process.
+
+    Args:
+        embedding (Embeddings): Encoder for texts and queries.
+        path (Path): Directory of the persisted index.
+        index_type (str): "auto", "flat", "ivf" or "hnsw".
+        flat_max_vectors (int): Largest corpus "auto" still searches exactly.
+        nprobe (int): IVF lists scanned per query.
+        ef (int): HNSW search breadth.
+        partition_field (str | None): Metadata field the rows are partitioned by.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        path: Path,
+        index_type: str = "auto",
+        flat_max_vectors: int = 20000,
+        nprobe: int = 8,
+        ef: int = 64,
+        partition_field: str | None = "philosopher_id",
+    ) -> None:
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+        if index_type == "hnsw" and hnswlib is None:
+            raise ImportError("The 'hnsw' index type requires the hnswlib package.")
+
+        self._embedding = embedding
+        self.path = Path(path)
+        self.index_type = index_type
+        self.flat_max_vectors = flat_max_vectors
+        self.nprobe = nprobe
+        self.ef = ef
+        self.partition_field = partition_field
+
+        self.run_id: str | None = None
+        self._lock = threading.RLock()
+        self._reset()
+        self._manifest_mtime: int | None = None
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return int(self._alive[: self._size].sum())
+
+    # --- Writes ---
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+
+        return self.add_embeddings(
+            texts, self._embedding.embed_documents(texts), metadatas=metadatas, ids=ids
+        )
+
+    def add_embeddings(
+        self,
+        texts: list[str],
+        embeddings: list[list[float]] | np.ndarray,
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+    ) -> list[str]:
+        """Insert precomputed vectors. Existing ids are replaced."""
+
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1))
+
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._vectors = np.empty((0, self._dim), dtype=np.float32)
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match the index ({self._dim})."
+                )
+
+            self._delete_rows([self._row_of[i] for i in ids if i in self._row_of])
+            self._reserve(self._size + len(ids))
+            rows = range(self._size, self._size + len(ids))
+            self._vectors[self._size : self._size + len(ids)] = vectors
+            self._alive[self._size : self._size + len(ids)] = True
+            for row, doc_id, text, metadata in zip(rows, ids, texts, metadatas):
+                self._row_of[doc_id] = row
+                self._ids.append(doc_id)
+                self._texts.append(text)
+                self._metadatas.append(dict(metadata))
+            self._size += len(ids)
+            self._changed()
+
+        return ids
+
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> bool:
+        with self._lock:
+            if ids is None:
+                self._reset()
+                self._changed()
+                return True
+
+            self._delete_rows([self._row_of[i] for i in ids if i in self._row_of])
+            self._changed()
+
+        return True
+
+    def save(self, run_id: str | None = None) -> None:
+        """Compact deleted rows, build the search index and persist a new generation.
+
+        Args:
+            run_id (str | None): Ingestion run that produced this content. The
+                previous run id is kept if None.
+        """
+
+        with self._lock:
+            if run_id is not None:
+                self.run_id = run_id
+            self._compact()
+            generation = f"{time.time_ns():x}"
+            directory = self.path / generation
+            directory.mkdir(parents=True, exist_ok=True)
+
+            vectors = np.ascontiguousarray(self._vectors[: self._size])
+            vectors.tofile(directory / "vectors.f32")
+            with (directory / "documents.jsonl").open("w", encoding="utf-8") as f:
+                for doc_id, text, metadata in zip(self._ids, self._texts, self._metadatas):
+                    f.write(json.dumps({"id": doc_id, "text": text, "metadata": metadata}))
+                    f.write("\n")
+
+            index = self._search_index()
+            if index is not None:
+                index.save(directory)
+            keyword_index = self._keyword_index()
+            if keyword_index is not None:
+                keyword_index.save(directory)
+
+            manifest = {
+                "generation": generation,
+                "run_id": self.run_id,
+                "count": self._size,
+                "dim": self._dim,
+                "index": index.kind if index is not None else None,
+                "bm25": keyword_index is not None,
+                "partition_field": self.partition_field,
+                "partitions": [
+                    [value, start, end] for value, (start, end) in (self._partitions or {}).items()
+                ],
+            }
+            manifest_path = self.path / "manifest.json"
+            tmp_path = manifest_path.with_suffix(".json.tmp")
+            tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+            os.replace(tmp_path, manifest_path)
+            self._manifest_mtime = manifest_path.stat().st_mtime_ns
+            self._dirty = False
+
+            # Readers holding a memmap of an older generation keep their open files.
+            for old in self.path.iterdir():
+                if old.is_dir() and old.name != generation:
+                    shutil.rmtree(old, ignore_errors=True)
+
+        logger.info(
+            f"Saved local vector index {self.path} ({self._size} vectors, {manifest['index']})"
+        )
+
+    # --- Reads ---
+
+    def current_run_id(self) -> str | None:
+        with self._lock:
+            self._maybe_reload()
+            return self.run_id
+
+    def where(self, pre_filter: dict | None = None) -> list[tuple[str, dict]]:
+        """Return `(id, metadata)` of every stored document matching `pre_filter`."""
+
+        with self._lock:
+            self._maybe_reload()
+            mask = self._mask(pre_filter)
+            rows = np.flatnonzero(mask) if mask is not None else np.arange(self._size)
+
+            return [(self._ids[row], self._metadatas[row]) for row in rows]
+
+    def get_by_ids(self, ids: list[str], /) -> list[Document]:
+        with self._lock:
+            self._maybe_reload()
+            return [self._document(self._row_of[i]) for i in ids if i in self._row_of]
+
+    def similarity_search(
+        self, query: str, k: int = 4, pre_filter: dict | None = None, **kwargs: Any
+    ) -> list[Document]:
+        return [
+            document
+            for document, _ in self.similarity_search_with_score(
+                query, k=k, pre_filter=pre_filter
+            )
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, pre_filter: dict | None = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self._embedding.embed_query(query), k=k, pre_filter=pre_filter
+        )
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, pre_filter: dict | None = None, **kwargs: Any
+    ) -> list[Document]:
+        return [
+            document
+            for document, _ in self.similarity_search_by_vector_with_score(
+                embedding, k=k, pre_filter=pre_filter
+            )
+        ]
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: list[float], k: int = 4, pre_filter: dict | None = None
+    ) -> list[tuple[Document, float]]:
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        with self._lock:
+            self._maybe_reload()
+            if self._size == 0 or k <= 0:
+                return []
+
+            found = self._partition_search(query, k, pre_filter)
+            if found is None:
+                found = self._search_index().search(query, k, self._mask(pre_filter))
+            rows, scores = found
+
+            return [
+                (self._document(int(row)), float((1.0 + score) / 2.0))
+                for row, score in zip(rows, scores)
+            ]
+
+    def keyword_search(
+        self, query: str, k: int = 4, pre_filter: dict | None = None
+    ) -> list[Document]:
+        return [
+            document
+            for document, _ in self.keyword_search_with_score(query, k=k, pre_filter=pre_filter)
+        ]
+
+    def keyword_search_with_score(
+        self, query: str, k: int = 4, pre_filter: dict | None = None
+    ) -> list[tuple[Document, float]]:
+        """Rank documents by BM25 score of `query`. Documents without a query term are left out."""
+
+        with self._lock:
+            self._maybe_reload()
+            if self._size == 0 or k <= 0:
+                return []
+
+            rows, scores = self._keyword_index().search(query, k, self._mask(pre_filter))
+
+            return [
+                (self._document(int(row)), float(score)) for row, score in zip(rows, scores)
+            ]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        path: Path | None = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        if path is None:
+            raise ValueError("LocalVectorStore.from_texts requires a 'path'.")
+
+        store = cls(embedding=embedding, path=path, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        store.save()
+
+        return store
+
+    # --- Internals ---
+
+    def _reset(self) -> None:
+        self._dim: int | None = None
+        self._vectors: np.ndarray = np.empty((0, 0), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._metadatas: list[dict] = []
+        self._row_of: dict[str, int] = {}
+        self._index: Any = None
+        self._bm25: BM25Index | None = None
+        self._partitions: dict[Any, tuple[int, int]] | None = None
+        self._partition_indexes: dict[Any, Any] = {}
+        self._columns: dict[str, tuple[np.ndarray, dict[Any, int]]] = {}
+        self._dirty = False
+
+    def _changed(self) -> None:
+        self._index = None
+        self._bm25 = None
+        self._partitions = None
+        self._partition_indexes = {}
+        self._columns = {}
+        self._dirty = True
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._alive)
+        if size <= capacity and self._vectors.flags.writeable:
+            return
+
+        # A loaded memmap is read-only; the first write copies it into a growable buffer.
+        capacity = max(size, 2 * capacity, 1024)
+        vectors = np.empty((capacity, self._dim), dtype=np.float32)
+        vectors[: self._size] = self._vectors[: self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+        self._vectors, self._alive = vectors, alive
+
+    def _delete_rows(self, rows: list[int]) -> None:
+        if not rows:
+            return
+
+        for row in rows:
+            self._alive[row] = False
+            del self._row_of[self._ids[row]]
+
+    def _compact(self) -> None:
+        """Drop deleted rows and group the remaining ones by partition value."""
+
+        keep = np.flatnonzero(self._alive[: self._size])
+        if self.partition_field is not None:
+            codes, vocabulary = self._column(self.partition_field)
+            keep = keep[np.argsort(codes[keep], kind="stable")]
+            partitions = {}
+            for value, code in vocabulary.items():
+                start, end = np.searchsorted(codes[keep], [code, code + 1])
+                if end > start:
+                    partitions[value] = (int(start), int(end))
+        if len(keep) == self._size and np.array_equal(keep, np.arange(self._size)):
+            if self.partition_field is not None:
+                self._partitions = partitions
+            return
+
+        self._vectors = self._vectors[keep]
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._ids = [self._ids[row] for row in keep]
+        self._texts = [self._texts[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._size = len(keep)
+        self._changed()
+        if self.partition_field is not None:
+            self._partitions = partitions
+
+    def _search_index(self) -> Any:
+        if self._index is not None or self._size == 0:
+            return self._index
+
+        vectors = self._vectors[: self._size]
+        kind = _resolve_index_type(self.index_type, self._size, self.flat_max_vectors)
+        rows = np.flatnonzero(self._alive[: self._size])
+        started = time.perf_counter()
+        if kind == "hnsw":
+            self._index = HNSWIndex.build(vectors, rows, ef=self.ef)
+        elif kind == "ivf":
+            self._index = IVFIndex.build(vectors, rows, nprobe=self.nprobe)
+        else:
+            self._index = FlatIndex(vectors)
+        if kind != "flat":
+            logger.info(
+                f"Built {kind} index over {len(rows)} vectors in {time.perf_counter() - started:.1f}s"
+            )
+
+        return self._index
+
+    def _partition_search(
+        self, query: np.ndarray, k: int, pre_filter: dict | None
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        """Search one partition, or return None if `pre_filter` does not name exactly one."""
+
+        if self._partitions is None or not pre_filter or self.partition_field not in pre_filter:
+            return None
+
+        condition = pre_filter[self.partition_field]
+        if isinstance(condition, dict):
+            if set(condition) != {"$eq"}:
+                return None
+            condition = condition["$eq"]
+        span = self._partitions.get(condition)
+        if span is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        start, end = span
+        rest = {f: c for f, c in pre_filter.items() if f != self.partition_field}
+        mask = None
+        if rest:
+            mask = np.zeros(self._size, dtype=bool)
+            mask[start:end] = self._mask(rest)[start:end]
+
+        return self._partition_index(condition, start, end).search(query, k, mask)
+
+    def _partition_index(self, value: Any, start: int, end: int) -> Any:
+        index = self._partition_indexes.get(value)
+        if index is None:
+            kind = _resolve_index_type(self.index_type, end - start, self.flat_max_vectors)
+            rows = np.arange(start, end)
+            if kind == "hnsw":
+                index = HNSWIndex.build(self._vectors, rows, ef=self.ef)
+            elif kind == "ivf":
+                index = IVFIndex.build(self._vectors, rows, nprobe=self.nprobe)
+            else:
+                index = FlatIndex(self._vectors[start:end], offset=start)
+            self._partition_indexes[value] = index
+
+        return index
+
+    def _keyword_index(self) -> BM25Index | None:
+        if self._bm25 is None and self._size > 0:
+            started = time.perf_counter()
+            self._bm25 = BM25Index.build(self._texts)
+            logger.info(
+                f"Built BM25 index over {self._size} documents in {time.perf_counter() - started:.1f}s"
+            )
+
+        return self._bm25
+
+    def _mask(self, pre_filter: dict | None) -> np.ndarray | None:
+        alive = self._alive[: self._size]
+        mask = None if alive.all() else alive.copy()
+        for field, condition in (pre_filter or {}).items():
+            if isinstance(condition, dict):
+                if set(condition) - {"$eq", "$in"}:
+                    raise ValueError(f"Unsupported filter on '{field}': {condition}")
+                values = list(condition.get("$in", [])) + (
+                    [condition["$eq"]] if "$eq" in condition else []
+                )
+            else:
+                values = [condition]
+
+            codes, vocabulary = self._column(field)
+            wanted = [vocabulary[v] for v in values if v in vocabulary]
+            matches = np.isin(codes, wanted)
+            mask = matches if mask is None else mask & matches
+
+        return mask
+
+    def _column(self, field: str) -> tuple[np.ndarray, dict[Any, int]]:
+        column = self._columns.get(field)
+        if column is None:
+            vocabulary: dict[Any, int] = {}
+            codes = np.fromiter(
+                (
+                    vocabulary.setdefault(metadata.get(field), len(vocabulary))
+                    for metadata in self._metadatas
+                ),
+                dtype=np.int32,
+                count=self._size,
+            )
+            column = self._columns[field] = (codes, vocabulary)
+
+        return column
+
+    def _document(self, row: int) -> Document:
+        return Document(
+            id=self._ids[row], page_content=self._texts[row], metadata=self._metadatas[row]
+        )
+
+    def _load(self) -> None:
+        manifest_path = self.path / "manifest.json"
+        if not manifest_path.exists():
+            return
+
+        mtime = manifest_path.stat().st_mtime_ns
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        directory = self.path / manifest["generation"]
+        self._reset()
+        if manifest["count"]:
+            self._dim = manifest["dim"]
+            self._vectors = np.memmap(
+                directory / "vectors.f32", dtype=np.float32, mode="r"
+            ).reshape(-1, self._dim)
+            self._size = manifest["count"]
+            self._alive = np.ones(self._size, dtype=bool)
+            with (directory / "documents.jsonl").open(encoding="utf-8") as f:
+                for row, line in enumerate(f):
+                    record = json.loads(line)
+                    self._ids.append(record["id"])
+                    self._texts.append(record["text"])
+                    self._metadatas.append(record["metadata"])
+                    self._row_of[record["id"]] = row
+
+            if manifest["index"] == "ivf":
+                self._index = IVFIndex.load(directory, self._vectors, nprobe=self.nprobe)
+            elif manifest["index"] == "hnsw" and hnswlib is not None:
+                self._index = HNSWIndex.load(directory, self._vectors, self._size, ef=self.ef)
+            elif manifest["index"] == "flat":
+                self._index = FlatIndex(self._vectors)
+            if manifest.get("bm25"):
+                self._bm25 = BM25Index.load(directory)
+            if manifest.get("partition_field") == self.partition_field and self.partition_field:
+                self._partitions = {
+                    value: (start, end) for value, start, end in manifest["partitions"]
+                }
+        self.run_id = manifest.get("run_id")
+        self._manifest_mtime = mtime
+
+    def _maybe_reload(self) -> None:
+        if self._dirty:
+            return
+
+        try:
+            mtime = (self.path / "manifest.json").stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._manifest_mtime:
+            self._load()
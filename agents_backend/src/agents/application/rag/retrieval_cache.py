@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from langchain_core.documents import Document
+
+from .embedding_cache import normalize_query
+
+CacheKey = tuple[str, str, int]
+
+
+@dataclass
+class RetrievalCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class RetrievalCache:
+    """LRU cache of retrieval results.
+
+    Entries are keyed by `(character, normalized query, k)` and hold the retrieved
+    documents, so a repeated question skips the vector store.
+
+    Entries belong to one ingestion run. `run_id` is polled at most every
+    `check_interval_seconds`, and when it changes, everything cached is dropped.
+
+    Args:
+        run_id (Callable[[], str | None]): Returns the id of the last ingestion run.
+        max_entries (int): Maximum cached results.
+        check_interval_seconds (float): Minimum time between two `run_id` polls.
+        clock (Callable[[], float]): Monotonic clock in seconds.
+    """
+
+    def __init__(
+        self,
+        run_id: Callable[[], str | None],
+        max_entries: int = 1024,
+        check_interval_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.run_id = run_id
+        self.max_entries = max_entries
+        self.check_interval_seconds = check_interval_seconds
+        self.stats = RetrievalCacheStats()
+        self._clock = clock
+        self._results: OrderedDict[CacheKey, list[Document]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._run: str | None = None
+        self._checked_at = float("-inf")
+
+    @staticmethod
+    def key(character_id: str | None, query: str, k: int) -> CacheKey:
+        return (character_id or "", normalize_query(query), k)
+
+    def results(
+        self,
+        character_id: str | None,
+        query: str,
+        k: int,
+        search: Callable[[], list[Document]],
+    ) -> list[Document]:
+        """Return cached documents for the key, or run `search` and cache them."""
+
+        key = self.key(character_id, query, k)
+        documents = self._get(key)
+        if documents is None:
+            documents = search()
+            self._put(key, documents)
+
+        return list(documents)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def _get(self, key: CacheKey) -> list[Document] | None:
+        self._check_run()
+        with self._lock:
+            documents = self._results.get(key)
+            if documents is None:
+                self.stats.misses += 1
+                return None
+
+            self._results.move_to_end(key)
+            self.stats.hits += 1
+
+            return documents
+
+    def _put(self, key: CacheKey, documents: list[Document]) -> None:
+        with self._lock:
+            self._results[key] = documents
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def _check_run(self) -> None:
+        now = self._clock()
+        with self._lock:
+            if now - self._checked_at < self.check_interval_seconds:
+                return
+            self._checked_at = now
+
+        # Polled outside the lock: it may be a database round trip.
+        run = self.run_id()
+        with self._lock:
+            if run != self._run:
+                if self._results:
+                    self.stats.invalidations += 1
+                self._results.clear()
+                self._run = run
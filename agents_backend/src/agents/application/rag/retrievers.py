@@ -1,35 +1,197 @@
+import threading
+from datetime import datetime, timezone
 from typing import Any
 
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
 from langchain_mongodb import MongoDBAtlasVectorSearch
 
 from agents.config import settings
+from agents.infrastructure.mongo import get_client_registry
+
+from .embeddings import get_embedding_model
+from .local_index import LocalVectorStore
 
 
 class Retriever:
-    def __init__(self, vectorstore: MongoDBAtlasVectorSearch, top_k: int = 3) -> None:
+    def __init__(self, vectorstore: VectorStore, top_k: int = 3) -> None:
         self.vectorstore = vectorstore
         self.top_k = top_k
         self.search_index_name = "vector_index"
 
-    def invoke(self, query: str) -> list[Any]:
-        return self.vectorstore.similarity_search(query, k=self.top_k)
-
-
-def get_retriever(embedding_model_id: str, k: int, device: str = "cpu") -> Retriever:
-    embedding_model = HuggingFaceEmbeddings(
-        model_name=embedding_model_id,
-        model_kwargs={"device": device},
-    )
-
-    vectorstore = MongoDBAtlasVectorSearch.from_connection_string(
-        connection_string=settings.MONGO_URI,
-        namespace=(
-            settings.MONGO_DB_NAME,
-            settings.MONGO_LONG_TERM_MEMORY_COLLECTION,
-        ),
-        embedding=embedding_model,
-        index_name="vector_index",
-    )
+    @property
+    def is_local(self) -> bool:
+        return isinstance(self.vectorstore, LocalVectorStore)
+
+    def ingestion_run_id(self) -> str | None:
+        """Return the id of the last ingestion run that changed this collection."""
+
+        if self.is_local:
+            return self.vectorstore.current_run_id()
+
+        collection = self.vectorstore.collection
+        run = collection.database[settings.MONGO_INGESTION_RUNS_COLLECTION].find_one(
+            {"_id": collection.name}
+        )
+
+        return run["run_id"] if run else None
+
+    def record_ingestion_run(self, run_id: str) -> None:
+        if self.is_local:
+            self.vectorstore.save(run_id=run_id)
+            return
+
+        collection = self.vectorstore.collection
+        collection.database[settings.MONGO_INGESTION_RUNS_COLLECTION].update_one(
+            {"_id": collection.name},
+            {"$set": {"run_id": run_id, "finished_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+
+    def invoke(self, query: str, pre_filter: dict | None = None) -> list[Any]:
+        if pre_filter is None:
+            return self.vectorstore.similarity_search(query, k=self.top_k)
+
+        return self.vectorstore.similarity_search(
+            query, k=self.top_k, pre_filter=pre_filter
+        )
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[Document]], weights: list[float], k: int = 50
+) -> list[Document]:
+    """Fuse rankings by weighted reciprocal rank: `sum(weight / (k + rank))` per document.
+
+    Args:
+        rankings (list[list[Document]]): Result lists, best first.
+        weights (list[float]): Weight of each ranking.
+        k (int): Rank offset. Larger values flatten the gap between top and lower ranks.
+
+    Returns:
+        list[Document]: Every ranked document once, by descending fused score.
+    """
+
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, document in enumerate(ranking, start=1):
+            key = document.id or document.page_content
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+            documents.setdefault(key, document)
+
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class HybridRetriever(Retriever):
+    """BM25 and vector search over a local store, fused with reciprocal rank fusion.
+
+    Both searches return `candidates` documents, which are fused and cut to
+    `top_k`. The weights trade exact term matches (names, titles, coined terms)
+    against paraphrase matches. With equal weights and `rrf_k=50`, it mirrors the
+    fixed penalties of the Atlas hybrid retriever.
+
+    Args:
+        vectorstore (LocalVectorStore): Store holding both indexes.
+        top_k (int): Number of documents returned.
+        vector_weight (float): Weight of the vector ranking.
+        fulltext_weight (float): Weight of the BM25 ranking.
+        rrf_k (int): Reciprocal rank fusion offset.
+        candidates (int): Documents taken from each ranking before fusion.
+    """
+
+    def __init__(
+        self,
+        vectorstore: LocalVectorStore,
+        top_k: int = 3,
+        vector_weight: float = 1.0,
+        fulltext_weight: float = 1.0,
+        rrf_k: int = 50,
+        candidates: int = 20,
+    ) -> None:
+        super().__init__(vectorstore=vectorstore, top_k=top_k)
+        self.vector_weight = vector_weight
+        self.fulltext_weight = fulltext_weight
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+
+    def invoke(self, query: str, pre_filter: dict | None = None) -> list[Any]:
+        n = max(self.candidates, self.top_k)
+        rankings = [
+            self.vectorstore.similarity_search(query, k=n, pre_filter=pre_filter),
+            self.vectorstore.keyword_search(query, k=n, pre_filter=pre_filter),
+        ]
+        fused = reciprocal_rank_fusion(
+            rankings, [self.vector_weight, self.fulltext_weight], k=self.rrf_k
+        )
+
+        return fused[: self.top_k]
+
+
+_local_stores: dict[str, LocalVectorStore] = {}
+_local_stores_lock = threading.Lock()
+
+
+def get_local_vector_store(
+    collection_name: str,
+    embedding_model: Embeddings,
+    partition_field: str | None = "philosopher_id",
+) -> LocalVectorStore:
+    """Get the process-wide local vector store of a collection.
+
+    Writers and readers in one process share the instance, so searches see
+    ingested documents without reloading from disk.
+    """
+
+    with _local_stores_lock:
+        store = _local_stores.get(collection_name)
+        if store is None:
+            store = _local_stores[collection_name] = LocalVectorStore(
+                embedding=embedding_model,
+                path=settings.RAG_LOCAL_INDEX_DIR / collection_name,
+                index_type=settings.RAG_LOCAL_INDEX_TYPE,
+                flat_max_vectors=settings.RAG_LOCAL_FLAT_MAX_VECTORS,
+                partition_field=partition_field,
+            )
+
+    return store
+
+
+def get_retriever(
+    embedding_model_id: str,
+    k: int,
+    device: str = "cpu",
+    collection_name: str = settings.MONGO_LONG_TERM_MEMORY_COLLECTION,
+    backend: str = settings.RAG_VECTOR_BACKEND,
+    hybrid: bool = False,
+    partition_field: str | None = "philosopher_id",
+) -> Retriever:
+    embedding_model = get_embedding_model(embedding_model_id, device)
+
+    if backend == "local":
+        vectorstore = get_local_vector_store(
+            collection_name, embedding_model, partition_field=partition_field
+        )
+        if hybrid:
+            return HybridRetriever(
+                vectorstore,
+                top_k=k,
+                vector_weight=settings.RAG_HYBRID_VECTOR_WEIGHT,
+                fulltext_weight=settings.RAG_HYBRID_FULLTEXT_WEIGHT,
+                rrf_k=settings.RAG_HYBRID_RRF_K,
+                candidates=settings.RAG_HYBRID_CANDIDATES,
+            )
+    elif hybrid:
+        raise ValueError("Hybrid search is only available with the local vector backend.")
+    elif backend == "atlas":
+        vectorstore = MongoDBAtlasVectorSearch(
+            collection=get_client_registry().collection(
+                collection_name, settings.MONGO_DB_NAME, settings.MONGO_URI
+            ),
+            embedding=embedding_model,
+            index_name="vector_index",
+        )
+    else:
+        raise ValueError(f"Unknown vector backend '{backend}', expected 'atlas' or 'local'.")
 
     return Retriever(vectorstore=vectorstore, top_k=k)
@@ -1,11 +1,153 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import hashlib
+from collections import deque
+from typing import Any, Iterable, Iterator
 
+from langchain_core.documents import Document
 
-Splitter = RecursiveCharacterTextSplitter
+DEFAULT_SEPARATORS = ("\n\n", "\n", ". ", " ")
 
 
-def get_splitter(chunk_size: int) -> Splitter:
-    return RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=0,
-    )
+class TokenSplitter:
+    """Split documents lazily into chunks of at most `chunk_size` tokenizer tokens.
+
+    Text is cut at the coarsest separator that gives pieces within budget:
+    paragraphs, then lines, sentences and words. A word longer than the budget is
+    cut at token boundaries. Pieces are packed greedily into chunks, and the last
+    pieces of a chunk, up to `chunk_overlap` tokens, also start the next one.
+
+    Pieces are scanned with `str.find` and chunks are yielded as soon as they are
+    full, so memory does not grow with document size. Token counts are summed per
+    piece, which matches the count of the joined text for word-piece tokenizers,
+    as they never merge tokens across whitespace.
+
+    Every chunk gets a `start_index` (character offset in its document) and a
+    `chunk_id` hashed from its source and text, stable across runs.
+
+    Args:
+        tokenizer (Any): Hugging Face tokenizer of the embedding model.
+        chunk_size (int): Maximum tokens per chunk, special tokens excluded.
+        chunk_overlap (int): Maximum tokens repeated from the previous chunk.
+        separators (tuple[str, ...]): Separators, from coarsest to finest.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Any,
+        chunk_size: int = 128,
+        chunk_overlap: int = 16,
+        separators: tuple[str, ...] = DEFAULT_SEPARATORS,
+    ) -> None:
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError(
+                f"chunk_overlap ({chunk_overlap}) must be between 0 and chunk_size ({chunk_size})."
+            )
+
+        self.tokenizer = tokenizer
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"])
+
+    def iter_split(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Yield the chunks of `documents` one at a time, in order."""
+
+        for document in documents:
+            source = str(document.metadata.get("source", ""))
+            for start, text in self._chunks(document.page_content):
+                chunk_id = hashlib.sha256(f"{source}\0{text}".encode("utf-8")).hexdigest()[:32]
+                yield Document(
+                    page_content=text,
+                    metadata={**document.metadata, "start_index": start, "chunk_id": chunk_id},
+                )
+
+    def split_documents(self, documents: Iterable[Document]) -> list[Document]:
+        return list(self.iter_split(documents))
+
+    def split_text(self, text: str) -> list[str]:
+        return [chunk for _, chunk in self._chunks(text)]
+
+    def _chunks(self, text: str) -> Iterator[tuple[int, str]]:
+        window: deque[tuple[int, int, int]] = deque()
+        tokens = 0
+        emitted_end = 0
+        for piece in self._pieces(text, 0, len(text), 0):
+            if window and tokens + piece[2] > self.chunk_size:
+                yield from self._chunk(text, window[0][0], window[-1][1])
+                emitted_end = window[-1][1]
+                while window and (
+                    tokens > self.chunk_overlap or tokens + piece[2] > self.chunk_size
+                ):
+                    tokens -= window.popleft()[2]
+            window.append(piece)
+            tokens += piece[2]
+
+        if window and window[-1][1] > emitted_end:
+            yield from self._chunk(text, window[0][0], window[-1][1])
+
+    def _chunk(self, text: str, start: int, end: int) -> Iterator[tuple[int, str]]:
+        chunk = text[start:end]
+        stripped = chunk.lstrip()
+        if stripped.strip():
+            yield start + len(chunk) - len(stripped), stripped.rstrip()
+
+    def _pieces(
+        self, text: str, start: int, end: int, level: int
+    ) -> Iterator[tuple[int, int, int]]:
+        """Yield `(start, end, tokens)` of consecutive pieces of `text[start:end]`
+        of at most `chunk_size` tokens, each ending with its separator.
+        """
+
+        if level == len(self.separators):
+            yield from self._token_pieces(text, start, end)
+            return
+
+        separator = self.separators[level]
+        position = start
+        while position < end:
+            index = text.find(separator, position, end)
+            piece_end = end if index == -1 else index + len(separator)
+            tokens = self.count_tokens(text[position:piece_end])
+            if tokens <= self.chunk_size:
+                yield position, piece_end, tokens
+            else:
+                yield from self._pieces(text, position, piece_end, level + 1)
+            position = piece_end
+
+    def _token_pieces(self, text: str, start: int, end: int) -> Iterator[tuple[int, int, int]]:
+        offsets = self.tokenizer(
+            text[start:end], add_special_tokens=False, return_offsets_mapping=True, verbose=False
+        )["offset_mapping"]
+        for first in range(0, len(offsets), self.chunk_size):
+            window = offsets[first : first + self.chunk_size]
+            piece_start = start if first == 0 else start + window[0][0]
+            piece_end = (
+                end
+                if first + self.chunk_size >= len(offsets)
+                else start + offsets[first + self.chunk_size][0]
+            )
+            yield piece_start, piece_end, len(window)
+
+
+Splitter = TokenSplitter
+
+
+def get_splitter(
+    chunk_size: int, chunk_overlap: int = 0, model_id: str | None = None
+) -> Splitter:
+    """Return a splitter counting tokens with the tokenizer of the embedding model `model_id`.
+
+    Args:
+        chunk_size (int): Maximum tokens per chunk.
+        chunk_overlap (int): Maximum tokens repeated from the previous chunk.
+        model_id (str | None): Hugging Face model id. Defaults to `RAG_TEXT_EMBEDDING_MODEL_ID`.
+    """
+
+    from transformers import AutoTokenizer
+
+    from agents.config import settings
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id or settings.RAG_TEXT_EMBEDDING_MODEL_ID)
+
+    return TokenSplitter(tokenizer, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
@@ -26,6 +26,21 @@ class Settings(BaseSettings):
     MONGO_STATE_CHECKPOINT_COLLECTION: str = "philosopher_state_checkpoints"
     MONGO_STATE_WRITES_COLLECTION: str = "philosopher_state_writes"
     MONGO_LONG_TERM_MEMORY_COLLECTION: str = "philosopher_long_term_memory"
+    MONGO_INTERACTION_MEMORY_COLLECTION: str = "character_interaction_memory"
+    MONGO_INGESTION_RUNS_COLLECTION: str = "ingestion_runs"
+    MONGO_MAX_POOL_SIZE: int = Field(
+        default=100, description="Maximum pooled connections per MongoDB server, shared by the process."
+    )
+    MONGO_MIN_POOL_SIZE: int = Field(
+        default=0, description="Pooled connections kept open per MongoDB server, even when idle."
+    )
+    MONGO_MAX_IDLE_TIME_MS: int | None = Field(
+        default=None, description="Idle time after which a pooled connection is closed. Never if unset."
+    )
+    MONGO_COMPRESSORS: str = Field(
+        default="",
+        description='Comma-separated wire compressors, e.g. "zstd,zlib". No compression if empty.',
+    )
 
     # --- Comet ML & Opik Configuration ---
     COMET_API_KEY: str | None = Field(
@@ -45,11 +60,122 @@ class Settings(BaseSettings):
     RAG_TEXT_EMBEDDING_MODEL_DIM: int = 384
     RAG_TOP_K: int = 3
     RAG_DEVICE: str = "cpu"
-    RAG_CHUNK_SIZE: int = 256
+    RAG_CHUNK_SIZE: int = Field(
+        default=128,
+        description="Maximum tokens per chunk, counted with the embedding model's tokenizer.",
+    )
+    RAG_CHUNK_OVERLAP: int = Field(
+        default=16,
+        description="Maximum tokens a chunk repeats from the end of the previous one.",
+    )
+    RAG_EMBEDDING_BATCH_SIZE: int = 64
+    RAG_EMBEDDING_TORCH_THREADS: int = 0
+    RAG_EMBEDDING_BACKEND: str = Field(
+        default="torch",
+        description="sentence-transformers backend used for ingestion and queries: torch, onnx or openvino.",
+    )
+    RAG_EMBEDDING_MODEL_FILE: str | None = Field(
+        default=None,
+        description="Backend model file, e.g. onnx/model_qint8_avx512.onnx for a quantized encoder.",
+    )
+    RAG_INGESTION_QUEUE_SIZE: int = 4
+    RAG_QUERY_CACHE_SIZE: int = 4096
+    RAG_QUERY_CACHE_DIR: Path | None = Field(
+        default=None,
+        description="Directory of the persistent query embedding cache. Memory only if unset.",
+    )
+    RAG_VECTOR_BACKEND: str = Field(
+        default="atlas",
+        description='Vector store behind retrieval: "atlas" (MongoDB Atlas Vector Search) or "local" (in-process index).',
+    )
+    RAG_LOCAL_INDEX_DIR: Path = Path("data/vector_index")
+    RAG_LOCAL_INDEX_TYPE: str = Field(
+        default="auto",
+        description='Local index structure: "auto", "flat", "ivf" or "hnsw".',
+    )
+    RAG_LOCAL_FLAT_MAX_VECTORS: int = 20000
+    RAG_HYBRID_SEARCH: bool = Field(
+        default=False,
+        description="Fuse BM25 and vector rankings of the local backend with reciprocal rank fusion.",
+    )
+    RAG_HYBRID_VECTOR_WEIGHT: float = 1.0
+    RAG_HYBRID_FULLTEXT_WEIGHT: float = 1.0
+    RAG_HYBRID_RRF_K: int = 50
+    RAG_HYBRID_CANDIDATES: int = 20
+    RAG_DEDUP_INDEX: bool = Field(
+        default=True,
+        description="Check new chunks against a persistent MinHash index of every stored chunk before embedding them.",
+    )
+    RAG_DEDUP_INDEX_DIR: Path = Path("data/dedup_index")
+    RAG_DEDUP_SCOPE: str = Field(
+        default="character",
+        description=(
+            "'character' drops chunks already stored for the same character. 'global' also drops those stored "
+            "for any other character, which hides them from that character's scoped retrieval."
+        ),
+    )
+    RAG_RESULT_CACHE_SIZE: int = Field(
+        default=1024,
+        description="Retrieval results cached per (character, query, k). 0 disables the cache.",
+    )
+    RAG_RESULT_CACHE_RUN_CHECK_SECONDS: float = 30.0
+
+    # --- Long-Term Memory Recall Configuration ---
+    LONG_TERM_MEMORY_RECALL: bool = Field(
+        default=False,
+        description="Retrieve the active philosopher's long-term memory chunks into each reply's prompt.",
+    )
+    LONG_TERM_MEMORY_TIMEOUT_SECONDS: float = 0.5
+
+    # --- Semantic Response Cache Configuration ---
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_CHARACTERS: list[str] = Field(
+        default_factory=list,
+        description="Characters whose replies are cached, as a JSON list. All characters if empty.",
+    )
+    SEMANTIC_CACHE_THRESHOLD: float = Field(
+        default=0.92,
+        description="Minimum cosine similarity between a question and a cached one to reuse its reply.",
+    )
+    SEMANTIC_CACHE_TTL_SECONDS: float = 24 * 3600
+    SEMANTIC_CACHE_MAX_ENTRIES_PER_CHARACTER: int = 512
+    SEMANTIC_CACHE_MAX_STATE_MESSAGES: int = Field(
+        default=1,
+        description="Replies are served from and stored in the cache only while the state holds at most this many messages and no summary.",
+    )
+
+    # --- Interaction Memory Configuration ---
+    INTERACTION_MEMORY_TOP_K: int = 3
+    INTERACTION_MEMORY_TIMEOUT_SECONDS: float = Field(
+        default=0.5,
+        description="Upper bound on the time a reply waits for recalled interactions.",
+    )
+    INTERACTION_MEMORY_LINES_PER_CHUNK: int = 6
+    INTERACTION_MEMORY_BATCH_SIZE: int = 64
+
+    # --- Extraction Configuration ---
+    EXTRACTION_CACHE_DIR: Path = Field(
+        default=Path("data/http_cache"),
+        description="On-disk cache of fetched pages, revalidated with conditional requests.",
+    )
+    EXTRACTION_OFFLINE: bool = Field(
+        default=False,
+        description="Replay pages from EXTRACTION_CACHE_DIR without network access, e.g. for tests and benchmarks.",
+    )
+    EXTRACTION_CONCURRENCY: int = Field(
+        default=4,
+        description="Philosophers whose pages are fetched at once.",
+    )
+    EXTRACTION_PER_HOST_LIMIT: int = 2
+    EXTRACTION_TIMEOUT_SECONDS: float = 30.0
 
     # --- Paths Configuration ---
     EVALUATION_DATASET_FILE_PATH: Path = Path("data/evaluation_dataset.json")
     EXTRACTION_METADATA_FILE_PATH: Path = Path("data/extraction_metadata.json")
+    CALL_TRANSCRIPTS_DIR_PATH: Path = Path("data/call_transcripts")
+    TRANSCRIPT_INGESTION_STATE_FILE_PATH: Path = Path(
+        "data/transcript_ingestion_state.json"
+    )
 
 
 settings = Settings()
@@ -47,7 +47,20 @@ Summary of conversation earlier between {{philosopher_name}} and the user:
 {{summary}}
 
 ---
+{% if philosopher_context %}
+What you know about yourself and your work that is relevant right now:
 
+{{philosopher_context}}
+
+---
+{% endif %}
+{% if interaction_memory %}
+Things you remember from earlier conversations with players:
+
+{{interaction_memory}}
+
+---
+{% endif %}
 The conversation between {{philosopher_name}} and the user starts now.
 """
 
@@ -1,8 +1,10 @@
+import asyncio
 from contextlib import asynccontextmanager
 import os
 
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from loguru import logger
 from pydantic import BaseModel
 
 from .rewards_service import rewards_service
@@ -12,9 +14,25 @@ from .token_server import token_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handles startup and shutdown events for the API."""
-    # Startup code (if any) goes here
+    try:
+        from agents.application.rag import EMBEDDING_MODELS
+        from agents.config import settings
+
+        # Load the shared embedding model before the first chat turn needs it.
+        await asyncio.to_thread(
+            EMBEDDING_MODELS.warm_up,
+            settings.RAG_TEXT_EMBEDDING_MODEL_ID,
+            settings.RAG_DEVICE,
+        )
+        logger.info(f"Embedding models: {EMBEDDING_MODELS.memory_report()}")
+    except Exception as e:
+        logger.warning(f"Embedding model warm-up skipped: {e}")
     yield
 
+    from agents.infrastructure.mongo import get_client_registry
+
+    get_client_registry().close()
+
 
 app = FastAPI(lifespan=lifespan)
 
@@ -42,6 +60,16 @@ async def debug_routes():
     }
 
 
+@app.get("/debug/response-cache")
+async def debug_response_cache():
+    from agents.application.conversation_service.response_cache import (
+        get_response_cache,
+    )
+
+    cache = get_response_cache()
+    return {"enabled": cache is not None, "characters": cache.report() if cache else {}}
+
+
 class ChatMessage(BaseModel):
     message: str
     character_id: str | None = None
@@ -1,4 +1,5 @@
 from .client import MongoClientWrapper
 from .indexes import MongoIndex
+from .registry import MongoClientRegistry, get_client_registry
 
-__all__ = ["MongoClientWrapper", "MongoIndex"]
+__all__ = ["MongoClientRegistry", "MongoClientWrapper", "MongoIndex", "get_client_registry"]
@@ -3,10 +3,12 @@ from typing import Generic, Type, TypeVar
 from bson import ObjectId
 from loguru import logger
 from pydantic import BaseModel
-from pymongo import MongoClient, errors
+from pymongo import errors
 
 from agents.config import settings
 
+from .registry import MongoClientRegistry, get_client_registry
+
 T = TypeVar("T", bound=BaseModel)
 
 
@@ -14,20 +16,23 @@ class MongoClientWrapper(Generic[T]):
     """Service class for MongoDB operations, supporting ingestion, querying, and validation.
 
     This class provides methods to interact with MongoDB collections, including document
-    ingestion, querying, and validation operations.
+    ingestion, querying, and validation operations. The client is borrowed from a
+    `MongoClientRegistry` and shared with the rest of the process, so creating a
+    wrapper opens no connection once the registry has connected to `mongodb_uri`.
 
     Args:
         model (Type[T]): The Pydantic model class to use for document serialization.
         collection_name (str): Name of the MongoDB collection to use.
         database_name (str, optional): Name of the MongoDB database to use.
         mongodb_uri (str, optional): URI for connecting to MongoDB instance.
+        registry (MongoClientRegistry | None, optional): Registry the client is borrowed from.
 
     Attributes:
         model (Type[T]): The Pydantic model class used for document serialization.
         collection_name (str): Name of the MongoDB collection.
         database_name (str): Name of the MongoDB database.
         mongodb_uri (str): MongoDB connection URI.
-        client (MongoClient): MongoDB client instance for database connections.
+        client (MongoClient): Shared MongoDB client of the registry.
         database (Database): Reference to the target MongoDB database.
         collection (Collection): Reference to the target MongoDB collection.
     """
@@ -38,8 +43,9 @@ class MongoClientWrapper(Generic[T]):
         collection_name: str,
         database_name: str = settings.MONGO_DB_NAME,
         mongodb_uri: str = settings.MONGO_URI,
+        registry: MongoClientRegistry | None = None,
     ) -> None:
-        """Initialize a connection to the MongoDB collection.
+        """Borrow the MongoDB collection from the shared client registry.
 
         Args:
             model (Type[T]): The Pydantic model class to use for document serialization.
@@ -48,6 +54,8 @@ class MongoClientWrapper(Generic[T]):
                 Defaults to value from settings.
             mongodb_uri (str, optional): URI for connecting to MongoDB instance.
                 Defaults to value from settings.
+            registry (MongoClientRegistry | None, optional): Registry the client is
+                borrowed from. Defaults to the process-wide registry.
 
         Raises:
             Exception: If connection to MongoDB fails.
@@ -58,18 +66,10 @@ class MongoClientWrapper(Generic[T]):
         self.database_name = database_name
         self.mongodb_uri = mongodb_uri
 
-        try:
-            self.client = MongoClient(mongodb_uri, appname="agents")
-            self.client.admin.command("ping")
-        except Exception as e:
-            logger.error(f"Failed to initialize MongoDBService: {e}")
-            raise
-
+        self.client = (registry or get_client_registry()).client(mongodb_uri)
         self.database = self.client[database_name]
         self.collection = self.database[collection_name]
-        logger.info(
-            f"Connected to MongoDB instance:\n URI: {mongodb_uri}\n Database: {database_name}\n Collection: {collection_name}"
-        )
+        logger.debug(f"Using MongoDB collection {database_name}.{collection_name}")
 
     def __enter__(self) -> "MongoClientWrapper":
         """Enable context manager support.
@@ -81,7 +81,7 @@ class MongoClientWrapper(Generic[T]):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
-        """Close MongoDB connection when exiting context.
+        """Release the collection when exiting context.
 
         Args:
             exc_type: Type of exception that occurred, if any.
@@ -203,11 +203,10 @@ class MongoClientWrapper(Generic[T]):
             raise
 
     def close(self) -> None:
-        """Close the MongoDB connection.
+        """Release the collection.
 
-        This method should be called when the service is no longer needed
-        to properly release resources, unless using the context manager.
+        The shared client stays open for the rest of the process; close it with
+        the registry's `close`.
         """
 
-        self.client.close()
-        logger.debug("Closed MongoDB connection.")
+        logger.debug(f"Released MongoDB collection {self.database_name}.{self.collection_name}")
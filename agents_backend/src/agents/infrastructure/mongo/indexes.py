@@ -16,15 +16,53 @@ class MongoIndex:
         self,
         embedding_dim: int,
         is_hybrid: bool = False,
+        filters: list[str] | None = None,
     ) -> None:
+        """Create the vector (and, if hybrid, full-text) search indexes that are missing.
+
+        Existing indexes are kept as they are, so reruns of ingestion do not wait on
+        Atlas to rebuild them. The one exception is a vector index that lacks one of
+        `filters`: it is updated, because `$vectorSearch` rejects a `filter` on a
+        field that is not indexed as a filter.
+
+        Args:
+            embedding_dim (int): Dimension of the stored embeddings.
+            is_hybrid (bool): Also create the full-text index.
+            filters (list[str] | None): Metadata fields to index for pre-filtering,
+                e.g. `["philosopher_id"]`.
+        """
+
         vectorstore = self.retriever.vectorstore
+        existing = {
+            index["name"]: index
+            for index in self.mongodb_client.collection.list_search_indexes()
+        }
 
-        vectorstore.create_vector_search_index(
-            dimensions=embedding_dim,
-        )
-        if is_hybrid:
+        vector_index = existing.get(vectorstore._index_name)
+        if vector_index is None:
+            vectorstore.create_vector_search_index(
+                dimensions=embedding_dim,
+                filters=filters,
+            )
+        elif set(filters or []) - self._filter_paths(vector_index):
+            vectorstore.create_vector_search_index(
+                dimensions=embedding_dim,
+                filters=filters,
+                update=True,
+            )
+        if is_hybrid and self.retriever.search_index_name not in existing:
             create_fulltext_search_index(
                 collection=self.mongodb_client.collection,
                 field=vectorstore._text_key,
                 index_name=self.retriever.search_index_name,
             )
+
+    @staticmethod
+    def _filter_paths(index: dict) -> set[str]:
+        definition = index.get("latestDefinition") or index.get("definition") or {}
+
+        return {
+            field["path"]
+            for field in definition.get("fields", [])
+            if field.get("type") == "filter"
+        }
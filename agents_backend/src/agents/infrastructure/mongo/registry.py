@@ -0,0 +1,131 @@
+import threading
+from functools import lru_cache
+
+from loguru import logger
+from pymongo import MongoClient
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from agents.config import settings
+
+
+class MongoClientRegistry:
+    """Process-wide MongoDB clients, one per URI, shared by every caller.
+
+    A `MongoClient` is thread-safe and owns a connection pool, so one per cluster
+    is all a process needs. The first request for a URI creates its client with
+    the registry's pool settings and pings the server once; later requests reuse
+    it. Callers borrow databases and collections and never close them: clients
+    stay open until `close` is called, e.g. at shutdown.
+
+    Args:
+        max_pool_size (int): Maximum connections per server.
+        min_pool_size (int): Connections kept open per server, even when idle.
+        max_idle_time_ms (int | None): Idle time after which a pooled connection
+            is closed. Never if None.
+        compressors (str): Comma-separated wire compressors, e.g. "zstd,zlib".
+            No compression if empty.
+        appname (str): Application name reported to the server.
+    """
+
+    def __init__(
+        self,
+        max_pool_size: int = 100,
+        min_pool_size: int = 0,
+        max_idle_time_ms: int | None = None,
+        compressors: str = "",
+        appname: str = "agents",
+    ) -> None:
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self.max_idle_time_ms = max_idle_time_ms
+        self.compressors = compressors
+        self.appname = appname
+        self._clients: dict[str, MongoClient] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build_from_settings(cls) -> "MongoClientRegistry":
+        return cls(
+            max_pool_size=settings.MONGO_MAX_POOL_SIZE,
+            min_pool_size=settings.MONGO_MIN_POOL_SIZE,
+            max_idle_time_ms=settings.MONGO_MAX_IDLE_TIME_MS,
+            compressors=settings.MONGO_COMPRESSORS,
+        )
+
+    def client(self, mongodb_uri: str = settings.MONGO_URI) -> MongoClient:
+        """Return the shared client of `mongodb_uri`, creating and pinging it on first use.
+
+        Raises:
+            Exception: If the server cannot be reached on first use.
+        """
+
+        client = self._clients.get(mongodb_uri)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(mongodb_uri)
+            if client is None:
+                client = self._connect(mongodb_uri)
+                self._clients[mongodb_uri] = client
+
+        return client
+
+    def database(
+        self,
+        database_name: str = settings.MONGO_DB_NAME,
+        mongodb_uri: str = settings.MONGO_URI,
+    ) -> Database:
+        return self.client(mongodb_uri)[database_name]
+
+    def collection(
+        self,
+        collection_name: str,
+        database_name: str = settings.MONGO_DB_NAME,
+        mongodb_uri: str = settings.MONGO_URI,
+    ) -> Collection:
+        return self.database(database_name, mongodb_uri)[collection_name]
+
+    def close(self) -> None:
+        """Close every client. A later request creates a new one."""
+
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
+        if clients:
+            logger.debug(f"Closed {len(clients)} MongoDB clients.")
+
+    def _connect(self, mongodb_uri: str) -> MongoClient:
+        options = {
+            "appname": self.appname,
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+        }
+        if self.max_idle_time_ms is not None:
+            options["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.compressors:
+            options["compressors"] = self.compressors
+
+        client = MongoClient(mongodb_uri, **options)
+        try:
+            client.admin.command("ping")
+        except Exception as e:
+            client.close()
+            logger.error(f"Failed to connect to MongoDB: {e}")
+            raise
+
+        logger.info(
+            f"Connected to MongoDB instance:\n URI: {mongodb_uri}\n "
+            f"Pool: {self.min_pool_size}-{self.max_pool_size} connections"
+        )
+
+        return client
+
+
+@lru_cache(maxsize=1)
+def get_client_registry() -> MongoClientRegistry:
+    """Return the process-wide `MongoClientRegistry`, built from the settings."""
+
+    return MongoClientRegistry.build_from_settings()
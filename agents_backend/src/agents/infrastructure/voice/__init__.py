@@ -0,0 +1,40 @@
+from .analytics import TranscriptAnalytics, TranscriptColumnStore
+from .audio_cache import AudioCache, CachedAudio, load_prerender_lines
+from .capacity import SessionCost, SessionCostSampler, WorkerLoad
+from .metrics import VOICE_METRICS, VOICE_STAGES, MetricsRegistry, TurnTracer, percentile
+from .speculation import SpeculationStats, SpeculativeReplies
+from .switching import SwitchDebouncer, SwitchStats
+from .transcripts import (
+    TranscriptLine,
+    TranscriptTailer,
+    TranscriptWriter,
+    room_from_transcript_path,
+)
+from .voices import VoiceConfig, VoiceRegistry, load_voice_configs
+
+__all__ = [
+    "AudioCache",
+    "CachedAudio",
+    "MetricsRegistry",
+    "SessionCost",
+    "SessionCostSampler",
+    "SpeculationStats",
+    "SpeculativeReplies",
+    "SwitchDebouncer",
+    "SwitchStats",
+    "TranscriptAnalytics",
+    "TranscriptColumnStore",
+    "TranscriptLine",
+    "TranscriptTailer",
+    "TranscriptWriter",
+    "TurnTracer",
+    "VOICE_METRICS",
+    "VOICE_STAGES",
+    "VoiceConfig",
+    "VoiceRegistry",
+    "WorkerLoad",
+    "load_prerender_lines",
+    "load_voice_configs",
+    "percentile",
+    "room_from_transcript_path",
+]
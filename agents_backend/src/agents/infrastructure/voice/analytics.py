@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from .transcripts import head_digest, room_from_transcript_path
+
+# Record type codes stored in the `type` column. 0 is any other record type.
+RECORD_TYPES = ("user", "user_ignored", "agent")
+TYPE_USER, TYPE_IGNORED, TYPE_AGENT = 1, 2, 3
+
+# Reason codes stored in the `reason` column. 0 is no reason, -1 any other reason.
+IGNORE_REASONS = ("not_engaged",)
+REASON_NOT_ENGAGED = 1
+
+TRANSCRIPT_DTYPE = np.dtype(
+    [
+        ("room", "<i4"),
+        ("timestamp", "<f8"),
+        ("type", "i1"),
+        ("character", "<i4"),
+        ("reason", "i1"),
+        ("chars", "<i4"),
+        ("words", "<i4"),
+    ]
+)
+
+
+class _Vocabulary:
+    def __init__(self, values: list[str] | None = None) -> None:
+        self.values: list[str] = list(values or [])
+        self._codes = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+
+        return code
+
+
+def _parse_timestamp(value: Any) -> float:
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return float("nan")
+
+
+class TranscriptColumnStore:
+    """Columnar cache of `data/call_transcripts` as NumPy structured arrays.
+
+    Every transcript record becomes one fixed-width row of `TRANSCRIPT_DTYPE`. Room and
+    character names are dictionary-encoded, and text is reduced to its length. Rows parsed in one
+    `refresh` are written to an `.npy` shard per source file, so a refresh only parses
+    the bytes appended since the previous one. Source files are tracked by device and
+    inode plus a digest of their first bytes, like `TranscriptTailer`, so a rotated file
+    is not parsed twice and a new file reusing an inode is parsed from the start. Shards
+    of source files that were deleted are kept, preserving history past log cleanup.
+
+    Args:
+        root (Path): Directory containing the `*.jsonl` transcripts.
+        cache_dir (Path): Directory holding the shards and their index.
+    """
+
+    def __init__(self, root: Path, cache_dir: Path) -> None:
+        self.root = root
+        self.cache_dir = cache_dir
+        self._index_path = cache_dir / "index.json"
+        self._files: dict[str, dict[str, Any]] = {}
+        self.rooms = _Vocabulary()
+        self.characters = _Vocabulary()
+        self._table: np.ndarray | None = None
+
+        if self._index_path.exists():
+            index = json.loads(self._index_path.read_text(encoding="utf-8"))
+            self._files = index["files"]
+            self.rooms = _Vocabulary(index["rooms"])
+            self.characters = _Vocabulary(index["characters"])
+
+    def refresh(self) -> int:
+        """Parse transcript bytes appended since the last refresh into new shards.
+
+        Returns:
+            int: Number of rows added.
+        """
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        added = 0
+        for path in sorted(self.root.glob("*.jsonl")):
+            stat = path.stat()
+            file_id = f"{stat.st_dev}-{stat.st_ino}"
+            entry = self._files.get(file_id)
+            if (
+                entry is not None
+                and stat.st_size != entry["offset"]
+                and "head" in entry
+                and entry["head"] != head_digest(path, entry["offset"])
+            ):
+                # Inode reused by a new file: keep the old file's shards under another key.
+                self._files[f"{file_id}-retired-{uuid.uuid4().hex[:8]}"] = entry
+                entry = None
+            elif entry is not None and stat.st_size < entry["offset"]:
+                # Truncated.
+                for shard in entry["shards"]:
+                    (self.cache_dir / shard).unlink(missing_ok=True)
+                entry = None
+            if entry is None:
+                entry = self._files[file_id] = {"offset": 0, "shards": []}
+            entry["path"] = path.name
+            if stat.st_size == entry["offset"]:
+                continue
+
+            rows, end_offset = self._parse(path, entry["offset"])
+            if len(rows):
+                # Unique per parse, so shards of a retired file are never overwritten.
+                shard = f"{file_id}-{entry['offset']}-{uuid.uuid4().hex[:8]}.npy"
+                np.save(self.cache_dir / shard, rows)
+                entry["shards"].append(shard)
+                added += len(rows)
+            entry["offset"] = end_offset
+            entry["head"] = head_digest(path, end_offset)
+
+        if added:
+            self._table = None
+        self._write_index()
+
+        return added
+
+    def table(self) -> np.ndarray:
+        """All cached rows, sorted by room and then timestamp."""
+
+        if self._table is None:
+            shards = [
+                np.load(self.cache_dir / shard, mmap_mode="r")
+                for entry in self._files.values()
+                for shard in entry["shards"]
+            ]
+            table = (
+                np.concatenate(shards) if shards else np.empty(0, dtype=TRANSCRIPT_DTYPE)
+            )
+            self._table = table[np.lexsort((table["timestamp"], table["room"]))]
+
+        return self._table
+
+    def _parse(self, path: Path, offset: int) -> tuple[np.ndarray, int]:
+        room = self.rooms.code(room_from_transcript_path(path))
+        rows: list[tuple] = []
+        with path.open("rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                offset += len(raw)
+                try:
+                    record = json.loads(raw)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed transcript line in {path}")
+                    continue
+                rows.append(self._row(room, record))
+
+        return np.array(rows, dtype=TRANSCRIPT_DTYPE), offset
+
+    def _row(self, room: int, record: dict[str, Any]) -> tuple:
+        record_type = record.get("type")
+        type_code = (
+            RECORD_TYPES.index(record_type) + 1 if record_type in RECORD_TYPES else 0
+        )
+        character = (
+            record.get("speaker")
+            if record_type == "agent"
+            else record.get("active_character")
+        )
+        reason = record.get("reason")
+        if not reason:
+            reason_code = 0
+        elif reason in IGNORE_REASONS:
+            reason_code = IGNORE_REASONS.index(reason) + 1
+        else:
+            reason_code = -1
+        text = str(record.get("text", ""))
+
+        return (
+            room,
+            _parse_timestamp(record.get("timestamp")),
+            type_code,
+            self.characters.code(str(character or "").strip().lower()),
+            reason_code,
+            len(text),
+            len(text.split()),
+        )
+
+    def _write_index(self) -> None:
+        index = {
+            "files": self._files,
+            "rooms": self.rooms.values,
+            "characters": self.characters.values,
+        }
+        tmp_path = self._index_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(tmp_path, self._index_path)
+
+
+@dataclass
+class SessionStats:
+    room: str
+    turns: int
+    ignored: int
+    switches: int
+    duration_s: float
+
+
+class TranscriptAnalytics:
+    """Vectorized aggregate queries over a `TranscriptColumnStore` table.
+
+    A session is one room. A turn is one engaged user utterance (`user`). A switch is
+    a change of character between two consecutive records of the same session.
+    """
+
+    def __init__(self, store: TranscriptColumnStore) -> None:
+        self.store = store
+        self.table = store.table()
+        self._num_rooms = len(store.rooms.values)
+
+    def _per_room(self, mask: np.ndarray) -> np.ndarray:
+        return np.bincount(self.table["room"][mask], minlength=self._num_rooms)
+
+    def turns_per_session(self) -> np.ndarray:
+        return self._per_room(self.table["type"] == TYPE_USER)
+
+    def ignored_per_session(self) -> np.ndarray:
+        return self._per_room(
+            (self.table["type"] == TYPE_IGNORED)
+            & (self.table["reason"] == REASON_NOT_ENGAGED)
+        )
+
+    def ignored_ratio(self) -> float:
+        """Share of user utterances ignored because the player was not engaged."""
+
+        user_lines = np.isin(self.table["type"], (TYPE_USER, TYPE_IGNORED)).sum()
+        if not user_lines:
+            return 0.0
+
+        return float(self.ignored_per_session().sum() / user_lines)
+
+    def switches_per_session(self) -> np.ndarray:
+        room = self.table["room"]
+        character = self.table["character"]
+        switched = (room[1:] == room[:-1]) & (character[1:] != character[:-1])
+
+        return np.bincount(room[1:][switched], minlength=self._num_rooms)
+
+    def duration_per_session(self) -> np.ndarray:
+        room = self.table["room"]
+        timestamp = self.table["timestamp"]
+        # fmin/fmax ignore NaN, so records with a missing or unparseable timestamp
+        # do not stretch their session; a session with none at all lasts 0 s.
+        first = np.full(self._num_rooms, np.nan)
+        last = np.full(self._num_rooms, np.nan)
+        np.fmin.at(first, room, timestamp)
+        np.fmax.at(last, room, timestamp)
+
+        return np.nan_to_num(last - first)
+
+    def switch_frequency(self) -> float:
+        """Character switches per minute across all sessions."""
+
+        minutes = self.duration_per_session().sum() / 60
+        if minutes <= 0:
+            return 0.0
+
+        return float(self.switches_per_session().sum() / minutes)
+
+    def reply_length_distribution(
+        self, percentiles: tuple[float, ...] = (50, 90, 99)
+    ) -> dict[str, Any]:
+        """Word counts of agent replies as percentiles and a power-of-two histogram."""
+
+        words = self.table["words"][self.table["type"] == TYPE_AGENT]
+        if not len(words):
+            return {"count": 0}
+
+        edges = [0, 1, 2, 4, 8, 16, 32, 64, 128, 256, max(512, int(words.max()) + 1)]
+        counts, _ = np.histogram(words, bins=edges)
+
+        return {
+            "count": int(len(words)),
+            "mean": round(float(words.mean()), 2),
+            **{
+                f"p{q:g}": float(np.percentile(words, q, method="inverted_cdf"))
+                for q in percentiles
+            },
+            "histogram": {
+                f"{lo}-{hi - 1}": int(count)
+                for lo, hi, count in zip(edges[:-1], edges[1:], counts)
+            },
+        }
+
+    def sessions(self) -> list[SessionStats]:
+        turns = self.turns_per_session()
+        ignored = self.ignored_per_session()
+        switches = self.switches_per_session()
+        duration = self.duration_per_session()
+        present = self._per_room(np.ones(len(self.table), dtype=bool)) > 0
+
+        return [
+            SessionStats(
+                room=self.store.rooms.values[code],
+                turns=int(turns[code]),
+                ignored=int(ignored[code]),
+                switches=int(switches[code]),
+                duration_s=round(float(duration[code]), 1),
+            )
+            for code in np.flatnonzero(present)
+        ]
+
+    def summary(self) -> dict[str, Any]:
+        turns = self.turns_per_session()
+        present = self._per_room(np.ones(len(self.table), dtype=bool)) > 0
+        session_turns = turns[present]
+
+        return {
+            "rows": int(len(self.table)),
+            "sessions": int(present.sum()),
+            "turns_per_session_mean": (
+                round(float(session_turns.mean()), 2) if len(session_turns) else 0.0
+            ),
+            "turns_per_session_p50": (
+                float(np.percentile(session_turns, 50, method="inverted_cdf"))
+                if len(session_turns)
+                else 0.0
+            ),
+            "ignored_ratio": round(self.ignored_ratio(), 4),
+            "switches_per_minute": round(self.switch_frequency(), 3),
+            "reply_words": self.reply_length_distribution(),
+        }
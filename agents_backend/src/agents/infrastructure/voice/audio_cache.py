@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator
+
+from loguru import logger
+
+from .speculation import normalize_transcript
+from .voices import VoiceConfig
+
+# Lines every character says often enough to be worth synthesizing ahead of time.
+# A character entry in agent_info.json may override them with a `stock_lines` list
+# and its greeting with a `greeting` string.
+DEFAULT_STOCK_LINES = [
+    "I can't help you with that.",
+    "I don't know anything about that.",
+    "Leave me alone.",
+]
+
+
+def greeting_line(name: str) -> str:
+    return f"Hello there. I'm {name}. What do you want to know?"
+
+
+def load_prerender_lines(agent_info_path: Path) -> dict[str, list[str]]:
+    """Collect the greeting and stock lines of every character in `agent_info.json`.
+
+    Returns:
+        dict[str, list[str]]: Lines keyed by lower-cased character token, greeting first.
+    """
+
+    with agent_info_path.open("r", encoding="utf-8") as file:
+        raw = json.load(file)
+
+    lines: dict[str, list[str]] = {}
+    for entries in raw.values():
+        for entry in entries:
+            token = str(entry.get("id", "")).strip().lower()
+            if not token:
+                continue
+
+            name = str(entry.get("name", "Unknown Character")).strip()
+            greeting = str(entry.get("greeting") or greeting_line(name)).strip()
+            stock = entry.get("stock_lines") or DEFAULT_STOCK_LINES
+            lines[token] = [greeting, *[str(line).strip() for line in stock]]
+
+    return lines
+
+
+@dataclass(frozen=True)
+class CachedAudio:
+    """One pre-synthesized line stored as raw 16-bit little-endian PCM."""
+
+    key: str
+    text: str
+    voice_id: str
+    model: str
+    sample_rate: int
+    num_channels: int
+    path: Path
+
+    def read_pcm(self) -> bytes:
+        return self.path.read_bytes()
+
+    def iter_chunks(self, pcm: bytes, frame_ms: int = 20) -> Iterator[tuple[bytes, int]]:
+        """Split `pcm`, as returned by `read_pcm`, into `(pcm_bytes, samples_per_channel)`
+        pieces of `frame_ms` each.
+        """
+
+        samples_per_channel = max(1, self.sample_rate * frame_ms // 1000)
+        chunk_size = samples_per_channel * self.num_channels * 2
+        for start in range(0, len(pcm), chunk_size):
+            chunk = pcm[start : start + chunk_size]
+            yield chunk, len(chunk) // (self.num_channels * 2)
+
+
+class AudioCache:
+    """Content-addressed on-disk cache of synthesized speech.
+
+    Entries are keyed by `(voice id, model, hash of normalized text)`, so the same line
+    spoken by two characters sharing a voice is stored once, and changing a voice or
+    model never serves stale audio. Each entry is a `<key>.pcm` file plus a `<key>.json`
+    sidecar describing the sample format. The key index is loaded once at construction.
+
+    Args:
+        root (Path): Directory holding the cache entries.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, CachedAudio] = {}
+        self._load_index()
+
+    @staticmethod
+    def key(voice: VoiceConfig, text: str) -> str:
+        text_hash = hashlib.sha256(normalize_transcript(text).encode("utf-8")).hexdigest()
+        raw = f"{voice.voice_id}\0{voice.model}\0{text_hash}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, voice: VoiceConfig, text: str) -> CachedAudio | None:
+        entry = self._entries.get(self.key(voice, text))
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return entry
+
+    def put(
+        self,
+        voice: VoiceConfig,
+        text: str,
+        pcm: bytes,
+        sample_rate: int,
+        num_channels: int = 1,
+    ) -> CachedAudio:
+        key = self.key(voice, text)
+        entry = CachedAudio(
+            key=key,
+            text=text,
+            voice_id=voice.voice_id,
+            model=voice.model,
+            sample_rate=sample_rate,
+            num_channels=num_channels,
+            path=self.root / f"{key}.pcm",
+        )
+
+        self._write_atomic(entry.path, pcm)
+        meta = {k: v for k, v in asdict(entry).items() if k != "path"}
+        self._write_atomic(
+            self.root / f"{key}.json", json.dumps(meta, ensure_ascii=True).encode("utf-8")
+        )
+        self._entries[key] = entry
+
+        return entry
+
+    def _load_index(self) -> None:
+        for meta_path in self.root.glob("*.json"):
+            pcm_path = meta_path.with_suffix(".pcm")
+            if not pcm_path.exists():
+                continue
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                entry = CachedAudio(path=pcm_path, **meta)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable audio cache entry {meta_path}: {e}")
+                continue
+            self._entries[entry.key] = entry
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
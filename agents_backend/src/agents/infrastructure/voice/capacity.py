@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+import resource
+import sys
+import time
+from dataclasses import asdict, dataclass
+
+try:
+    import psutil
+except Exception:
+    psutil = None
+
+
+def _rss_mb() -> float:
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+
+    return _peak_rss_mb()
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@dataclass
+class SessionCost:
+    duration_s: float
+    cpu_seconds: float
+    cpu_cores_avg: float
+    rss_start_mb: float
+    rss_end_mb: float
+    rss_peak_mb: float
+
+    def as_dict(self) -> dict[str, float]:
+        return {k: round(v, 3) for k, v in asdict(self).items()}
+
+
+class SessionCostSampler:
+    """Measure the CPU and memory one session costs its job process.
+
+    LiveKit runs every job in its own process, so process CPU time and RSS are the
+    session's cost. Models shared through the inference process (turn detector, noise
+    cancellation) are not included.
+    """
+
+    def __init__(self) -> None:
+        self._wall_start = time.monotonic()
+        self._cpu_start = time.process_time()
+        self._rss_start = _rss_mb()
+
+    def finish(self) -> SessionCost:
+        duration = max(time.monotonic() - self._wall_start, 1e-6)
+        cpu_seconds = time.process_time() - self._cpu_start
+
+        return SessionCost(
+            duration_s=duration,
+            cpu_seconds=cpu_seconds,
+            cpu_cores_avg=cpu_seconds / duration,
+            rss_start_mb=self._rss_start,
+            rss_end_mb=_rss_mb(),
+            rss_peak_mb=_peak_rss_mb(),
+        )
+
+
+class WorkerLoad:
+    """Load reported to LiveKit dispatch for one worker.
+
+    The load is the larger of the smoothed host CPU utilisation and the session
+    load. The session load is scaled so that it reaches `threshold` exactly when
+    `max_sessions` sessions are running. The worker therefore stops accepting jobs
+    when the host saturates or when it hits its session cap, whichever comes first.
+
+    Args:
+        max_sessions (int): Concurrent sessions the worker accepts. 0 disables the cap.
+        threshold (float): Load threshold configured on the agent server.
+        smoothing (float): Weight of the newest CPU sample in the moving average.
+    """
+
+    def __init__(
+        self, max_sessions: int = 0, threshold: float = 0.75, smoothing: float = 0.3
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.threshold = threshold
+        self.smoothing = smoothing
+        self._cpu = 0.0
+
+    def cpu(self) -> float:
+        if psutil is not None:
+            sample = psutil.cpu_percent(interval=None) / 100
+        else:
+            sample = os.getloadavg()[0] / (os.cpu_count() or 1)
+        self._cpu += self.smoothing * (min(sample, 1.0) - self._cpu)
+
+        return self._cpu
+
+    def __call__(self, active_sessions: int) -> float:
+        load = self.cpu()
+        if self.max_sessions > 0:
+            load = max(load, active_sessions / self.max_sessions * self.threshold)
+
+        return min(load, 1.0)
@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import bisect
+import fcntl
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+# Per-turn stages of the voice pipeline, in the order they happen.
+#   stt_final: user end of speech -> final transcript
+#   eou:       user end of speech -> turn committed by the turn detector
+#   llm_ttft:  LLM request -> first token
+#   tts_ttfb:  TTS request -> first audio byte
+#   playout:   user end of speech -> first agent audio frame played
+VOICE_STAGES = ("stt_final", "eou", "llm_ttft", "tts_ttfb", "playout")
+
+DEFAULT_LATENCY_BUCKETS_MS = (
+    50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000,
+)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: dict[str, str] | None = None) -> str:
+    items = list(labels) + sorted((extra or {}).items())
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in items)
+    return "{" + body + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self._values: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def drain(self) -> dict[Labels, float]:
+        """Return the values recorded so far and reset them."""
+
+        with self._lock:
+            values, self._values = self._values, {}
+
+        return values
+
+    def merge(self, values: dict[Labels, float]) -> None:
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def dump(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "series": [
+                    {"labels": [list(item) for item in labels], "value": value}
+                    for labels, value in sorted(self._values.items())
+                ]
+            }
+
+    def load(self, state: dict[str, Any]) -> None:
+        self.merge(
+            {
+                tuple(tuple(item) for item in row["labels"]): row["value"]
+                for row in state.get("series", [])
+            }
+        )
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {value:g}")
+
+        return lines
+
+
+@dataclass
+class _HistogramSeries:
+    buckets: list[int]
+    sum: float = 0.0
+    count: int = 0
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_MS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.bounds = tuple(sorted(buckets))
+        self._series: dict[Labels, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(
+                    buckets=[0] * len(self.bounds)
+                )
+            if index < len(self.bounds):
+                series.buckets[index] += 1
+            series.sum += value
+            series.count += 1
+
+    def drain(self) -> dict[Labels, _HistogramSeries]:
+        """Return the series recorded so far and reset them."""
+
+        with self._lock:
+            series, self._series = self._series, {}
+
+        return series
+
+    def merge(self, series: dict[Labels, _HistogramSeries]) -> None:
+        with self._lock:
+            for key, other in series.items():
+                current = self._series.get(key)
+                if current is None:
+                    current = self._series[key] = _HistogramSeries(
+                        buckets=[0] * len(self.bounds)
+                    )
+                current.buckets = [a + b for a, b in zip(current.buckets, other.buckets)]
+                current.sum += other.sum
+                current.count += other.count
+
+    def dump(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "bounds": list(self.bounds),
+                "series": [
+                    {"labels": [list(item) for item in labels], **asdict(series)}
+                    for labels, series in sorted(self._series.items())
+                ],
+            }
+
+    def load(self, state: dict[str, Any]) -> None:
+        # Totals recorded with other buckets cannot be added up; start over.
+        if tuple(state.get("bounds", ())) != self.bounds:
+            return
+
+        self.merge(
+            {
+                tuple(tuple(item) for item in row["labels"]): _HistogramSeries(
+                    buckets=row["buckets"], sum=row["sum"], count=row["count"]
+                )
+                for row in state.get("series", [])
+            }
+        )
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, hits in zip(self.bounds, series.buckets):
+                    cumulative += hits
+                    le = _format_labels(labels, {"le": f"{bound:g}"})
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                inf = _format_labels(labels, {"le": "+Inf"})
+                lines.append(f"{self.name}_bucket{inf} {series.count}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {series.sum:g}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {series.count}")
+
+        return lines
+
+
+class MetricsRegistry:
+    """Process-local set of Prometheus-style metrics rendered in the text exposition format.
+
+    Worker jobs run in separate processes, so instead of serving an HTTP endpoint each
+    process adds what it recorded to one shared textfile (node_exporter
+    textfile-collector style) with `merge_textfile`.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        metric = Counter(name, help)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_MS,
+    ) -> Histogram:
+        metric = Histogram(name, help, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def merge_textfile(self, path: Path) -> None:
+        """Add everything recorded since the last call to the totals kept in `path`.
+
+        The totals are stored as JSON in `<path>.json` and rendered to `path`. The
+        processes sharing `path` take turns through an exclusive lock on `<path>.lock`,
+        so the collector exports one set of series no matter how many job processes
+        have come and gone.
+        """
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state_path = path.with_suffix(".json")
+        with path.with_suffix(".lock").open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = json.loads(state_path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, json.JSONDecodeError):
+                state = {}
+
+            totals = MetricsRegistry()
+            for metric in self._metrics:
+                if isinstance(metric, Counter):
+                    merged = totals.counter(metric.name, metric.help)
+                else:
+                    merged = totals.histogram(metric.name, metric.help, metric.bounds)
+                merged.load(state.get(metric.name, {}))
+                merged.merge(metric.drain())
+
+            tmp_path = state_path.with_suffix(state_path.suffix + ".tmp")
+            tmp_path.write_text(
+                json.dumps({metric.name: metric.dump() for metric in totals._metrics}),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, state_path)
+            totals.write_textfile(path)
+
+
+VOICE_METRICS = MetricsRegistry()
+TURNS_TOTAL = VOICE_METRICS.counter(
+    "npc_turns_total", "Completed agent turns by character."
+)
+STAGE_LATENCY_MS = VOICE_METRICS.histogram(
+    "npc_stage_latency_ms", "Voice pipeline stage latency in milliseconds."
+)
+LLM_TOKENS_TOTAL = VOICE_METRICS.counter(
+    "npc_llm_tokens_total", "LLM tokens by character and kind (prompt/completion)."
+)
+
+
+@dataclass
+class _Turn:
+    index: int
+    character: str
+    speech_ended_at: float | None = None
+    stages: dict[str, float] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class TurnTracer:
+    """Assemble per-turn timing spans for one session and emit them as traces and metrics.
+
+    A turn opens when the turn detector commits the user's utterance (`on_eou`) and
+    records when the first agent audio frame of the reply plays (`on_playout`). LiveKit
+    reports LLM and TTS metrics once their streams finish, usually after playout has
+    started, so the turn stays open to collect them and is only emitted when the next
+    turn opens or the session ends. A turn that never reaches playout (e.g.
+    interrupted) is emitted the same way, with the stages it did reach.
+
+    Args:
+        sink (Callable[[dict[str, Any]], Any]): Receives one trace record per turn.
+        character (Callable[[], str]): Returns the character token active right now,
+            read when a turn opens.
+        clock (Callable[[], float]): Monotonic clock in seconds.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[dict[str, Any]], Any],
+        character: Callable[[], str],
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.sink = sink
+        self.character = character
+        self.turns = 0
+        self._clock = clock
+        self._turn: _Turn | None = None
+
+    def on_eou(self, end_of_utterance_delay: float, transcription_delay: float) -> None:
+        self._emit()
+        self.turns += 1
+        self._turn = _Turn(
+            index=self.turns,
+            character=self.character(),
+            speech_ended_at=self._clock() - end_of_utterance_delay,
+        )
+        self._turn.stages["eou"] = end_of_utterance_delay * 1000
+        self._turn.stages["stt_final"] = transcription_delay * 1000
+
+    def on_llm(self, ttft: float, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        turn = self._current()
+        if ttft >= 0:
+            turn.stages.setdefault("llm_ttft", ttft * 1000)
+        turn.prompt_tokens += prompt_tokens
+        turn.completion_tokens += completion_tokens
+
+    def on_tts(self, ttfb: float) -> None:
+        if ttfb >= 0:
+            self._current().stages.setdefault("tts_ttfb", ttfb * 1000)
+
+    def on_playout(self) -> None:
+        turn = self._current()
+        if turn.speech_ended_at is not None and "playout" not in turn.stages:
+            turn.stages["playout"] = (self._clock() - turn.speech_ended_at) * 1000
+
+    def close(self) -> None:
+        self._emit()
+
+    def _current(self) -> _Turn:
+        if self._turn is None:
+            # Agent-initiated speech (e.g. a greeting) has no user utterance to anchor on;
+            # it stays open until the user's first utterance, like any other turn.
+            self.turns += 1
+            self._turn = _Turn(index=self.turns, character=self.character())
+
+        return self._turn
+
+    def _emit(self) -> None:
+        turn = self._turn
+        self._turn = None
+        if turn is None or not turn.stages:
+            return
+
+        character = turn.character
+        TURNS_TOTAL.inc(character=character)
+        for stage, value in turn.stages.items():
+            STAGE_LATENCY_MS.observe(value, stage=stage, character=character)
+        if turn.prompt_tokens:
+            LLM_TOKENS_TOTAL.inc(turn.prompt_tokens, character=character, kind="prompt")
+        if turn.completion_tokens:
+            LLM_TOKENS_TOTAL.inc(
+                turn.completion_tokens, character=character, kind="completion"
+            )
+
+        self.sink(
+            {
+                "type": "turn",
+                "character": character,
+                "turn": turn.index,
+                "stages_ms": {k: round(v, 1) for k, v in turn.stages.items()},
+                "prompt_tokens": turn.prompt_tokens,
+                "completion_tokens": turn.completion_tokens,
+            }
+        )
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of `values` for `q` in [0, 100]."""
+
+    if not values:
+        return float("nan")
+
+    ordered = sorted(values)
+    rank = max(1, int(-(-q * len(ordered) // 100)))
+
+    return ordered[min(rank, len(ordered)) - 1]
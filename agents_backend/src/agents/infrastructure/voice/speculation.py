@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import AsyncIterator, Callable
+
+from loguru import logger
+
+# Streams `(text_delta, completion_tokens, prompt_tokens)` for a user utterance.
+DraftFn = Callable[[str], AsyncIterator[tuple[str, int, int]]]
+# Receives `(ttft_seconds, prompt_tokens, completion_tokens)` of a committed draft.
+CommitFn = Callable[[float, int, int], None]
+
+
+def normalize_transcript(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def transcript_divergence(a: str, b: str) -> float:
+    """Word-level edit distance between two transcripts, from 0.0 (same) to 1.0."""
+
+    words_a = normalize_transcript(a).split()
+    words_b = normalize_transcript(b).split()
+    if not words_a and not words_b:
+        return 0.0
+
+    return 1.0 - SequenceMatcher(None, words_a, words_b, autojunk=False).ratio()
+
+
+@dataclass
+class SpeculationStats:
+    drafts_started: int = 0
+    committed: int = 0
+    discarded: int = 0
+    saved_ms: float = 0.0
+    wasted_tokens: int = 0
+
+    def as_dict(self) -> dict[str, float | int]:
+        return {
+            "drafts_started": self.drafts_started,
+            "committed": self.committed,
+            "discarded": self.discarded,
+            "saved_ms": round(self.saved_ms, 1),
+            "wasted_tokens": self.wasted_tokens,
+        }
+
+
+class _Draft:
+    def __init__(self, source_text: str, draft_fn: DraftFn, clock) -> None:
+        self.source_text = source_text
+        self.started_at = clock()
+        self.first_token_at: float | None = None
+        self.chunks: list[str] = []
+        self.tokens = 0
+        self.prompt_tokens = 0
+        self._clock = clock
+        self._wakeup = asyncio.Event()
+        self.task = asyncio.get_running_loop().create_task(self._run(draft_fn))
+        # Discarded drafts are never awaited; retrieve their outcome to keep the loop quiet.
+        self.task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _run(self, draft_fn: DraftFn) -> None:
+        try:
+            async for delta, tokens, prompt_tokens in draft_fn(self.source_text):
+                if self.first_token_at is None:
+                    self.first_token_at = self._clock()
+                self.tokens += tokens
+                self.prompt_tokens += prompt_tokens
+                if delta:
+                    self.chunks.append(delta)
+                self._wakeup.set()
+        finally:
+            self._wakeup.set()
+
+    def failed(self) -> bool:
+        return (
+            self.task.done()
+            and not self.task.cancelled()
+            and self.task.exception() is not None
+        )
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Replay the buffered text, then follow the generation until it ends."""
+
+        i = 0
+        while True:
+            while i < len(self.chunks):
+                yield self.chunks[i]
+                i += 1
+            if self.task.done():
+                break
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def cancel(self) -> None:
+        if not self.task.done():
+            self.task.cancel()
+
+
+class SpeculativeReplies:
+    """Start the LLM reply on stable interim transcripts instead of waiting for the final one.
+
+    An interim transcript is considered stable as soon as either condition holds: the
+    same normalized text has been received `stable_events` times, or `stable_ms` have
+    passed without a different one. Recognizers that resend unchanged interims settle
+    on the count; those that only send an interim when the text changes settle on the
+    timer, which is armed on every change and cancelled by the next one. A draft is
+    then generated in the background through `draft_fn`. When the final transcript
+    arrives, the draft is committed if the final text is within `divergence` of the
+    text it was started on, otherwise it is cancelled. A later interim that diverges
+    from the draft also cancels it, so a new draft can start once the speaker settles
+    again. Tokens streamed by a cancelled or failed draft are counted as wasted.
+
+    A committed draft bypasses the session's own LLM node, so no LLM metrics are
+    emitted for it; `on_commit` receives its time to first token and token usage
+    once it has been spoken, or interrupted.
+
+    Args:
+        draft_fn (DraftFn): Streams `(text_delta, completion_tokens, prompt_tokens)`
+            for a user utterance.
+        stable_events (int): Identical interim transcripts after which drafting starts.
+            0 disables the count.
+        stable_ms (float): Time after which an unchanged interim transcript starts a
+            draft. 0 disables the timer.
+        divergence (float): Maximum word-level divergence between the drafted and the
+            final transcript for the draft to be committed.
+        min_words (int): Interim transcripts shorter than this never start a draft.
+        on_commit (CommitFn | None): Receives the LLM metrics of committed drafts.
+    """
+
+    def __init__(
+        self,
+        draft_fn: DraftFn,
+        stable_events: int = 2,
+        stable_ms: float = 300.0,
+        divergence: float = 0.2,
+        min_words: int = 2,
+        on_commit: CommitFn | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.draft_fn = draft_fn
+        self.on_commit = on_commit
+        self.stable_events = stable_events
+        self.stable_ms = stable_ms
+        self.divergence = divergence
+        self.min_words = min_words
+        self.stats = SpeculationStats()
+
+        self._clock = clock
+        self._draft: _Draft | None = None
+        self._interim = ""
+        self._interim_seen = 0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def on_interim(self, text: str) -> None:
+        normalized = normalize_transcript(text)
+        changed = normalized != self._interim
+        if changed:
+            self._interim = normalized
+            self._interim_seen = 1
+            self._cancel_timer()
+        else:
+            self._interim_seen += 1
+
+        if self._draft is not None:
+            if transcript_divergence(self._draft.source_text, text) > self.divergence:
+                self._discard()
+            else:
+                return
+
+        if len(normalized.split()) < self.min_words:
+            return
+
+        if self.stable_events and self._interim_seen >= self.stable_events:
+            self._start(text)
+        elif changed and self.stable_ms > 0:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.stable_ms / 1000, self._on_stable, text
+            )
+
+    def on_final(self, text: str) -> AsyncIterator[str] | None:
+        """Resolve the pending draft against the final transcript.
+
+        Returns:
+            AsyncIterator[str] | None: The committed reply text stream, or None if there
+                was no usable draft and the caller should generate the reply itself.
+        """
+
+        draft = self._draft
+        self._draft = None
+        self._reset_interim()
+        if draft is None:
+            return None
+
+        if draft.failed():
+            logger.warning(f"Speculative draft failed: {draft.task.exception()}")
+            self.stats.discarded += 1
+            self.stats.wasted_tokens += draft.tokens
+            return None
+
+        if transcript_divergence(draft.source_text, text) > self.divergence:
+            self._discard(draft)
+            return None
+
+        now = self._clock()
+        head_start_until = (
+            min(now, draft.first_token_at) if draft.first_token_at is not None else now
+        )
+        self.stats.committed += 1
+        self.stats.saved_ms += max(0.0, head_start_until - draft.started_at) * 1000
+
+        return self._committed_stream(draft)
+
+    def cancel(self) -> None:
+        """Drop any pending draft, e.g. when the turn is cleared or the character switches."""
+
+        self._discard()
+        self._reset_interim()
+
+    async def _committed_stream(self, draft: _Draft) -> AsyncIterator[str]:
+        try:
+            async for delta in draft.stream():
+                yield delta
+        finally:
+            if self.on_commit is not None and draft.first_token_at is not None:
+                self.on_commit(
+                    draft.first_token_at - draft.started_at,
+                    draft.prompt_tokens,
+                    draft.tokens,
+                )
+
+    def _start(self, text: str) -> None:
+        self._cancel_timer()
+        self._draft = _Draft(text, self.draft_fn, self._clock)
+        self.stats.drafts_started += 1
+
+    def _on_stable(self, text: str) -> None:
+        # Only armed while no draft is pending, and cancelled when the interim changes.
+        self._timer = None
+        if self._draft is None:
+            self._start(text)
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _discard(self, draft: _Draft | None = None) -> None:
+        draft = draft or self._draft
+        if draft is None:
+            return
+
+        if draft is self._draft:
+            self._draft = None
+        draft.cancel()
+        self.stats.discarded += 1
+        self.stats.wasted_tokens += draft.tokens
+
+    def _reset_interim(self) -> None:
+        self._cancel_timer()
+        self._interim = ""
+        self._interim_seen = 0
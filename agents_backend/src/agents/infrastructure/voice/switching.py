@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from .metrics import VOICE_METRICS
+
+CONTROL_TRANSITIONS_TOTAL = VOICE_METRICS.counter(
+    "npc_control_transitions_total",
+    "Character switch and engagement packets by kind and outcome.",
+)
+
+
+@dataclass
+class SwitchStats:
+    received: int = 0
+    applied: int = 0
+    coalesced: int = 0
+    rate_limited: int = 0
+    engagement_received: int = 0
+    engagement_applied: int = 0
+    engagement_suppressed: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class SwitchDebouncer:
+    """Coalesce bursts of character-switch and engagement packets for one room.
+
+    A game client walking past several NPCs emits a burst of `character_switch`
+    packets. Only the last target of a burst is applied. A burst ends once no packet
+    arrived for `debounce_ms`, or `max_delay_ms` after it began, whichever comes
+    first. Applied switches are at most one per `min_interval_ms`, and a switch due
+    earlier is deferred.
+
+    Engaging is applied at once, so the player's first words are not dropped.
+    Disengaging waits `disengage_ms`. An off/on flicker that lands back on the same
+    character is suppressed entirely and never stops the current turn. Engaging a
+    different character while a disengage is pending applies both in order.
+
+    Args:
+        apply_switch (Callable[[str], None]): Applies a switch to a character token.
+        apply_engagement (Callable[[bool, str | None], None]): Applies an
+            engagement change, optionally naming the character.
+        engaged (Callable[[], tuple[bool, str | None]]): Returns whether the room
+            is engaged right now and the character it is locked to.
+        debounce_ms (float): Quiet period that ends a switch burst.
+        max_delay_ms (float): Longest a switch burst may be held back.
+        min_interval_ms (float): Minimum time between two applied switches.
+        disengage_ms (float): Delay before a disengage is applied.
+        clock (Callable[[], float]): Monotonic clock in seconds.
+    """
+
+    def __init__(
+        self,
+        apply_switch: Callable[[str], None],
+        apply_engagement: Callable[[bool, str | None], None],
+        engaged: Callable[[], tuple[bool, str | None]],
+        debounce_ms: float = 250,
+        max_delay_ms: float = 1000,
+        min_interval_ms: float = 1000,
+        disengage_ms: float = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.apply_switch = apply_switch
+        self.apply_engagement = apply_engagement
+        self.engaged = engaged
+        self.debounce = debounce_ms / 1000
+        self.max_delay = max_delay_ms / 1000
+        self.min_interval = min_interval_ms / 1000
+        self.disengage_delay = disengage_ms / 1000
+        self.stats = SwitchStats()
+        self._clock = clock
+
+        self._target: str | None = None
+        self._burst_started = 0.0
+        self._last_packet = 0.0
+        self._last_applied = float("-inf")
+        self._switch_timer: asyncio.TimerHandle | None = None
+        self._disengage_timer: asyncio.TimerHandle | None = None
+
+    def on_switch(self, token: str) -> None:
+        self.stats.received += 1
+        now = self._clock()
+        if self._target is not None:
+            self.stats.coalesced += 1
+            CONTROL_TRANSITIONS_TOTAL.inc(kind="switch", outcome="coalesced")
+        else:
+            self._burst_started = now
+        self._target = token
+        self._last_packet = now
+        self._schedule_switch()
+
+    def on_engagement(self, engaged: bool, token: str | None = None) -> None:
+        self.stats.engagement_received += 1
+        if not engaged:
+            if self._disengage_timer is not None:
+                self._suppress_engagement()
+                return
+            if not self.engaged()[0]:
+                self._suppress_engagement()
+                return
+            self._disengage_timer = asyncio.get_running_loop().call_later(
+                self.disengage_delay, self._fire_disengage
+            )
+            return
+
+        if self._disengage_timer is not None:
+            locked = self.engaged()[1]
+            if token is None or token == locked:
+                # Off then back on to the same character: neither ever happened.
+                self._disengage_timer.cancel()
+                self._disengage_timer = None
+                self._suppress_engagement(2)
+                return
+            self._fire_disengage()
+
+        if self._target is not None:
+            if token is not None:
+                # Engaging names the character, so the pending switch is moot.
+                self.stats.coalesced += 1
+                CONTROL_TRANSITIONS_TOTAL.inc(kind="switch", outcome="coalesced")
+                self._clear_switch()
+            else:
+                self._fire_switch()
+
+        self._apply_engagement(True, token)
+
+    def flush(self) -> None:
+        """Apply any held-back transition now, ignoring the rate bound."""
+
+        if self._disengage_timer is not None:
+            self._fire_disengage()
+        if self._target is not None:
+            self._fire_switch()
+
+    def cancel(self) -> None:
+        self._clear_switch()
+        if self._disengage_timer is not None:
+            self._disengage_timer.cancel()
+            self._disengage_timer = None
+
+    def _schedule_switch(self) -> None:
+        due = min(self._last_packet + self.debounce, self._burst_started + self.max_delay)
+        earliest = self._last_applied + self.min_interval
+        if earliest > due:
+            due = earliest
+            if self._switch_timer is None:
+                self.stats.rate_limited += 1
+                CONTROL_TRANSITIONS_TOTAL.inc(kind="switch", outcome="rate_limited")
+
+        if self._switch_timer is not None:
+            self._switch_timer.cancel()
+        self._switch_timer = asyncio.get_running_loop().call_later(
+            max(0.0, due - self._clock()), self._fire_switch
+        )
+
+    def _fire_switch(self) -> None:
+        target = self._target
+        self._clear_switch()
+        if target is None:
+            return
+
+        self._last_applied = self._clock()
+        self.stats.applied += 1
+        CONTROL_TRANSITIONS_TOTAL.inc(kind="switch", outcome="applied")
+        self.apply_switch(target)
+
+    def _clear_switch(self) -> None:
+        self._target = None
+        if self._switch_timer is not None:
+            self._switch_timer.cancel()
+            self._switch_timer = None
+
+    def _fire_disengage(self) -> None:
+        if self._disengage_timer is not None:
+            self._disengage_timer.cancel()
+            self._disengage_timer = None
+        self._apply_engagement(False, None)
+
+    def _apply_engagement(self, engaged: bool, token: str | None) -> None:
+        self.stats.engagement_applied += 1
+        CONTROL_TRANSITIONS_TOTAL.inc(kind="engagement", outcome="applied")
+        self.apply_engagement(engaged, token)
+
+    def _suppress_engagement(self, count: int = 1) -> None:
+        self.stats.engagement_suppressed += count
+        CONTROL_TRANSITIONS_TOTAL.inc(count, kind="engagement", outcome="suppressed")
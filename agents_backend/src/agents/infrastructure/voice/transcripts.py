@@ -0,0 +1,451 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, TextIO
+
+from loguru import logger
+
+
+@dataclass
+class _RoomHandle:
+    path: Path
+    file: TextIO
+    size: int
+    started_at: float
+    dirty: bool = False
+
+
+@dataclass
+class TranscriptWriterStats:
+    enqueued: int = 0
+    written: int = 0
+    dropped: int = 0
+    rotations: int = 0
+    fsyncs: int = 0
+    evictions: int = 0
+    rooms_opened: int = 0
+
+
+class TranscriptWriter:
+    """Buffered JSONL transcript sink that keeps disk I/O off the event loop.
+
+    `append` only serializes the record and puts it on a bounded queue. A background
+    task drains the queue in batches and hands the writes to a single-thread executor,
+    which owns the open file handles. Handles are kept per room in an LRU capped at
+    `max_open_files`, dirty files are fsynced every `fsync_interval` seconds and a
+    room's file is rotated once it exceeds `max_bytes` or `max_age_seconds`.
+    Counters in `stats` updated by the executor thread are guarded by a lock.
+
+    Args:
+        root (Path): Directory where `<room>.jsonl` files are written.
+        max_open_files (int): Maximum number of file handles kept open at once.
+        queue_size (int): Maximum number of records buffered in memory. Records
+            appended while the queue is full are dropped and counted.
+        batch_size (int): Maximum number of records written per executor hop.
+        fsync_interval (float): Seconds between fsyncs of files with pending writes.
+        max_bytes (int): Rotate a room's file once it grows past this size.
+        max_age_seconds (float): Rotate a room's file once it has been written to
+            for longer than this.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_open_files: int = 32,
+        queue_size: int = 10_000,
+        batch_size: int = 256,
+        fsync_interval: float = 5.0,
+        max_bytes: int = 16 * 1024 * 1024,
+        max_age_seconds: float = 24 * 60 * 60,
+    ) -> None:
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_open_files = max(1, max_open_files)
+        self.queue_size = queue_size
+        self.batch_size = max(1, batch_size)
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.stats = TranscriptWriterStats()
+
+        self._handles: OrderedDict[str, _RoomHandle] = OrderedDict()
+        self._segment_started: dict[str, float] = {}
+        self._stats_lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._last_fsync = time.monotonic()
+
+    def append(self, room_name: str, payload: dict[str, Any]) -> bool:
+        """Enqueue one transcript record without touching the disk.
+
+        Must be called from the event loop thread.
+
+        Args:
+            room_name (str): Room the record belongs to.
+            payload (dict[str, Any]): Record fields. A UTC `timestamp` is prepended.
+
+        Returns:
+            bool: False if the record was dropped because the queue is full.
+        """
+
+        ts = datetime.now(tz=timezone.utc).isoformat()
+        line = json.dumps({"timestamp": ts, **payload}, ensure_ascii=True) + "\n"
+
+        queue = self._ensure_started()
+        try:
+            queue.put_nowait(("write", room_name, line))
+        except asyncio.QueueFull:
+            with self._stats_lock:
+                self.stats.dropped += 1
+                dropped = self.stats.dropped
+            if dropped == 1 or dropped % 100 == 0:
+                logger.warning(f"Transcript queue full, dropped {dropped} records so far.")
+            return False
+
+        with self._stats_lock:
+            self.stats.enqueued += 1
+        return True
+
+    async def flush(self, room_name: str | None = None) -> None:
+        """Wait until every record queued so far is written and fsynced.
+
+        Args:
+            room_name (str | None): Only fsync this room's file. All rooms if None.
+        """
+
+        await self._control("flush", room_name)
+
+    async def close_room(self, room_name: str) -> None:
+        """Flush, fsync and close the file handle of a room whose session ended."""
+
+        await self._control("close", room_name)
+
+    async def aclose(self) -> None:
+        """Drain the queue, close every handle, stop the background task and the executor.
+
+        The writer can be used again afterwards; it starts a new task and executor.
+        """
+
+        if self._task is not None:
+            await self._control("close", None)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._queue = None
+
+        if self._executor is not None:
+            # Every handle is closed and no write is in flight, so this returns at once.
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = asyncio.get_running_loop().create_task(
+                self._run(), name="transcript-writer"
+            )
+
+        return self._queue
+
+    async def _control(self, op: str, room_name: str | None) -> None:
+        if self._task is None or self._task.done():
+            await self._offload(self._apply_control, op, room_name)
+            return
+
+        done = asyncio.get_running_loop().create_future()
+        # Control messages must not be dropped, so they wait for queue space.
+        await self._queue.put((op, room_name, done))
+        await done
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=self.fsync_interval)
+            except asyncio.TimeoutError:
+                await self._maybe_fsync()
+                continue
+
+            items = [item]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            pending: list[tuple[str, str]] = []
+            for op, room_name, arg in items:
+                if op == "write":
+                    pending.append((room_name, arg))
+                    continue
+
+                await self._write_pending(pending)
+                pending = []
+                try:
+                    await self._offload(self._apply_control, op, room_name)
+                except Exception as e:
+                    if not arg.done():
+                        arg.set_exception(e)
+                else:
+                    if not arg.done():
+                        arg.set_result(None)
+
+            await self._write_pending(pending)
+            await self._maybe_fsync()
+
+    async def _write_pending(self, pending: list[tuple[str, str]]) -> None:
+        if not pending:
+            return
+
+        try:
+            await self._offload(self._write_batch, pending)
+        except Exception as e:
+            logger.error(f"Failed to write {len(pending)} transcript records: {e}")
+
+    async def _maybe_fsync(self) -> None:
+        if time.monotonic() - self._last_fsync < self.fsync_interval:
+            return
+
+        try:
+            await self._offload(self._fsync_dirty, None)
+        except Exception as e:
+            logger.error(f"Failed to fsync transcript files: {e}")
+        self._last_fsync = time.monotonic()
+
+    async def _offload(self, fn, *args) -> Any:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="transcript-writer"
+            )
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, fn, *args
+        )
+
+    # --- Executor thread only below this line ---
+
+    def _write_batch(self, pending: list[tuple[str, str]]) -> None:
+        for room_name, line in pending:
+            handle = self._get_handle(room_name)
+            handle.file.write(line)
+            handle.size += len(line)
+            handle.dirty = True
+            with self._stats_lock:
+                self.stats.written += 1
+
+    def _apply_control(self, op: str, room_name: str | None) -> None:
+        rooms = [room_name] if room_name is not None else list(self._handles)
+        for name in rooms:
+            handle = self._handles.get(name)
+            if handle is None:
+                continue
+            self._sync(handle)
+            if op == "close":
+                handle.file.close()
+                del self._handles[name]
+                self._segment_started.pop(name, None)
+
+    def _fsync_dirty(self, _: None) -> None:
+        for handle in self._handles.values():
+            if handle.dirty:
+                self._sync(handle)
+
+    def _sync(self, handle: _RoomHandle) -> None:
+        handle.file.flush()
+        os.fsync(handle.file.fileno())
+        handle.dirty = False
+        with self._stats_lock:
+            self.stats.fsyncs += 1
+
+    def _get_handle(self, room_name: str) -> _RoomHandle:
+        handle = self._handles.get(room_name)
+        if handle is not None:
+            self._handles.move_to_end(room_name)
+            if self._should_rotate(handle):
+                self._rotate(room_name, handle)
+                handle = self._handles[room_name]
+            return handle
+
+        while len(self._handles) >= self.max_open_files:
+            _, evicted = self._handles.popitem(last=False)
+            self._sync(evicted)
+            evicted.file.close()
+            with self._stats_lock:
+                self.stats.evictions += 1
+
+        path = self.root / f"{room_name}.jsonl"
+        file = path.open("a", encoding="utf-8")
+        if room_name not in self._segment_started:
+            with self._stats_lock:
+                self.stats.rooms_opened += 1
+        started_at = self._segment_started.setdefault(room_name, time.time())
+        handle = _RoomHandle(
+            path=path, file=file, size=file.tell(), started_at=started_at
+        )
+        self._handles[room_name] = handle
+        if self._should_rotate(handle):
+            self._rotate(room_name, handle)
+            handle = self._handles[room_name]
+
+        return handle
+
+    def _should_rotate(self, handle: _RoomHandle) -> bool:
+        if handle.size == 0:
+            return False
+
+        return (
+            handle.size >= self.max_bytes
+            or time.time() - handle.started_at >= self.max_age_seconds
+        )
+
+    def _rotate(self, room_name: str, handle: _RoomHandle) -> None:
+        self._sync(handle)
+        handle.file.close()
+
+        stamp = datetime.now(tz=timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        handle.path.rename(self.root / f"{room_name}.{stamp}.jsonl")
+        with self._stats_lock:
+            self.stats.rotations += 1
+
+        file = handle.path.open("a", encoding="utf-8")
+        now = time.time()
+        self._segment_started[room_name] = now
+        self._handles[room_name] = _RoomHandle(
+            path=handle.path, file=file, size=0, started_at=now
+        )
+
+
+# Suffix `TranscriptWriter._rotate` appends to the room name of a rotated segment.
+_ROTATION_STAMP = re.compile(r"\.\d{8}T\d{12}$")
+
+
+def room_from_transcript_path(path: Path) -> str:
+    """`<room>.jsonl` and its rotated `<room>.<stamp>.jsonl` segments share one room.
+
+    Only the `.jsonl` suffix and a trailing rotation stamp are removed, so room names
+    containing dots, e.g. `game.lobby`, are kept whole.
+    """
+
+    name = path.name.removesuffix(".jsonl")
+    return _ROTATION_STAMP.sub("", name)
+
+
+# Leading bytes of a file hashed to tell it apart from a new file reusing its inode.
+HEAD_BYTES = 256
+
+
+def head_digest(path: Path, offset: int) -> str:
+    """Hash of the first `min(offset, HEAD_BYTES)` bytes of `path`.
+
+    Records start with a timestamp, so two transcript files sharing an inode over time
+    differ in their first bytes.
+    """
+
+    with path.open("rb") as f:
+        return hashlib.sha256(f.read(min(offset, HEAD_BYTES))).hexdigest()
+
+
+@dataclass(frozen=True)
+class TranscriptLine:
+    room: str
+    record: dict[str, Any]
+
+
+class TranscriptTailer:
+    """Incrementally read new records from a directory of JSONL transcripts.
+
+    Byte offsets are tracked per file identity (device and inode) rather than per path,
+    so a file renamed by `TranscriptWriter` rotation is not read twice. Each offset is
+    stored with a `head_digest` of the file; when a file grows but its head no longer
+    matches, the inode was reused by a new file, which is read from the start. Offsets
+    of files that no longer exist are dropped. Only complete lines are consumed; a
+    partially written last line is picked up on the next poll.
+    Offsets reached by `poll` are persisted only when `commit` is called, which gives
+    at-least-once delivery to the caller.
+
+    Args:
+        root (Path): Directory containing the `*.jsonl` transcripts.
+        state_path (Path): JSON file where committed offsets are stored.
+    """
+
+    def __init__(self, root: Path, state_path: Path) -> None:
+        self.root = root
+        self.state_path = state_path
+        self._offsets: dict[str, dict[str, Any]] = {}
+        self._pending: dict[str, dict[str, Any]] = {}
+        if state_path.exists():
+            self._offsets = json.loads(state_path.read_text(encoding="utf-8"))
+
+    def poll(self, max_lines: int | None = None) -> list[TranscriptLine]:
+        lines: list[TranscriptLine] = []
+        files: list[tuple[Path, str, int]] = []
+        for path in sorted(self.root.glob("*.jsonl")):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((path, f"{stat.st_dev}:{stat.st_ino}", stat.st_size))
+
+        live = {file_id for _, file_id, _ in files}
+        self._pending = {k: dict(v) for k, v in self._offsets.items() if k in live}
+
+        for path, file_id, size in files:
+            if max_lines is not None and len(lines) >= max_lines:
+                break
+
+            entry = self._pending.get(file_id, {"offset": 0})
+            if size == entry["offset"]:
+                continue
+            if size < entry["offset"] or (
+                # Offsets committed before heads were stored are trusted as they are.
+                "head" in entry and entry["head"] != head_digest(path, entry["offset"])
+            ):
+                # Truncated or inode reused by a new file.
+                entry = {"offset": 0}
+
+            room = room_from_transcript_path(path)
+            offset = entry["offset"]
+            with path.open("rb") as f:
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break
+                    offset += len(raw)
+                    try:
+                        record = json.loads(raw)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping malformed transcript line in {path}")
+                        continue
+                    lines.append(TranscriptLine(room=room, record=record))
+                    if max_lines is not None and len(lines) >= max_lines:
+                        break
+
+            self._pending[file_id] = {
+                "path": path.name,
+                "offset": offset,
+                "head": head_digest(path, offset),
+            }
+
+        return lines
+
+    def commit(self) -> None:
+        self._offsets = self._pending
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(self.state_path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(self._offsets, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
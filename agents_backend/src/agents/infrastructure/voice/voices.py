@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Generic, Iterable, TypeVar
+
+TTSClient = TypeVar("TTSClient")
+
+
+@dataclass(frozen=True)
+class VoiceConfig:
+    """Resolved TTS settings for one character voice.
+
+    Args:
+        voice_id (str): ElevenLabs voice id.
+        model (str): ElevenLabs model id.
+        streaming_latency (int | None): ElevenLabs `optimize_streaming_latency` level.
+            Plugin default if None.
+        auto_mode (bool | None): ElevenLabs websocket auto mode. Plugin default if None.
+    """
+
+    voice_id: str
+    model: str
+    streaming_latency: int | None = None
+    auto_mode: bool | None = None
+
+    def tts_kwargs(self) -> dict[str, Any]:
+        kwargs: dict[str, Any] = {"voice_id": self.voice_id, "model": self.model}
+        if self.streaming_latency is not None:
+            kwargs["streaming_latency"] = self.streaming_latency
+        if self.auto_mode is not None:
+            kwargs["auto_mode"] = self.auto_mode
+
+        return kwargs
+
+
+def load_voice_configs(
+    agent_info_path: Path,
+    default_voice_id: str,
+    model: str,
+    streaming_latency: int | None = None,
+    auto_mode: bool | None = None,
+) -> dict[str, VoiceConfig]:
+    """Resolve the voice of every character listed in `agent_info.json`.
+
+    Characters without a `voice_id` fall back to `default_voice_id`.
+
+    Returns:
+        dict[str, VoiceConfig]: Voice configuration keyed by lower-cased character token.
+    """
+
+    with agent_info_path.open("r", encoding="utf-8") as file:
+        raw = json.load(file)
+
+    configs: dict[str, VoiceConfig] = {}
+    for entries in raw.values():
+        for entry in entries:
+            token = str(entry.get("id", "")).strip().lower()
+            if not token:
+                continue
+
+            voice_id = str(entry.get("voice_id") or "").strip() or default_voice_id
+            configs[token] = VoiceConfig(
+                voice_id=voice_id,
+                model=model,
+                streaming_latency=streaming_latency,
+                auto_mode=auto_mode,
+            )
+
+    return configs
+
+
+class VoiceRegistry(Generic[TTSClient]):
+    """Per-process cache of TTS clients, one per distinct voice configuration.
+
+    Characters that share a voice share the same client, so its connection pool stays
+    warm for all of them. Every client is built up front by `warm`, which keeps the
+    character switch path down to two dict lookups.
+
+    Args:
+        configs (dict[str, VoiceConfig]): Voice configuration keyed by character token.
+        factory (Callable[[VoiceConfig], TTSClient]): Builds a TTS client for a voice.
+        default (VoiceConfig): Voice used for tokens missing from `configs`.
+    """
+
+    def __init__(
+        self,
+        configs: dict[str, VoiceConfig],
+        factory: Callable[[VoiceConfig], TTSClient],
+        default: VoiceConfig,
+    ) -> None:
+        self.configs = configs
+        self.factory = factory
+        self.default = default
+        self._clients: dict[VoiceConfig, TTSClient] = {}
+
+    def config(self, token: str) -> VoiceConfig:
+        return self.configs.get(token, self.default)
+
+    def client(self, config: VoiceConfig) -> TTSClient:
+        client = self._clients.get(config)
+        if client is None:
+            client = self._clients[config] = self.factory(config)
+
+        return client
+
+    def tts(self, token: str) -> TTSClient:
+        return self.client(self.config(token))
+
+    def warm(self, tokens: Iterable[str] | None = None) -> None:
+        self.client(self.default)
+        for token in tokens if tokens is not None else self.configs:
+            self.tts(token)
+
+    def clients(self) -> list[TTSClient]:
+        return list(self._clients.values())
@@ -0,0 +1,164 @@
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+import click
+from loguru import logger
+
+from agents.application.data.deduplicate_documents import (
+    MinHashDeduplicator,
+    cluster_keepers,
+)
+
+try:
+    from datasketch import MinHash, MinHashLSH
+except ImportError:
+    MinHash = MinHashLSH = None
+
+
+def make_corpus(
+    chunks: int, words: int, duplicate_rate: float, seed: int
+) -> tuple[list[str], set[tuple[int, int]]]:
+    """Return synthetic chunks and the `(original, copy)` pairs planted in them.
+
+    Originals are random draws from a 20k-word vocabulary. `duplicate_rate` of
+    them get a copy with about 2% of the words replaced.
+    """
+
+    generator = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(20000)]
+    nb_copies = int(chunks * duplicate_rate)
+    texts = [" ".join(generator.choices(vocabulary, k=words)) for _ in range(chunks - nb_copies)]
+
+    planted = set()
+    for _ in range(nb_copies):
+        original = generator.randrange(chunks - nb_copies)
+        copy = texts[original].split()
+        for _ in range(max(1, words // 50)):
+            copy[generator.randrange(words)] = generator.choice(vocabulary)
+        texts.append(" ".join(copy))
+        planted.add((original, len(texts) - 1))
+
+    return texts, planted
+
+
+def run_datasketch(texts: list[str], threshold: float, num_perm: int) -> int:
+    """The previous implementation: one `MinHash.update` per shingle, one LSH query per chunk."""
+
+    minhashes = []
+    for text in texts:
+        minhash = MinHash(num_perm=num_perm)
+        words = re.findall(r"\w+", text.lower())
+        for i in range(len(words) - 2):
+            minhash.update(" ".join(words[i : i + 3]).encode("utf-8"))
+        minhashes.append(minhash)
+
+    lsh = MinHashLSH(threshold=threshold, num_perm=num_perm)
+    for i, minhash in enumerate(minhashes):
+        lsh.insert(i, minhash)
+
+    pairs = set()
+    for i, minhash in enumerate(minhashes):
+        for j in lsh.query(minhash):
+            if j != i and minhash.jaccard(minhashes[j]) >= threshold:
+                pairs.add((min(i, j), max(i, j)))
+
+    return len(pairs)
+
+
+@click.command()
+@click.option("--chunks", type=int, default=100_000, help="Number of synthetic chunks.")
+@click.option("--words", type=int, default=150, help="Words per chunk.")
+@click.option("--duplicate-rate", type=float, default=0.05, help="Share of chunks that are near-duplicates.")
+@click.option("--threshold", type=float, default=0.7)
+@click.option("--num-perm", type=int, default=128)
+@click.option(
+    "--baseline-chunks",
+    type=int,
+    default=5000,
+    help="Chunks given to the datasketch baseline, 0 to skip it.",
+)
+@click.option("--seed", type=int, default=0)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write the results as JSON to this file.",
+)
+def main(
+    chunks: int,
+    words: int,
+    duplicate_rate: float,
+    threshold: float,
+    num_perm: int,
+    baseline_chunks: int,
+    seed: int,
+    output: Path | None,
+) -> None:
+    """Benchmark MinHash deduplication throughput and recall on synthetic chunks.
+
+    Args:
+        chunks: Number of synthetic chunks.
+        words: Words per chunk.
+        duplicate_rate: Share of chunks that are near-duplicates of another one.
+        threshold: Jaccard similarity above which chunks are duplicates.
+        num_perm: Number of MinHash permutations.
+        baseline_chunks: Chunks given to the datasketch baseline, 0 to skip it.
+        seed: Seed of the synthetic corpus.
+        output: Write the results as JSON to this file.
+    """
+
+    texts, planted = make_corpus(chunks, words, duplicate_rate, seed)
+    logger.info(f"Generated {len(texts)} chunks with {len(planted)} planted near-duplicates.")
+
+    deduplicator = MinHashDeduplicator(threshold=threshold, num_perm=num_perm)
+    started = time.perf_counter()
+    signatures = deduplicator.signatures(texts)
+    signed = time.perf_counter()
+    duplicates = deduplicator.find_duplicates(signatures)
+    paired = time.perf_counter()
+    keepers = cluster_keepers([len(text) for text in texts], duplicates)
+    clustered = time.perf_counter()
+
+    found = {(i, j) for i, j, _ in duplicates}
+    results = {
+        "chunks": len(texts),
+        "bands": deduplicator.bands,
+        "rows": deduplicator.rows,
+        "signature_seconds": round(signed - started, 2),
+        "pair_seconds": round(paired - signed, 2),
+        "cluster_seconds": round(clustered - paired, 2),
+        "chunks_per_second": round(len(texts) / (clustered - started)),
+        "duplicate_pairs": len(duplicates),
+        "planted_recall": round(len(found & planted) / len(planted), 4) if planted else None,
+        "kept": len(keepers),
+    }
+
+    if baseline_chunks and MinHash is None:
+        logger.warning("datasketch is not installed, skipping the baseline.")
+    elif baseline_chunks:
+        sample = texts[:baseline_chunks]
+        started = time.perf_counter()
+        run_datasketch(sample, threshold, num_perm)
+        baseline_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        deduplicator.find_duplicates(deduplicator.signatures(sample))
+        vectorized_seconds = time.perf_counter() - started
+
+        results["baseline_chunks"] = len(sample)
+        results["baseline_chunks_per_second"] = round(len(sample) / baseline_seconds)
+        results["speedup"] = round(baseline_seconds / vectorized_seconds, 1)
+
+    for name, value in results.items():
+        click.echo(f"{name:>28}  {value}")
+
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
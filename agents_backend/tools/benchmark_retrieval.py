@@ -0,0 +1,182 @@
+import json
+import time
+from pathlib import Path
+from typing import Callable
+
+import click
+import numpy as np
+from langchain_core.documents import Document
+from langchain_mongodb.retrievers import MongoDBAtlasHybridSearchRetriever
+from loguru import logger
+
+from agents.application.rag import HybridRetriever, get_retriever
+from agents.config import settings
+
+
+def load_queries(data_path: Path, nb_samples: int | None) -> list[tuple[str, str]]:
+    """Return `(philosopher_id, question)` for every user turn of the evaluation samples."""
+
+    samples = json.loads(data_path.read_text(encoding="utf-8"))["samples"]
+    if nb_samples:
+        samples = samples[:nb_samples]
+
+    return [
+        (sample["philosopher_id"], message["content"])
+        for sample in samples
+        for message in sample["messages"]
+        if message["role"] == "user"
+    ]
+
+
+def run_benchmark(
+    name: str,
+    search: Callable[[str], list[Document]],
+    queries: list[tuple[str, str]],
+    k: int,
+) -> dict:
+    """Time `search` over `queries` and score it against the asking philosopher.
+
+    A retrieved chunk is relevant when its `philosopher_id` is the philosopher the
+    question was asked to. recall@k is the share of questions with at least one
+    relevant chunk in the top k. precision@k is the share of relevant chunks.
+    """
+
+    latencies = []
+    hits = relevant = 0
+    for philosopher_id, query in queries:
+        started = time.perf_counter()
+        documents = search(query)[:k]
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        matches = sum(d.metadata.get("philosopher_id") == philosopher_id for d in documents)
+        hits += matches > 0
+        relevant += matches
+
+    return {
+        "retriever": name,
+        "queries": len(queries),
+        f"recall@{k}": round(hits / len(queries), 3),
+        f"precision@{k}": round(relevant / (len(queries) * k), 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+    }
+
+
+@click.command()
+@click.option(
+    "--data-path",
+    type=click.Path(exists=True, path_type=Path),
+    default=settings.EVALUATION_DATASET_FILE_PATH,
+    help="Path to the evaluation dataset file.",
+)
+@click.option("--nb-samples", type=int, default=None, help="Number of samples to use. All by default.")
+@click.option("--k", type=int, default=settings.RAG_TOP_K, help="Documents retrieved per query.")
+@click.option("--vector-weight", type=float, default=settings.RAG_HYBRID_VECTOR_WEIGHT)
+@click.option("--fulltext-weight", type=float, default=settings.RAG_HYBRID_FULLTEXT_WEIGHT)
+@click.option("--rrf-k", type=int, default=settings.RAG_HYBRID_RRF_K)
+@click.option("--candidates", type=int, default=settings.RAG_HYBRID_CANDIDATES)
+@click.option(
+    "--atlas/--no-atlas",
+    default=False,
+    help="Also benchmark the MongoDB Atlas vector and hybrid retrievers.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write the results as JSON to this file.",
+)
+def main(
+    data_path: Path,
+    nb_samples: int | None,
+    k: int,
+    vector_weight: float,
+    fulltext_weight: float,
+    rrf_k: int,
+    candidates: int,
+    atlas: bool,
+    output: Path | None,
+) -> None:
+    """Benchmark local vector, BM25 and hybrid retrieval, optionally against Atlas.
+
+    The local index is the one written by `create_long_term_memory.py` with
+    `RAG_VECTOR_BACKEND=local`. Every query is embedded once before timing, so
+    latencies measure search alone and are comparable across backends.
+
+    Args:
+        data_path: Path to the evaluation dataset file.
+        nb_samples: Number of samples to use.
+        k: Documents retrieved per query.
+        vector_weight: Weight of the vector ranking in the fused ranking.
+        fulltext_weight: Weight of the BM25 ranking in the fused ranking.
+        rrf_k: Reciprocal rank fusion offset.
+        candidates: Documents taken from each ranking before fusion.
+        atlas: Also benchmark the MongoDB Atlas retrievers.
+        output: Write the results as JSON to this file.
+    """
+
+    queries = load_queries(data_path, nb_samples)
+    local = get_retriever(
+        embedding_model_id=settings.RAG_TEXT_EMBEDDING_MODEL_ID,
+        k=k,
+        device=settings.RAG_DEVICE,
+        backend="local",
+    )
+    store = local.vectorstore
+    if len(store) == 0:
+        raise click.ClickException(
+            f"The local index at {store.path} is empty. Run create_long_term_memory.py with RAG_VECTOR_BACKEND=local first."
+        )
+
+    logger.info(f"Embedding {len(queries)} queries over {len(store)} chunks.")
+    for _, query in queries:
+        store.embeddings.embed_query(query)
+
+    hybrid = HybridRetriever(
+        store,
+        top_k=k,
+        vector_weight=vector_weight,
+        fulltext_weight=fulltext_weight,
+        rrf_k=rrf_k,
+        candidates=candidates,
+    )
+    retrievers: dict[str, Callable[[str], list[Document]]] = {
+        "local-vector": local.invoke,
+        "local-bm25": lambda query: store.keyword_search(query, k=k),
+        "local-hybrid": hybrid.invoke,
+    }
+    if atlas:
+        atlas_retriever = get_retriever(
+            embedding_model_id=settings.RAG_TEXT_EMBEDDING_MODEL_ID,
+            k=k,
+            device=settings.RAG_DEVICE,
+            backend="atlas",
+        )
+        atlas_hybrid = MongoDBAtlasHybridSearchRetriever(
+            vectorstore=atlas_retriever.vectorstore,
+            search_index_name=atlas_retriever.search_index_name,
+            top_k=k,
+            vector_penalty=50,
+            fulltext_penalty=50,
+        )
+        retrievers["atlas-vector"] = atlas_retriever.invoke
+        retrievers["atlas-hybrid"] = atlas_hybrid.invoke
+
+    results = []
+    for name, search in retrievers.items():
+        # One untimed query loads indexes and opens connections.
+        search(queries[0][1])
+        results.append(run_benchmark(name, search, queries, k))
+
+    columns = list(results[0])
+    click.echo("  ".join(f"{column:>14}" for column in columns))
+    for result in results:
+        click.echo("  ".join(f"{result[column]!s:>14}" for column in columns))
+
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
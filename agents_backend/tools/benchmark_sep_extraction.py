@@ -0,0 +1,178 @@
+import json
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+from bs4 import BeautifulSoup
+from loguru import logger
+
+from agents.application.data import HttpCache
+from agents.application.data.extract import (
+    EXCLUDED_SECTIONS,
+    extract_paragraphs_and_headers,
+)
+from agents.config import settings
+
+# Checked on every run. Whitespace-only strings between inline tags are collapsed by
+# BeautifulSoup outside `pre` and `textarea`, which the single-pass extractor must match.
+FIXTURE_PAGES = {
+    "fixture:indented-inline-markup": """<html><head><title>
+  Aristotle (Stanford Encyclopedia of Philosophy)
+</title></head><body>
+<div id="main-text">
+  <h2>1. <a href="#Life">Life</a></h2>
+  <p>Aristotle
+    <em>Metaphysics</em>
+      <a href="#n1">1</a>
+    <!-- note -->   <span>  </span>
+  </p>
+  <pre>
+    <code>  kept   as is  </code>
+  </pre>
+  <p>Text&nbsp;with <b>entities</b> &amp;
+  <i>	</i> tabs</p>
+</div>
+<div id="bibliography"><p>Excluded <em>entry</em></p></div>
+</body></html>""",
+}
+
+
+def legacy_extract_paragraphs_and_headers(soup: BeautifulSoup) -> str:
+    """The previous extractor: four full-tree searches per excluded section, then one for the content."""
+
+    for section_name in EXCLUDED_SECTIONS:
+        for section in soup.find_all(id=section_name):
+            section.decompose()
+
+        for section in soup.find_all(class_=section_name):
+            section.decompose()
+
+        for section in soup.find_all(
+            lambda tag: tag.has_attr("id") and section_name in tag["id"].lower()
+        ):
+            section.decompose()
+
+        for section in soup.find_all(
+            lambda tag: tag.has_attr("class")
+            and any(section_name in cls.lower() for cls in tag["class"])
+        ):
+            section.decompose()
+
+    content = []
+    for element in soup.find_all(["p", "h1", "h2", "h3", "h4", "h5", "h6"]):
+        content.append(element.get_text())
+
+    return "\n\n".join(content)
+
+
+def load_pages(cache_dir: Path, html_dir: Path | None) -> dict[str, str]:
+    """Return the fixture pages, the cached Stanford Encyclopedia pages by URL and the
+    `.html` files of `html_dir`.
+    """
+
+    cache = HttpCache(cache_dir)
+    pages = dict(FIXTURE_PAGES)
+    if cache_dir.exists():
+        for url in cache.urls():
+            if "plato.stanford.edu" in url:
+                meta, body = cache.get(url)
+                pages[url] = body.decode(meta.get("encoding") or "utf-8", errors="replace")
+    if html_dir is not None:
+        for path in sorted(html_dir.glob("*.html")):
+            pages[str(path)] = path.read_text(encoding="utf-8", errors="replace")
+
+    return pages
+
+
+def percentile_ms(seconds: list[float], q: int) -> float:
+    return round(float(np.percentile(seconds, q)) * 1000, 2)
+
+
+@click.command()
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=settings.EXTRACTION_CACHE_DIR,
+    help="Extraction page cache, filled by create_long_term_memory.py.",
+)
+@click.option(
+    "--html-dir",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    default=None,
+    help="Also benchmark the .html files of this directory.",
+)
+@click.option("--repeat", type=int, default=3, help="Runs per page; the fastest is kept.")
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write the results as JSON to this file.",
+)
+def main(cache_dir: Path, html_dir: Path | None, repeat: int, output: Path | None) -> None:
+    """Benchmark the single-pass SEP extractor against the previous BeautifulSoup one.
+
+    Both run on the same cached pages. The legacy time includes parsing the page
+    into a soup, which the single-pass extractor does not need, and is also
+    reported without it. Pages where the two extract different text are counted.
+
+    Args:
+        cache_dir: Extraction page cache, filled by create_long_term_memory.py.
+        html_dir: Also benchmark the .html files of this directory.
+        repeat: Runs per page; the fastest is kept.
+        output: Write the results as JSON to this file.
+    """
+
+    pages = load_pages(cache_dir, html_dir)
+    if len(pages) == len(FIXTURE_PAGES):
+        logger.warning(
+            f"No Stanford Encyclopedia pages cached in {cache_dir}, only checking the fixture pages. "
+            "Run create_long_term_memory.py first."
+        )
+    logger.info(f"Benchmarking {len(pages)} pages, best of {repeat} runs.")
+
+    legacy_parse, legacy_strip, single_pass = [], [], []
+    mismatches = 0
+    for url, html in pages.items():
+        parse_times, strip_times, single_times = [], [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            soup = BeautifulSoup(html, "html.parser")
+            parsed = time.perf_counter()
+            legacy_text = legacy_extract_paragraphs_and_headers(soup)
+            parse_times.append(parsed - started)
+            strip_times.append(time.perf_counter() - parsed)
+
+            started = time.perf_counter()
+            text, _ = extract_paragraphs_and_headers(html)
+            single_times.append(time.perf_counter() - started)
+
+        legacy_parse.append(min(parse_times))
+        legacy_strip.append(min(strip_times))
+        single_pass.append(min(single_times))
+        if text != legacy_text:
+            mismatches += 1
+            logger.warning(f"Extracted text differs for {url}")
+
+    legacy = [parse + strip for parse, strip in zip(legacy_parse, legacy_strip)]
+    results = {
+        "pages": len(pages),
+        "legacy_p50_ms": percentile_ms(legacy, 50),
+        "legacy_p95_ms": percentile_ms(legacy, 95),
+        "legacy_strip_p50_ms": percentile_ms(legacy_strip, 50),
+        "single_pass_p50_ms": percentile_ms(single_pass, 50),
+        "single_pass_p95_ms": percentile_ms(single_pass, 95),
+        "speedup": round(sum(legacy) / sum(single_pass), 1),
+        "mismatches": mismatches,
+    }
+
+    for name, value in results.items():
+        click.echo(f"{name:>20}  {value}")
+
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
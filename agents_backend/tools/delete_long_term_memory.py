@@ -1,9 +1,9 @@
 import click
 from loguru import logger
-from pymongo import MongoClient
 from pymongo.database import Database
 
 from agents.config import settings
+from agents.infrastructure.mongo import get_client_registry
 
 
 @click.command()
@@ -33,11 +33,10 @@ def main(collection_name: str, mongo_uri: str, db_name: str) -> None:
         mongo_uri: The MongoDB connection URI string.
         db_name: The name of the database containing the collection.
     """
-    # Create MongoDB client
-    client = MongoClient(mongo_uri)
+    registry = get_client_registry()
 
     # Get database
-    db: Database = client[db_name]
+    db: Database = registry.database(db_name, mongo_uri)
 
     # Delete collection if it exists
     if collection_name in db.list_collection_names():
@@ -47,7 +46,7 @@ def main(collection_name: str, mongo_uri: str, db_name: str) -> None:
         logger.info(f"'{collection_name}' collection does not exist.")
 
     # Close the connection
-    client.close()
+    registry.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+import time
+from pathlib import Path
+
+import click
+from loguru import logger
+
+from agents.application.interaction_memory import InteractionMemoryIngestor
+from agents.config import settings
+
+
+@click.command()
+@click.option(
+    "--transcripts-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=settings.CALL_TRANSCRIPTS_DIR_PATH,
+    help="Directory holding the call transcript JSONL files.",
+)
+@click.option(
+    "--state-file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=settings.TRANSCRIPT_INGESTION_STATE_FILE_PATH,
+    help="Where the ingested byte offsets of each transcript file are stored.",
+)
+@click.option(
+    "--follow",
+    is_flag=True,
+    help="Keep running and ingest new transcript lines as they are written.",
+)
+@click.option(
+    "--interval",
+    type=float,
+    default=5.0,
+    help="Seconds between polls when following.",
+)
+@click.option(
+    "--max-lines",
+    type=int,
+    default=None,
+    help="Maximum transcript lines ingested per poll.",
+)
+def main(
+    transcripts_dir: Path,
+    state_file: Path,
+    follow: bool,
+    interval: float,
+    max_lines: int | None,
+) -> None:
+    """CLI command to ingest call transcripts into the per-character interaction memory.
+
+    Args:
+        transcripts_dir: Directory holding the call transcript JSONL files.
+        state_file: Where the ingested byte offsets of each transcript file are stored.
+        follow: Keep running and ingest new transcript lines as they are written.
+        interval: Seconds between polls when following.
+        max_lines: Maximum transcript lines ingested per poll.
+    """
+
+    ingestor = InteractionMemoryIngestor.build_from_settings(
+        transcripts_dir=transcripts_dir, state_path=state_file
+    )
+    ingestor.create_index()
+
+    while True:
+        try:
+            upserted = ingestor(max_lines=max_lines)
+        except Exception as e:
+            if not follow:
+                raise
+            logger.error(f"Transcript ingestion pass failed, retrying: {e}")
+            upserted = 0
+
+        if not follow:
+            break
+        # A full batch means there is a backlog, so poll again immediately.
+        if max_lines is None or upserted == 0:
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,38 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
+import time
 from dataclasses import dataclass
-from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator
 
 from dotenv import load_dotenv
 
 from livekit import agents, rtc
 from livekit.agents import Agent, AgentServer, AgentSession, room_io
+from livekit.agents import metrics as lk_metrics
 from livekit.plugins import deepgram, elevenlabs, noise_cancellation, silero
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from agents.infrastructure.voice import (
+    AudioCache,
+    CachedAudio,
+    SessionCostSampler,
+    SpeculativeReplies,
+    SwitchDebouncer,
+    TranscriptWriter,
+    TurnTracer,
+    VOICE_METRICS,
+    VoiceConfig,
+    VoiceRegistry,
+    WorkerLoad,
+    load_prerender_lines,
+    load_voice_configs,
+)
+
 _ROOT = Path(__file__).resolve().parent.parent
 load_dotenv(_ROOT / '.env.local')
 load_dotenv(_ROOT / '.env')
@@ -23,8 +41,34 @@ _AGENT_INFO_PATH = _ROOT / 'src' / 'agents' / 'agent_info' / 'agent_info.json'
 _DEFAULT_CHARACTER_TOKEN = os.getenv('NPC_DEFAULT_CHARACTER_TOKEN', 'common1').strip().lower()
 # ElevenLabs LiveKit plugin expects voice_id, not voice name.
 _DEFAULT_VOICE_ID = os.getenv('NPC_DEFAULT_VOICE_ID', '7DkaWvcqvBstUe3167oW').strip() or '7DkaWvcqvBstUe3167oW'
+_TTS_MODEL = os.getenv('NPC_TTS_MODEL', 'eleven_monolingual_v1').strip() or 'eleven_monolingual_v1'
+_TTS_STREAMING_LATENCY = os.getenv('NPC_TTS_STREAMING_LATENCY', '').strip()
+_TTS_AUTO_MODE = os.getenv('NPC_TTS_AUTO_MODE', '').strip().lower()
 _AUTO_GREET = os.getenv('NPC_AUTO_GREET', 'false').strip().lower() == 'true'
+# Opt-in: start the LLM reply on stable interim transcripts, commit it if the final text matches.
+_SPECULATIVE_REPLIES = os.getenv('NPC_SPECULATIVE_REPLIES', 'false').strip().lower() == 'true'
+_SPECULATIVE_DIVERGENCE = float(os.getenv('NPC_SPECULATIVE_DIVERGENCE', '0.2'))
+_SPECULATIVE_STABLE_MS = float(os.getenv('NPC_SPECULATIVE_STABLE_MS', '300'))
+# Capacity: one job process per room; the worker stops taking jobs at NPC_MAX_SESSIONS or CPU saturation.
+_MAX_SESSIONS = int(os.getenv('NPC_MAX_SESSIONS', '0'))
+_LOAD_THRESHOLD = float(os.getenv('NPC_LOAD_THRESHOLD', '0.75'))
+_IDLE_PROCESSES = int(os.getenv('NPC_IDLE_PROCESSES', '2'))
+_JOB_MEMORY_WARN_MB = float(os.getenv('NPC_JOB_MEMORY_WARN_MB', '500'))
+_JOB_MEMORY_LIMIT_MB = float(os.getenv('NPC_JOB_MEMORY_LIMIT_MB', '0'))
+# Character switching: a burst of switch packets settles after NPC_SWITCH_DEBOUNCE_MS (at most
+# NPC_SWITCH_MAX_DELAY_MS), switches are at least NPC_SWITCH_MIN_INTERVAL_MS apart per room, and a
+# disengage waits NPC_DISENGAGE_DEBOUNCE_MS so an off/on flicker does not interrupt the reply.
+_SWITCH_DEBOUNCE_MS = float(os.getenv('NPC_SWITCH_DEBOUNCE_MS', '250'))
+_SWITCH_MAX_DELAY_MS = float(os.getenv('NPC_SWITCH_MAX_DELAY_MS', '1000'))
+_SWITCH_MIN_INTERVAL_MS = float(os.getenv('NPC_SWITCH_MIN_INTERVAL_MS', '1000'))
+_DISENGAGE_DEBOUNCE_MS = float(os.getenv('NPC_DISENGAGE_DEBOUNCE_MS', '300'))
+_TRANSCRIPT_MAX_OPEN_FILES = int(os.getenv('NPC_TRANSCRIPT_MAX_OPEN_FILES', '32'))
+_TRANSCRIPT_FSYNC_SECONDS = float(os.getenv('NPC_TRANSCRIPT_FSYNC_SECONDS', '5'))
+_TRANSCRIPT_ROTATE_MB = float(os.getenv('NPC_TRANSCRIPT_ROTATE_MB', '16'))
+_TRANSCRIPT_ROTATE_HOURS = float(os.getenv('NPC_TRANSCRIPT_ROTATE_HOURS', '24'))
 _LOGGER_PATH = _ROOT / 'logs.log'
+_METRICS_DIR = _ROOT / 'data' / 'call_metrics'
+_AUDIO_CACHE_DIR = Path(os.getenv('NPC_AUDIO_CACHE_DIR', str(_ROOT / 'data' / 'tts_cache')))
 
 
 def _create_logger() -> logging.Logger:
@@ -96,21 +140,87 @@ def _render_prompt(profile: CharacterProfile) -> str:
     )
 
 
-class CharacterAgent(Agent):
-    def __init__(self, profile: CharacterProfile) -> None:
-        super().__init__(instructions=_render_prompt(profile))
+# Rendered once at import so a character switch only swaps pre-built strings.
+INSTRUCTIONS = {token: _render_prompt(profile) for token, profile in PROFILES.items()}
+
+_DEFAULT_VOICE = VoiceConfig(
+    voice_id=_DEFAULT_VOICE_ID,
+    model=_TTS_MODEL,
+    streaming_latency=int(_TTS_STREAMING_LATENCY) if _TTS_STREAMING_LATENCY else None,
+    auto_mode=(_TTS_AUTO_MODE in {'1', 'true', 'yes', 'on'}) if _TTS_AUTO_MODE else None,
+)
+VOICE_CONFIGS = load_voice_configs(
+    _AGENT_INFO_PATH,
+    default_voice_id=_DEFAULT_VOICE.voice_id,
+    model=_DEFAULT_VOICE.model,
+    streaming_latency=_DEFAULT_VOICE.streaming_latency,
+    auto_mode=_DEFAULT_VOICE.auto_mode,
+)
+
+
+def _build_tts(voice: VoiceConfig) -> elevenlabs.TTS:
+    return elevenlabs.TTS(**voice.tts_kwargs())
 
 
-class TranscriptStore:
-    def __init__(self, root: Path) -> None:
-        self.root = root
-        self.root.mkdir(parents=True, exist_ok=True)
+def _reply_instructions(profile: CharacterProfile) -> str:
+    return (
+        f'You are {profile.name} ({profile.token}). '
+        'Reply in one or two short spoken sentences.'
+    )
+
 
-    def append(self, room_name: str, payload: dict[str, Any]) -> None:
-        ts = datetime.now(tz=timezone.utc).isoformat()
-        path = self.root / f'{room_name}.jsonl'
-        with path.open('a', encoding='utf-8') as f:
-            f.write(json.dumps({'timestamp': ts, **payload}, ensure_ascii=True) + '\n')
+# Greetings and stock lines synthesized ahead of time by tools/prerender_npc_audio.py.
+PRERENDER_LINES = load_prerender_lines(_AGENT_INFO_PATH)
+AUDIO_CACHE = AudioCache(_AUDIO_CACHE_DIR)
+
+
+def _cached_audio(voice: VoiceConfig, tts: Any, text: str) -> CachedAudio | None:
+    # Entries are raw PCM at the rate they were synthesized at; only serve them when the
+    # live TTS client plays the same format, so the audio track never gets mixed rates.
+    entry = AUDIO_CACHE.get(voice, text)
+    if entry is None:
+        return None
+    if entry.sample_rate != tts.sample_rate or entry.num_channels != tts.num_channels:
+        APP_LOGGER.info(
+            "audio_cache_format_mismatch key=%s cached_rate=%s tts_rate=%s",
+            entry.key[:12],
+            entry.sample_rate,
+            tts.sample_rate,
+        )
+        return None
+    return entry
+
+
+async def _say_known_line(
+    session: AgentSession, voices: VoiceRegistry, token: str, text: str
+) -> bool:
+    # Only lines whose full text is known up front (the greeting, stock lines) are
+    # looked up; LLM replies always stream straight into the live TTS.
+    entry = _cached_audio(voices.config(token), voices.tts(token), text)
+    if entry is None:
+        return False
+    await session.say(text, audio=_cached_frames(entry))
+    return True
+
+
+async def _cached_frames(entry: CachedAudio) -> AsyncIterator[rtc.AudioFrame]:
+    pcm = await asyncio.to_thread(entry.read_pcm)
+    for chunk, samples_per_channel in entry.iter_chunks(pcm):
+        yield rtc.AudioFrame(
+            data=chunk,
+            sample_rate=entry.sample_rate,
+            num_channels=entry.num_channels,
+            samples_per_channel=samples_per_channel,
+        )
+
+
+class CharacterAgent(Agent):
+    def __init__(self, profile: CharacterProfile, tts: Any = None) -> None:
+        instructions = INSTRUCTIONS.get(profile.token) or _render_prompt(profile)
+        if tts is None:
+            super().__init__(instructions=instructions)
+        else:
+            super().__init__(instructions=instructions, tts=tts)
 
 
 def _parse_metadata(raw: str) -> dict[str, Any]:
@@ -157,12 +267,73 @@ def _as_bool(value: Any) -> bool:
     return False
 
 
-transcripts = TranscriptStore(_ROOT / 'data' / 'call_transcripts')
-server = AgentServer()
+transcripts = TranscriptWriter(
+    _ROOT / 'data' / 'call_transcripts',
+    max_open_files=_TRANSCRIPT_MAX_OPEN_FILES,
+    fsync_interval=_TRANSCRIPT_FSYNC_SECONDS,
+    max_bytes=int(_TRANSCRIPT_ROTATE_MB * 1024 * 1024),
+    max_age_seconds=_TRANSCRIPT_ROTATE_HOURS * 60 * 60,
+)
+# Per-turn latency traces, one JSONL file per room next to the call transcripts.
+latency_traces = TranscriptWriter(
+    _METRICS_DIR,
+    max_open_files=_TRANSCRIPT_MAX_OPEN_FILES,
+    fsync_interval=_TRANSCRIPT_FSYNC_SECONDS,
+    max_bytes=int(_TRANSCRIPT_ROTATE_MB * 1024 * 1024),
+    max_age_seconds=_TRANSCRIPT_ROTATE_HOURS * 60 * 60,
+)
+worker_load = WorkerLoad(max_sessions=_MAX_SESSIONS, threshold=_LOAD_THRESHOLD)
+
+
+def _compute_load(worker: AgentServer) -> float:
+    return worker_load(len(worker.active_jobs))
+
+
+server = AgentServer(
+    load_fnc=_compute_load,
+    load_threshold=_LOAD_THRESHOLD,
+    num_idle_processes=_IDLE_PROCESSES,
+    job_memory_warn_mb=_JOB_MEMORY_WARN_MB,
+    job_memory_limit_mb=_JOB_MEMORY_LIMIT_MB,
+)
+
+
+def prewarm(proc: agents.JobProcess) -> None:
+    # Runs once per worker process before it is handed a job, so model weights and
+    # plugin clients are shared by every session instead of being rebuilt per room.
+    started = time.perf_counter()
+    proc.userdata['vad'] = silero.VAD.load()
+    proc.userdata['turn_detection'] = MultilingualModel()
+    proc.userdata['stt'] = deepgram.STT(model='nova-3', language='en-US')
+    voices = VoiceRegistry(VOICE_CONFIGS, _build_tts, default=_DEFAULT_VOICE)
+    voices.warm()
+    proc.userdata['voices'] = voices
+    proc.userdata['tts'] = voices.client(_DEFAULT_VOICE)
+    APP_LOGGER.info(
+        "prewarm_done pid=%s elapsed_ms=%.1f",
+        os.getpid(),
+        (time.perf_counter() - started) * 1000,
+    )
+
+
+def _warm_plugin_connections(*plugins: Any) -> None:
+    # Open STT/TTS HTTP and websocket pools while the room connection is negotiated.
+    for plugin in plugins:
+        if not hasattr(plugin, 'prewarm'):
+            continue
+        try:
+            plugin.prewarm()
+        except Exception:
+            APP_LOGGER.exception("plugin_prewarm_failed plugin=%s", type(plugin).__name__)
+
+
+server.setup_fnc = prewarm
 
 
 @server.rtc_session(agent_name='npc-router')
 async def npc_router(ctx: agents.JobContext):
+    job_started = time.perf_counter()
+    session_cost = SessionCostSampler()
     if not PROFILES:
         raise RuntimeError(f'No character profiles found in {_AGENT_INFO_PATH}')
 
@@ -175,12 +346,18 @@ async def npc_router(ctx: agents.JobContext):
         'pending_token': None,
     }
 
+    userdata = ctx.proc.userdata
+    if 'vad' not in userdata:
+        prewarm(ctx.proc)
+
+    voices: VoiceRegistry = userdata['voices']
+    _warm_plugin_connections(userdata['stt'], *voices.clients())
     session = AgentSession(
-        stt=deepgram.STT(model='nova-3', language='en-US'),
+        stt=userdata['stt'],
         llm='openai/gpt-4.1-mini',
-        tts=elevenlabs.TTS(voice_id=_DEFAULT_VOICE_ID, model='eleven_monolingual_v1'),
-        vad=silero.VAD.load(),
-        turn_detection=MultilingualModel(),
+        tts=userdata['tts'],
+        vad=userdata['vad'],
+        turn_detection=userdata['turn_detection'],
     )
 
     APP_LOGGER.info(
@@ -190,8 +367,44 @@ async def npc_router(ctx: agents.JobContext):
         initial_profile.token,
     )
 
+    async def _draft_reply(text: str) -> AsyncIterator[tuple[str, int, int]]:
+        profile = _resolve_profile(str(state['locked_token'] or state['token']))
+        # The agent's chat context already starts with its persona instructions.
+        chat_ctx = session.current_agent.chat_ctx.copy()
+        chat_ctx.add_message(role='system', content=_reply_instructions(profile))
+        chat_ctx.add_message(role='user', content=text)
+
+        streamed = 0
+        async with session.llm.chat(chat_ctx=chat_ctx) as stream:
+            async for chunk in stream:
+                delta = chunk.delta.content if chunk.delta else None
+                if delta:
+                    streamed += 1
+                    yield delta, 1, 0
+                usage = getattr(chunk, 'usage', None)
+                if usage is not None:
+                    # Providers report exact usage on the last chunk; top up the delta count.
+                    yield '', max(0, usage.completion_tokens - streamed), usage.prompt_tokens
+                    streamed = max(streamed, usage.completion_tokens)
+
+    speculation = (
+        SpeculativeReplies(
+            _draft_reply,
+            stable_ms=_SPECULATIVE_STABLE_MS,
+            divergence=_SPECULATIVE_DIVERGENCE,
+            # Committed drafts skip the LLM node, so report their LLM metrics ourselves.
+            on_commit=lambda ttft, prompt_tokens, completion_tokens: tracer.on_llm(
+                ttft, prompt_tokens, completion_tokens
+            ),
+        )
+        if _SPECULATIVE_REPLIES
+        else None
+    )
+
     def _hard_stop_current_turn() -> None:
         # Prevent carry-over speech/transcript when disengaging or switching character.
+        if speculation is not None:
+            speculation.cancel()
         try:
             session.clear_user_turn()
         except Exception:
@@ -221,16 +434,13 @@ async def npc_router(ctx: agents.JobContext):
 
         _hard_stop_current_turn()
         state['token'] = profile.token
-        session.update_agent(CharacterAgent(profile))
+        session.update_agent(CharacterAgent(profile, voices.tts(profile.token)))
         APP_LOGGER.info(
             "switch_profile room=%s character=%s",
             getattr(ctx.room, 'name', 'unknown'),
             profile.token,
         )
 
-        if hasattr(session.tts, 'update_options'):
-            session.tts.update_options(voice_id=_DEFAULT_VOICE_ID)
-
     def _set_engagement(engaged: bool, token: str | None = None) -> None:
         if engaged:
             if token and state['engaged'] and state['locked_token'] is not None:
@@ -260,24 +470,44 @@ async def npc_router(ctx: agents.JobContext):
             pending or '',
         )
 
+    def _apply_switch(token: str) -> None:
+        if state['engaged'] and state['locked_token'] is not None:
+            state['pending_token'] = token
+        else:
+            _switch_profile(token)
+
+    # Proximity-driven clients send bursts of switch/engagement packets; only the
+    # settled target reaches _switch_profile, at a bounded rate per room.
+    switch_debouncer = SwitchDebouncer(
+        _apply_switch,
+        _set_engagement,
+        engaged=lambda: (bool(state['engaged']), state['locked_token']),
+        debounce_ms=_SWITCH_DEBOUNCE_MS,
+        max_delay_ms=_SWITCH_MAX_DELAY_MS,
+        min_interval_ms=_SWITCH_MIN_INTERVAL_MS,
+        disengage_ms=_DISENGAGE_DEBOUNCE_MS,
+    )
+
     @ctx.room.on('data_received')
     def _on_data_received(packet: Any):
         topic, payload = _extract_topic_and_payload(packet)
         if topic == 'character_switch':
             token = str(payload.get('character_token', '')).strip().lower()
             if token:
-                if state['engaged'] and state['locked_token'] is not None:
-                    state['pending_token'] = token
-                else:
-                    _switch_profile(token)
+                switch_debouncer.on_switch(_resolve_profile(token).token)
         elif topic == 'character_engagement':
             engaged = _as_bool(payload.get('engaged', False))
             token = str(payload.get('character_token', '')).strip().lower() or None
-            _set_engagement(engaged, token)
+            switch_debouncer.on_engagement(
+                engaged, _resolve_profile(token).token if token else None
+            )
 
     @session.on('user_input_transcribed')
     def _on_user_input_transcribed(event: Any):
         if not getattr(event, 'is_final', True):
+            interim = getattr(event, 'transcript', '').strip()
+            if speculation is not None and state['engaged'] and interim:
+                speculation.on_interim(interim)
             return
 
         transcript = getattr(event, 'transcript', '').strip()
@@ -312,11 +542,93 @@ async def npc_router(ctx: agents.JobContext):
         )
 
         profile = _resolve_profile(active_token)
-        session.generate_reply(
-            instructions=(
-                f'You are {profile.name} ({profile.token}). '
-                'Reply in one or two short spoken sentences.'
+        drafted = speculation.on_final(transcript) if speculation is not None else None
+        if drafted is not None:
+            session.say(drafted, add_to_chat_ctx=True)
+            return
+
+        session.generate_reply(instructions=_reply_instructions(profile))
+
+    tracer = TurnTracer(
+        sink=lambda record: latency_traces.append(ctx.room.name, record),
+        character=lambda: str(state['locked_token'] or state['token']),
+    )
+
+    @session.on('metrics_collected')
+    def _on_metrics_collected(event: Any):
+        collected = getattr(event, 'metrics', None)
+        if isinstance(collected, lk_metrics.EOUMetrics):
+            tracer.on_eou(collected.end_of_utterance_delay, collected.transcription_delay)
+        elif isinstance(collected, lk_metrics.LLMMetrics):
+            tracer.on_llm(collected.ttft, collected.prompt_tokens, collected.completion_tokens)
+        elif isinstance(collected, lk_metrics.TTSMetrics):
+            tracer.on_tts(collected.ttfb)
+
+    async def _on_session_end() -> None:
+        # Speech callbacks only enqueue records; make sure they hit disk before the job exits.
+        tracer.close()
+        cost = session_cost.finish()
+        latency_traces.append(ctx.room.name, {'type': 'session_cost', **cost.as_dict()})
+        APP_LOGGER.info(
+            "session_cost room=%s %s",
+            ctx.room.name,
+            ' '.join(f'{k}={v}' for k, v in cost.as_dict().items()),
+        )
+        # A job process serves one session, so stop the writers' tasks and executor
+        # threads too. They start again on the next append if the process is reused.
+        await transcripts.aclose()
+        await latency_traces.aclose()
+        VOICE_METRICS.merge_textfile(_METRICS_DIR / 'npc_router.prom')
+        APP_LOGGER.info(
+            "transcripts_flushed room=%s written=%s dropped=%s",
+            ctx.room.name,
+            transcripts.stats.written,
+            transcripts.stats.dropped,
+        )
+        switch_debouncer.cancel()
+        APP_LOGGER.info(
+            "switch_summary room=%s %s",
+            ctx.room.name,
+            ' '.join(f'{k}={v}' for k, v in switch_debouncer.stats.as_dict().items()),
+        )
+        if speculation is not None:
+            speculation.cancel()
+            APP_LOGGER.info(
+                "speculation_summary room=%s %s",
+                ctx.room.name,
+                ' '.join(f'{k}={v}' for k, v in speculation.stats.as_dict().items()),
             )
+
+    ctx.add_shutdown_callback(_on_session_end)
+
+    first_audio_logged = False
+
+    @session.on('agent_state_changed')
+    def _on_agent_state_changed(event: Any):
+        nonlocal first_audio_logged
+        if getattr(event, 'new_state', None) != 'speaking':
+            return
+
+        tracer.on_playout()
+        if first_audio_logged:
+            return
+
+        first_audio_logged = True
+        first_audio_ms = (time.perf_counter() - job_started) * 1000
+        latency_traces.append(
+            ctx.room.name,
+            {
+                'type': 'first_audio',
+                'character': str(state['token']),
+                'job_start_to_first_audio_ms': round(first_audio_ms, 1),
+            },
+        )
+        APP_LOGGER.info(
+            "first_audio room=%s job=%s character=%s job_start_to_first_audio_ms=%.1f",
+            getattr(ctx.room, 'name', 'unknown'),
+            getattr(ctx.job, 'id', 'unknown'),
+            state.get('token'),
+            first_audio_ms,
         )
 
     @session.on('agent_speech_committed')
@@ -336,7 +648,7 @@ async def npc_router(ctx: agents.JobContext):
 
     await session.start(
         room=ctx.room,
-        agent=CharacterAgent(initial_profile),
+        agent=CharacterAgent(initial_profile, voices.tts(initial_profile.token)),
         room_options=room_io.RoomOptions(
             audio_input=room_io.AudioInputOptions(
                 noise_cancellation=lambda params: (
@@ -349,7 +661,23 @@ async def npc_router(ctx: agents.JobContext):
         ),
     )
 
+    APP_LOGGER.info(
+        "session_ready room=%s job=%s job_start_to_ready_ms=%.1f",
+        getattr(ctx.room, 'name', 'unknown'),
+        getattr(ctx.job, 'id', 'unknown'),
+        (time.perf_counter() - job_started) * 1000,
+    )
+
     if _AUTO_GREET:
+        greeting = PRERENDER_LINES.get(initial_profile.token, [''])[0]
+        if greeting and await _say_known_line(session, voices, initial_profile.token, greeting):
+            APP_LOGGER.info(
+                "greeting_cache_hit room=%s character=%s",
+                getattr(ctx.room, 'name', 'unknown'),
+                initial_profile.token,
+            )
+            return
+
         await session.generate_reply(
             instructions=(
                 f'Greet the user briefly as {initial_profile.name} and offer help in character.'
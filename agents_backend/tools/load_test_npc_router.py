@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from dotenv import load_dotenv
+from livekit import api, rtc
+from livekit.protocol.agent_dispatch import CreateAgentDispatchRequest
+from livekit.protocol.room import CreateRoomRequest, DeleteRoomRequest
+
+_ROOT = Path(__file__).resolve().parent.parent
+load_dotenv(_ROOT / '.env.local')
+load_dotenv(_ROOT / '.env')
+
+_METRICS_DIR = _ROOT / 'data' / 'call_metrics'
+_FRAME_MS = 20
+
+
+@dataclass
+class _RoomResult:
+    room_name: str
+    agent_joined_ms: float | None = None
+    agent_audio_ms: float | None = None
+    frames_sent: int = 0
+    error: str = ''
+    cost: dict[str, float] = field(default_factory=dict)
+
+
+def _load_wav(path: Path) -> tuple[bytes, int, int]:
+    with wave.open(str(path), 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise SystemExit(f'{path}: only 16-bit PCM WAV files are supported')
+        # _stream_audio loops over whole frames; with none it would never await.
+        if wav.getnframes() < wav.getframerate() * _FRAME_MS // 1000:
+            raise SystemExit(f'{path}: shorter than one {_FRAME_MS} ms frame')
+        return wav.readframes(wav.getnframes()), wav.getframerate(), wav.getnchannels()
+
+
+def _join_token(room_name: str, identity: str) -> str:
+    return (
+        api.AccessToken(
+            api_key=os.environ['LIVEKIT_API_KEY'],
+            api_secret=os.environ['LIVEKIT_API_SECRET'],
+        )
+        .with_identity(identity)
+        .with_grants(
+            api.VideoGrants(
+                room_join=True,
+                room=room_name,
+                can_publish=True,
+                can_subscribe=True,
+                can_publish_data=True,
+            )
+        )
+        .to_jwt()
+    )
+
+
+async def _stream_audio(
+    source: rtc.AudioSource, pcm: bytes, sample_rate: int, channels: int, deadline: float
+) -> int:
+    samples_per_frame = sample_rate * _FRAME_MS // 1000
+    frame_bytes = samples_per_frame * channels * 2
+    sent = 0
+    while time.monotonic() < deadline:
+        for start in range(0, len(pcm) - frame_bytes + 1, frame_bytes):
+            if time.monotonic() >= deadline:
+                break
+            # capture_frame blocks once the source buffer is full, which paces us in real time.
+            await source.capture_frame(
+                rtc.AudioFrame(
+                    data=pcm[start : start + frame_bytes],
+                    sample_rate=sample_rate,
+                    num_channels=channels,
+                    samples_per_channel=samples_per_frame,
+                )
+            )
+            sent += 1
+
+    return sent
+
+
+async def _run_room(
+    lkapi: api.LiveKitAPI,
+    url: str,
+    room_name: str,
+    audio: tuple[bytes, int, int],
+    args: argparse.Namespace,
+) -> _RoomResult:
+    result = _RoomResult(room_name=room_name)
+    started = time.monotonic()
+    room = rtc.Room()
+
+    @room.on('participant_connected')
+    def _on_participant_connected(participant: rtc.RemoteParticipant):
+        if participant.kind == rtc.ParticipantKind.PARTICIPANT_KIND_AGENT and result.agent_joined_ms is None:
+            result.agent_joined_ms = (time.monotonic() - started) * 1000
+
+    @room.on('track_subscribed')
+    def _on_track_subscribed(track: rtc.Track, publication, participant: rtc.RemoteParticipant):
+        if track.kind == rtc.TrackKind.KIND_AUDIO and result.agent_audio_ms is None:
+            result.agent_audio_ms = (time.monotonic() - started) * 1000
+
+    try:
+        await lkapi.room.create_room(CreateRoomRequest(name=room_name))
+        await lkapi.agent_dispatch.create_dispatch(
+            CreateAgentDispatchRequest(
+                agent_name=args.agent_name,
+                room=room_name,
+                metadata=json.dumps({'character_token': args.character_token}),
+            )
+        )
+        await room.connect(url, _join_token(room_name, f'loadtest-{uuid.uuid4().hex[:8]}'))
+
+        pcm, sample_rate, channels = audio
+        source = rtc.AudioSource(sample_rate, channels)
+        track = rtc.LocalAudioTrack.create_audio_track('loadtest-mic', source)
+        await room.local_participant.publish_track(
+            track, rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
+        )
+        if args.engage:
+            await room.local_participant.publish_data(
+                json.dumps({'engaged': True, 'character_token': args.character_token}),
+                reliable=True,
+                topic='character_engagement',
+            )
+
+        result.frames_sent = await _stream_audio(
+            source, pcm, sample_rate, channels, deadline=started + args.duration
+        )
+    except Exception as e:
+        result.error = f'{type(e).__name__}: {e}'
+    finally:
+        await room.disconnect()
+        try:
+            await lkapi.room.delete_room(DeleteRoomRequest(room=room_name))
+        except Exception:
+            pass
+
+    return result
+
+
+def _read_session_costs(metrics_dir: Path, room_names: set[str]) -> dict[str, dict[str, float]]:
+    costs: dict[str, dict[str, float]] = {}
+    for room_name in room_names:
+        path = metrics_dir / f'{room_name}.jsonl'
+        if not path.exists():
+            continue
+        lines = path.read_text(encoding='utf-8').split('\n')
+        # The last element is empty, or a line a live worker is still writing.
+        for line in lines[:-1]:
+            record = json.loads(line)
+            if record.get('type') == 'session_cost':
+                costs[room_name] = record
+
+    return costs
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Simulate N concurrent rooms against the npc-router worker and estimate sessions per core'
+    )
+    parser.add_argument('--rooms', type=int, default=4, help='Number of concurrent rooms')
+    parser.add_argument('--audio', type=Path, action='append', required=True, help='16-bit PCM WAV file (repeatable, assigned round-robin)')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds each room streams audio')
+    parser.add_argument('--ramp', type=float, default=0.5, help='Seconds between room starts')
+    parser.add_argument('--agent-name', default='npc-router')
+    parser.add_argument('--character-token', default='common1')
+    parser.add_argument('--engage', action='store_true', help='Send character_engagement=true so the NPC replies')
+    parser.add_argument(
+        '--metrics-dir',
+        type=Path,
+        default=_METRICS_DIR,
+        help='Worker latency trace directory; session_cost records are read from it when the worker runs locally',
+    )
+    parser.add_argument('--cost-wait', type=float, default=10.0, help='Seconds to wait for workers to flush session costs')
+    args = parser.parse_args()
+
+    url = os.getenv('LIVEKIT_URL')
+    if not url:
+        raise SystemExit('Missing LIVEKIT_URL in environment')
+
+    audio_files = [_load_wav(path) for path in args.audio]
+    run_id = uuid.uuid4().hex[:6]
+
+    async with api.LiveKitAPI() as lkapi:
+        tasks = []
+        for i in range(args.rooms):
+            room_name = f'loadtest-{run_id}-{i}'
+            tasks.append(
+                asyncio.create_task(
+                    _run_room(lkapi, url, room_name, audio_files[i % len(audio_files)], args)
+                )
+            )
+            await asyncio.sleep(args.ramp)
+        results = await asyncio.gather(*tasks)
+
+    await asyncio.sleep(args.cost_wait)
+    costs = _read_session_costs(args.metrics_dir, {r.room_name for r in results})
+
+    print(f'{"room":<24} {"agent_join_ms":>13} {"agent_audio_ms":>14} {"frames":>7} {"cpu_cores":>9} {"rss_peak_mb":>11}  error')
+    for r in results:
+        cost = costs.get(r.room_name, {})
+        print(
+            f'{r.room_name:<24} {r.agent_joined_ms or float("nan"):>13.0f} '
+            f'{r.agent_audio_ms or float("nan"):>14.0f} {r.frames_sent:>7} '
+            f'{cost.get("cpu_cores_avg", float("nan")):>9.3f} '
+            f'{cost.get("rss_peak_mb", float("nan")):>11.1f}  {r.error}'
+        )
+
+    joined = [r for r in results if r.agent_joined_ms is not None]
+    print(f'\nrooms={len(results)} agent_joined={len(joined)} failed={sum(1 for r in results if r.error)}')
+    if costs:
+        cpu = [c['cpu_cores_avg'] for c in costs.values()]
+        rss = [c['rss_peak_mb'] for c in costs.values()]
+        mean_cpu = sum(cpu) / len(cpu)
+        print(f'mean cpu_cores_per_session={mean_cpu:.3f} mean rss_peak_mb={sum(rss) / len(rss):.1f}')
+        if mean_cpu > 0:
+            print(f'sessions_per_core~={1 / mean_cpu:.1f}')
+    else:
+        print(f'No session_cost records found in {args.metrics_dir}; is the worker running on this machine?')
+
+
+if __name__ == '__main__':
+    asyncio.run(_main())
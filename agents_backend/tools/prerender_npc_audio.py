@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+from pathlib import Path
+
+import aiohttp
+from dotenv import load_dotenv
+from livekit.plugins import elevenlabs
+
+from agents.infrastructure.voice import (
+    AudioCache,
+    VoiceConfig,
+    load_prerender_lines,
+    load_voice_configs,
+)
+
+_ROOT = Path(__file__).resolve().parent.parent
+load_dotenv(_ROOT / '.env.local')
+load_dotenv(_ROOT / '.env')
+
+_AGENT_INFO_PATH = _ROOT / 'src' / 'agents' / 'agent_info' / 'agent_info.json'
+_DEFAULT_VOICE_ID = os.getenv('NPC_DEFAULT_VOICE_ID', '7DkaWvcqvBstUe3167oW').strip() or '7DkaWvcqvBstUe3167oW'
+_TTS_MODEL = os.getenv('NPC_TTS_MODEL', 'eleven_monolingual_v1').strip() or 'eleven_monolingual_v1'
+_AUDIO_CACHE_DIR = Path(os.getenv('NPC_AUDIO_CACHE_DIR', str(_ROOT / 'data' / 'tts_cache')))
+
+
+async def _synthesize(
+    http_session: aiohttp.ClientSession, voice: VoiceConfig, text: str
+) -> tuple[bytes, int, int]:
+    tts = elevenlabs.TTS(**voice.tts_kwargs(), http_session=http_session)
+    pcm = bytearray()
+    sample_rate = tts.sample_rate
+    num_channels = tts.num_channels
+    async with tts.synthesize(text) as stream:
+        async for event in stream:
+            pcm.extend(bytes(event.frame.data))
+            sample_rate = event.frame.sample_rate
+            num_channels = event.frame.num_channels
+
+    return bytes(pcm), sample_rate, num_channels
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Pre-synthesize NPC greetings and stock lines into the worker audio cache'
+    )
+    parser.add_argument('--cache-dir', type=Path, default=_AUDIO_CACHE_DIR, help='Audio cache directory')
+    parser.add_argument('--character-token', action='append', help='Only render these characters (repeatable)')
+    parser.add_argument('--force', action='store_true', help='Re-synthesize lines that are already cached')
+    parser.add_argument('--dry-run', action='store_true', help='List missing lines without calling the TTS API')
+    args = parser.parse_args()
+
+    cache = AudioCache(args.cache_dir)
+    voices = load_voice_configs(
+        _AGENT_INFO_PATH,
+        default_voice_id=_DEFAULT_VOICE_ID,
+        model=_TTS_MODEL,
+    )
+    lines = load_prerender_lines(_AGENT_INFO_PATH)
+    tokens = [t.strip().lower() for t in args.character_token] if args.character_token else list(lines)
+
+    rendered = skipped = 0
+    async with aiohttp.ClientSession() as http_session:
+        for token in tokens:
+            voice = voices.get(token)
+            if voice is None:
+                print(f'Unknown character token: {token}')
+                continue
+
+            for text in lines.get(token, []):
+                if not args.force and cache.get(voice, text) is not None:
+                    skipped += 1
+                    continue
+                if args.dry_run:
+                    print(f'missing character={token} voice={voice.voice_id} text={text!r}')
+                    continue
+
+                pcm, sample_rate, num_channels = await _synthesize(http_session, voice, text)
+                entry = cache.put(voice, text, pcm, sample_rate=sample_rate, num_channels=num_channels)
+                rendered += 1
+                print(f'rendered character={token} key={entry.key[:12]} bytes={len(pcm)} text={text!r}')
+
+    print(f'Done. rendered={rendered} already_cached={skipped} entries={len(cache)}')
+
+
+if __name__ == '__main__':
+    asyncio.run(_main())
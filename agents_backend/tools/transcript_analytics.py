@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from agents.infrastructure.voice import TranscriptAnalytics, TranscriptColumnStore
+
+_ROOT = Path(__file__).resolve().parent.parent
+_TRANSCRIPTS_DIR = _ROOT / 'data' / 'call_transcripts'
+_CACHE_DIR = _ROOT / 'data' / 'transcript_columns'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Aggregate npc-router call transcripts: turns, ignored ratio, switches, reply lengths'
+    )
+    parser.add_argument('--transcripts-dir', type=Path, default=_TRANSCRIPTS_DIR, help='Directory with per-room transcripts')
+    parser.add_argument('--cache-dir', type=Path, default=_CACHE_DIR, help='Columnar cache; only new transcript bytes are parsed')
+    parser.add_argument('--sessions', action='store_true', help='Also print one row per session')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    store = TranscriptColumnStore(args.transcripts_dir, args.cache_dir)
+    started = time.perf_counter()
+    added = store.refresh()
+    refresh_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    analytics = TranscriptAnalytics(store)
+    summary = analytics.summary()
+    sessions = analytics.sessions() if args.sessions else []
+    query_ms = (time.perf_counter() - started) * 1000
+
+    if args.json:
+        report = {'rows_added': added, 'refresh_ms': round(refresh_ms, 1), 'query_ms': round(query_ms, 1), **summary}
+        if args.sessions:
+            report['per_session'] = [asdict(s) for s in sessions]
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f'rows={summary["rows"]} added={added} refresh_ms={refresh_ms:.1f} query_ms={query_ms:.1f}')
+    print(
+        f'sessions={summary["sessions"]} turns/session mean={summary["turns_per_session_mean"]} '
+        f'p50={summary["turns_per_session_p50"]:g}'
+    )
+    print(f'ignored_ratio={summary["ignored_ratio"]} switches/min={summary["switches_per_minute"]}')
+    reply = summary['reply_words']
+    if reply['count']:
+        print(
+            f'reply words: n={reply["count"]} mean={reply["mean"]} '
+            f'p50={reply["p50"]:g} p90={reply["p90"]:g} p99={reply["p99"]:g}'
+        )
+        for bucket, count in reply['histogram'].items():
+            if count:
+                print(f'  {bucket:>9} {count}')
+    else:
+        print('reply words: no agent replies recorded')
+
+    if args.sessions:
+        print(f'\n{"room":<36} {"turns":>6} {"ignored":>8} {"switches":>9} {"duration_s":>11}')
+        for s in sessions:
+            print(f'{s.room:<36} {s.turns:>6} {s.ignored:>8} {s.switches:>9} {s.duration_s:>11}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from agents.infrastructure.voice import VOICE_STAGES, percentile
+
+_ROOT = Path(__file__).resolve().parent.parent
+_METRICS_DIR = _ROOT / 'data' / 'call_metrics'
+
+
+def _load_samples(metrics_dir: Path) -> tuple[dict[tuple[str, str], list[float]], int]:
+    samples: dict[tuple[str, str], list[float]] = defaultdict(list)
+    turns = 0
+    for path in sorted(metrics_dir.glob('*.jsonl')):
+        with path.open('r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                character = str(record.get('character', 'unknown'))
+                if record.get('type') == 'turn':
+                    turns += 1
+                    for stage, value in (record.get('stages_ms') or {}).items():
+                        samples[(character, stage)].append(float(value))
+                elif record.get('type') == 'first_audio':
+                    value = record.get('job_start_to_first_audio_ms')
+                    if value is not None:
+                        samples[(character, 'job_first_audio')].append(float(value))
+
+    return samples, turns
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Report p50/p95 voice pipeline latency per stage and character'
+    )
+    parser.add_argument('--metrics-dir', type=Path, default=_METRICS_DIR, help='Directory with per-room latency traces')
+    parser.add_argument('--character', help='Only report this character token')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    samples, turns = _load_samples(args.metrics_dir)
+    stage_order = {stage: i for i, stage in enumerate((*VOICE_STAGES, 'job_first_audio'))}
+    rows = []
+    for (character, stage), values in sorted(
+        samples.items(), key=lambda item: (item[0][0], stage_order.get(item[0][1], 99))
+    ):
+        if args.character and character != args.character.strip().lower():
+            continue
+        rows.append(
+            {
+                'character': character,
+                'stage': stage,
+                'count': len(values),
+                'p50_ms': round(percentile(values, 50), 1),
+                'p95_ms': round(percentile(values, 95), 1),
+            }
+        )
+
+    if args.json:
+        print(json.dumps({'turns': turns, 'rows': rows}, indent=2))
+        return
+
+    print(f'turns={turns} traces_dir={args.metrics_dir}')
+    print(f'{"character":<14} {"stage":<16} {"count":>6} {"p50_ms":>9} {"p95_ms":>9}')
+    for row in rows:
+        print(
+            f'{row["character"]:<14} {row["stage"]:<16} {row["count"]:>6} '
+            f'{row["p50_ms"]:>9} {row["p95_ms"]:>9}'
+        )
+
+
+if __name__ == '__main__':
+    main()